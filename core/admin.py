@@ -1,9 +1,10 @@
 from django.contrib import admin
 from .models import User, Design, CDR,BoxDesign
+from .admin_mixins import FastChangeListMixin, FullTextSearchMixin
 
 # Register User model
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('id', 'username', 'email', 'role', 'is_active')
     list_filter = ('role', 'is_active')
     search_fields = ('username', 'email')
@@ -11,23 +12,29 @@ class UserAdmin(admin.ModelAdmin):
 
 # Register Design model
 @admin.register(Design)
-class DesignAdmin(admin.ModelAdmin):
+class DesignAdmin(FastChangeListMixin, FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('id', 'name', 'user', 'status', 'created_at', 'updated_at')
     list_filter = ('status', 'created_at')
-    search_fields = ('name', 'user__username')
+    list_select_related = ('user',)
+    list_defer = ('dimensions', 'material_specs')
+    search_fields = ('user__username',)  # Names are matched by the full-text index
     ordering = ('id',)
 
 # Register CDR model
 @admin.register(CDR)
-class CDRAdmin(admin.ModelAdmin):
+class CDRAdmin(FastChangeListMixin, FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('id', 'design', 'generated_by', 'approval_status', 'generated_at')
     list_filter = ('approval_status', 'generated_at')
-    search_fields = ('design__name', 'generated_by__username')
+    list_select_related = ('design', 'generated_by')
+    list_defer = ('specifications', 'design__dimensions', 'design__material_specs')
+    search_related = ('design',)  # Design names are matched by the design index
+    search_fields = ('generated_by__username',)  # Specifications are matched by the full-text index
     ordering = ('id',)
     
 @admin.register(BoxDesign)
-class BoxDesignAdmin(admin.ModelAdmin):
+class BoxDesignAdmin(FastChangeListMixin, FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['id', 'user', 'width', 'height', 'depth', 'material', 'text', 'created_at']
     list_filter = ('material', 'created_at')
-    search_fields = ['material', 'text']
+    list_select_related = ('user',)
+    search_fields = ['material']  # Box text is matched by the full-text index
     ordering = ('id',)
@@ -4,3 +4,22 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.conf import settings
+        from . import change_feed, db_health, layout_artifacts, layout_engine, login_throttle, search
+        from .instrumentation import metrics, phase
+
+        # Box styles compile on import; warm-up also fills the layout caches so
+        # the first requests don't pay for rendering and compression
+        layout_engine.set_phase_hook(phase)
+        metrics.register_collector(layout_engine.prometheus_lines)
+        metrics.register_collector(db_health.prometheus_lines)
+        metrics.register_collector(login_throttle.prometheus_lines)
+        layout_engine.warm_up(getattr(settings, 'LAYOUT_WARM_UP_SIZES', layout_engine.DEFAULT_WARM_UP_SIZES))
+
+        # Keep the full-text search index, the change feed and the layout
+        # artifacts current as designs, CDRs and box designs change
+        search.connect_signals()
+        change_feed.connect_signals()
+        layout_artifacts.connect_signals()
@@ -0,0 +1,300 @@
+"""
+Async-native variants of the design, CDR, box design and box layout endpoints.
+
+Served under /api/async/ when the project runs on ASGI (tynor_box_system.asgi).
+Queries use Django's async ORM, layout rendering and compression run on a
+dedicated thread pool and storage calls are moved off the event loop, so one
+worker can keep many slow-storage requests in flight. Responses match the
+synchronous views in core.views byte for byte (AsyncViewTests compares them).
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.urls import reverse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from rest_framework import exceptions, status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.settings import api_settings
+from . import fast_serializers, layout_engine
+from .box_styles import DEFAULT_STYLE
+from .etags import box_layout_etag
+from .instrumentation import phase
+from .renderers import FastJSONRenderer
+from .models import Design, CDR, BoxDesign
+from .serializers import DesignSerializer, CDRSerializer, BoxDesignSerializer
+from .utils import load_layout_variant, store_layout_variants
+from .views import LAYOUT_STORAGE_DIR, GenerateBoxLayoutView, svg_response
+
+logger = logging.getLogger(__name__)
+
+# Threads used for CPU-bound layout rendering and compression
+render_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ASYNC_RENDER_WORKERS', 4), thread_name_prefix='layout-render'
+)
+
+# Storage backends are blocking; run them in threads that don't hold the ORM thread
+store_variants = sync_to_async(store_layout_variants, thread_sensitive=False)
+load_variant = sync_to_async(load_layout_variant, thread_sensitive=False)
+
+
+@sync_to_async(thread_sensitive=False)
+def storage_exists(path):
+    return default_storage.exists(path)
+
+
+async def run_in_executor(func, *args):
+    """
+    Run ``func`` on the render thread pool, keeping the caller's context so
+    instrumentation phases are recorded against the current request.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(render_executor, functools.partial(context.run, func, *args))
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    """
+    JSON response rendered exactly as DRF renders it for the synchronous views.
+    """
+    return HttpResponse(FastJSONRenderer().render(data), content_type='application/json', status=status)
+
+
+def csrf_failure(request):
+    """
+    Enforce CSRF for session-authenticated requests, as DRF's SessionAuthentication does.
+    """
+    check = CsrfViewMiddleware(lambda request: None)
+    check.process_request(request)
+    return check.process_view(request, None, (), {})
+
+
+async def authenticate(request):
+    """
+    Resolve the request user from the session or any of DRF's configured
+    non-session authenticators (JWT, token). Returns (user, error_response).
+    """
+    user = await request.auser()
+    if user.is_authenticated:
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            failure = csrf_failure(request)
+            if failure is not None:
+                return None, failure
+        return user, None
+
+    for authenticator_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        if issubclass(authenticator_class, SessionAuthentication):
+            continue
+        try:
+            # Authenticators look the user up with the sync ORM
+            result = await sync_to_async(authenticator_class().authenticate)(request)
+        except exceptions.AuthenticationFailed as e:
+            detail = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+            return None, JsonResponse(detail, status=status.HTTP_401_UNAUTHORIZED)
+        if result is not None:
+            return result[0], None
+
+    return None, JsonResponse(
+        {"detail": "Authentication credentials were not provided."}, status=status.HTTP_403_FORBIDDEN
+    )
+
+
+def request_data(request):
+    """
+    Parse a JSON, form or multipart request body into a dict for a serializer.
+    """
+    if request.content_type == 'application/json':
+        return json.loads(request.body or b'{}')
+    data = request.POST.dict()
+    data.update(request.FILES.dict())
+    return data
+
+
+class AsyncAPIView(View):
+    """
+    Base for the async views: authentication, CSRF handling and ETags.
+    """
+    authentication_required = True
+    etag_func = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        if cls.etag_func is not None:
+            # method_decorator() wraps methods synchronously, so decorate the view itself
+            view = condition(etag_func=cls.etag_func)(view)
+        # Authentication enforces CSRF itself, for session users only
+        return csrf_exempt(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.authentication_required:
+            user, error = await authenticate(request)
+            if error is not None:
+                return error
+            request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncListCreateView(AsyncAPIView):
+    """
+    Async list and create for a model, using the same serializer as its sync view.
+    ``owner_field`` is passed to ``serializer.save()`` as the request user.
+    """
+    model = None
+    serializer_class = None
+    owner_field = None
+    label = None
+    use_replica = True
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    def serialize(self, instances, fields=None):
+        with phase('serialize', serializer=self.serializer_class.__name__) as context:
+            data = self.serializer_class(instances, many=True, fields=fields).data
+            context['rows'] = len(data)
+        return data
+
+    def render_rows(self, plan, rows):
+        with phase('serialize', serializer=self.serializer_class.__name__) as context:
+            data = plan.render(rows)
+            context['rows'] = len(data)
+        return data
+
+    async def get(self, request):
+        """
+        List all objects
+        """
+        try:
+            fields = self.serializer_class.requested_fields(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            plan = fast_serializers.read_plan(self.serializer_class, fields)
+            if plan is not None:
+                rows = [row async for row in plan.values(self.get_queryset())]
+                data = await run_in_executor(self.render_rows, plan, rows)
+            else:
+                queryset = self.serializer_class.project(self.get_queryset(), fields)
+                instances = [obj async for obj in queryset]
+                data = await run_in_executor(self.serialize, instances, fields)
+            return json_response(data)
+        except Exception as e:
+            logger.exception("Failed to fetch %s", self.label)
+            return JsonResponse({"error": f"Failed to fetch {self.label}: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    async def post(self, request):
+        """
+        Create a new object
+        """
+        try:
+            data = request_data(request)
+        except ValueError as e:
+            return JsonResponse({"detail": f"JSON parse error - {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.serializer_class(data=data)
+        # Related-field validation queries the database
+        if not await sync_to_async(serializer.is_valid)():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # Save through the serializer, as the sync views do, so its create() runs
+            owner = {self.owner_field: request.user} if self.owner_field else {}
+            await sync_to_async(serializer.save)(**owner)
+            return json_response(serializer.data, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            logger.exception("Failed to create %s", self.label)
+            return JsonResponse({"error": f"Failed to create {self.label}: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncDesignView(AsyncListCreateView):
+    """
+    Async variant of DesignView.
+    """
+    model = Design
+    serializer_class = DesignSerializer
+    owner_field = 'user'
+    label = 'designs'
+
+
+class AsyncCDRView(AsyncListCreateView):
+    """
+    Async variant of CDRView.
+    """
+    model = CDR
+    serializer_class = CDRSerializer
+    owner_field = 'generated_by'
+    label = 'CDRs'
+
+
+class AsyncBoxDesignView(AsyncListCreateView):
+    """
+    Async variant of BoxDesignView.
+    """
+    model = BoxDesign
+    serializer_class = BoxDesignSerializer
+    owner_field = 'user'
+    label = 'box designs'
+
+
+class AsyncGenerateBoxLayoutView(AsyncAPIView):
+    """
+    Async variant of GenerateBoxLayoutView.
+    """
+    authentication_required = False
+    etag_func = staticmethod(box_layout_etag)
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            length = int(request.GET.get('L', 0))
+            breadth = int(request.GET.get('B', 0))
+            height = int(request.GET.get('H', 0))
+            style = request.GET.get('style', DEFAULT_STYLE)
+
+            if length <= 0 or breadth <= 0 or height <= 0:
+                return JsonResponse({
+                    "error": "Invalid dimensions provided. Length, breadth, and height must be positive integers."
+                }, status=400)
+
+            file_path = GenerateBoxLayoutView.layout_file_path(length, breadth, height, style)
+            with phase('storage'):
+                stored = await storage_exists(file_path)
+            if not stored:
+                variants = await run_in_executor(layout_engine.render_variants, length, breadth, height, style)
+                await store_variants(file_path, variants)
+
+            return JsonResponse({
+                "message": "Box layout generated successfully.",
+                "file_path": file_path,
+                "url": reverse('async_box_layout_file', args=[file_path.rsplit('/', 1)[-1]]),
+            })
+
+        except Exception as e:
+            logger.exception("Failed to generate box layout")
+            return JsonResponse({
+                "error": f"An error occurred: {str(e)}"
+            }, status=400)
+
+
+class AsyncBoxLayoutFileView(AsyncAPIView):
+    """
+    Async variant of BoxLayoutFileView.
+    """
+    authentication_required = False
+
+    async def get(self, request, name):
+        try:
+            encoding, content = await load_variant(
+                f"{LAYOUT_STORAGE_DIR}/{name}", request.META.get('HTTP_ACCEPT_ENCODING', '')
+            )
+        except FileNotFoundError:
+            return JsonResponse({"error": "Box layout not found."}, status=404)
+        return svg_response(content, encoding)
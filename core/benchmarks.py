@@ -0,0 +1,182 @@
+"""
+Performance benchmarks for layout generation, list views and report rendering.
+
+Run with ``python manage.py run_benchmarks`` (set TYNOR_DB=sqlite to use a
+throwaway SQLite test database). Each benchmark records throughput, p50/p99
+latency and queries per call; results are compared against a JSON baseline and
+the run fails when a benchmark regresses beyond the configured threshold.
+"""
+import math
+import time
+from collections import namedtuple
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from . import layout_engine
+from .models import User, Design, CDR
+from .seeding import Seeder
+from .views import GenerateBoxLayoutView
+
+Benchmark = namedtuple('Benchmark', ['name', 'setup', 'iterations'])
+
+# Registered benchmarks, in run order
+BENCHMARKS = []
+
+# CDRs attached to the design used by the report benchmark
+REPORT_CDR_COUNT = 20
+
+
+def benchmark(name, iterations):
+    """
+    Register a benchmark. The decorated function receives the seeded context
+    and returns the callable that is timed. ``iterations`` may be a callable
+    taking the row count, so expensive list benchmarks can run fewer times on
+    large tables.
+    """
+    def decorator(setup):
+        BENCHMARKS.append(Benchmark(name, setup, iterations))
+        return setup
+    return decorator
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def measure(func, iterations, warmup=1):
+    """
+    Time ``func`` and count its queries. Returns a dict of throughput (calls per
+    second), p50/p99 latency in milliseconds and queries per call.
+    """
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'throughput': round(iterations / sum(timings), 2),
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+        'queries': len(queries.captured_queries) / iterations,
+    }
+
+
+def seed(rows):
+    """
+    Seed ``rows`` designs, CDRs and box designs (plus one user per 100 rows).
+    """
+    seeder = Seeder(seed=rows, prefix='bench')
+    user_ids = seeder.users(max(1, rows // 100), password='benchmark')
+    design_ids = seeder.designs(rows, user_ids)
+    seeder.cdrs(rows, design_ids, user_ids)
+    seeder.box_designs(rows, user_ids)
+
+    report_design = Design.objects.get(pk=design_ids[0])
+    CDR.objects.bulk_create(
+        CDR(design=report_design, generated_by_id=user_ids[0], specifications=f'Report specification {i}')
+        for i in range(REPORT_CDR_COUNT)
+    )
+
+    client = APIClient()
+    client.force_authenticate(user=User.objects.get(pk=user_ids[0]))
+    return {'rows': rows, 'client': client, 'report_design': report_design}
+
+
+def _list_iterations(rows):
+    return max(3, min(50, 50000 // rows))
+
+
+@benchmark('layout.generate_box_data', iterations=2000)
+def bench_generate_box_data(context):
+    view = GenerateBoxLayoutView()
+    return lambda: view.generate_box_data(30, 20, 15)
+
+
+@benchmark('layout.engine_render_uncached', iterations=500)
+def bench_engine_render_uncached(context):
+    def render():
+        layout_engine.clear_cache()
+        layout_engine.render_variants(30, 20, 15)
+    return render
+
+
+@benchmark('layout.fastapi_create_svg', iterations=200)
+def bench_fastapi_create_svg(context):
+    try:
+        from .main import create_svg
+    except ImportError:  # FastAPI is optional for the Django deployment
+        return None
+    return lambda: create_svg(30, 15, 20)
+
+
+@benchmark('api.design_list', iterations=_list_iterations)
+def bench_design_list(context):
+    return lambda: context['client'].get('/api/designs/')
+
+
+@benchmark('api.cdr_list', iterations=_list_iterations)
+def bench_cdr_list(context):
+    return lambda: context['client'].get('/api/cdrs/')
+
+
+@benchmark('api.box_design_list', iterations=_list_iterations)
+def bench_box_design_list(context):
+    return lambda: context['client'].get('/api/box_designs/')
+
+
+@benchmark('api.cdr_report', iterations=200)
+def bench_cdr_report(context):
+    url = f"/api/cdr_report/{context['report_design'].id}/"
+    return lambda: context['client'].get(url)
+
+
+def run_benchmarks(rows, only=None):
+    """
+    Run all registered benchmarks (or those whose name starts with one of
+    ``only``) against an already seeded database.
+    """
+    context = seed(rows)
+    results = {}
+    for bench in BENCHMARKS:
+        if only and not any(bench.name.startswith(prefix) for prefix in only):
+            continue
+        func = bench.setup(context)
+        if func is None:
+            continue
+        iterations = bench.iterations(rows) if callable(bench.iterations) else bench.iterations
+        results[bench.name] = measure(func, iterations)
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold, p99_threshold=None):
+    """
+    Compare results ({rows: {benchmark: stats}}) with a baseline of the same
+    shape. Returns a list of human-readable regression messages; latency may grow
+    by ``threshold`` (p50) or ``p99_threshold`` (p99) and query counts may not grow.
+    """
+    p99_threshold = threshold * 2 if p99_threshold is None else p99_threshold
+    regressions = []
+    for rows, benchmarks in results.items():
+        for name, stats in benchmarks.items():
+            base = baseline.get(str(rows), {}).get(name)
+            if not base:
+                continue
+            label = f"{name} @ {rows} rows"
+            if stats['p50_ms'] > base['p50_ms'] * (1 + threshold):
+                regressions.append(f"{label}: p50 {stats['p50_ms']}ms vs baseline {base['p50_ms']}ms")
+            if stats['p99_ms'] > base['p99_ms'] * (1 + p99_threshold):
+                regressions.append(f"{label}: p99 {stats['p99_ms']}ms vs baseline {base['p99_ms']}ms")
+            if stats['queries'] > base['queries']:
+                regressions.append(f"{label}: {stats['queries']} queries/call vs baseline {base['queries']}")
+    return regressions
@@ -0,0 +1,166 @@
+"""
+Near-duplicate box design detection for SKU consolidation.
+
+Two box designs are near-duplicates when they share a material and each of
+their dimensions differs by at most the tolerance, whichever way round the
+dimensions were entered (they are compared sorted). Near-duplicates are
+chained into clusters: if A is close to B and B to C, all three are one
+cluster, and the report gives each cluster's spread so that long chains
+stand out.
+
+Boxes are bucketed on a grid with cells one tolerance wide, so a box's
+near-duplicates can only be in its own cell or the 26 around it, and boxes
+sharing a cell are always near-duplicates of each other. Each cell is then
+linked to any of 13 of its neighbours (the other 13 compare with it from
+their side) holding a box close to one of its own, found with numpy
+broadcasting over blocks of at most BLOCK_ROWS boxes per side. Memory stays
+bounded however many near-identical boxes crowd into one cell, which is the
+case this report exists for.
+
+``consolidation_report()`` builds the report from the database; the
+``box_dedupe_report`` management command runs it (e.g. nightly from cron).
+"""
+import itertools
+from collections import defaultdict
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from .models import BoxDesign
+
+DEFAULT_TOLERANCE_CM = 0.5
+
+# Rows per side compared at once between two cells, bounding the comparison
+# to BLOCK_ROWS x BLOCK_ROWS x 3 values however crowded a cell is
+BLOCK_ROWS = 512
+
+# Neighbouring cells compared from each cell: the half of the 26 that sort after (0, 0, 0)
+_FORWARD_OFFSETS = [offset for offset in itertools.product((-1, 0, 1), repeat=3) if offset > (0, 0, 0)]
+
+
+class _DisjointSet:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def _any_close(a, b, tolerance):
+    """
+    Whether some row of ``a`` is within ``tolerance`` of some row of ``b`` in
+    every dimension.
+    """
+    # Bounding boxes too far apart on any axis rule out every pair
+    if (a.min(axis=0) - b.max(axis=0) > tolerance).any() or (b.min(axis=0) - a.max(axis=0) > tolerance).any():
+        return False
+    for start in range(0, len(a), BLOCK_ROWS):
+        left = a[start:start + BLOCK_ROWS, None, :]
+        for other_start in range(0, len(b), BLOCK_ROWS):
+            right = b[None, other_start:other_start + BLOCK_ROWS, :]
+            if (np.abs(left - right) <= tolerance).all(axis=2).any():
+                return True
+    return False
+
+
+def _close_pairs(fitted, tolerance):
+    """
+    (i, j) index arrays of pairs of rows of ``fitted`` within ``tolerance`` of
+    each other in every dimension. Not every close pair is returned, only
+    enough to connect each group of near-duplicates.
+    """
+    cells = np.floor(fitted / tolerance).astype(np.int64)
+    keys, inverse = np.unique(cells, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    order = np.argsort(inverse, kind='stable')
+    members = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(keys)))[:-1])
+    cell_of = {tuple(key): rows for key, rows in zip(keys.tolist(), members)}
+
+    firsts, seconds = [], []
+    for key, rows in cell_of.items():
+        # Rows sharing a cell are less than one tolerance apart in every dimension
+        firsts.append(np.full(len(rows) - 1, rows[0]))
+        seconds.append(rows[1:])
+        block = fitted[rows]
+        for offset in _FORWARD_OFFSETS:
+            other = cell_of.get((key[0] + offset[0], key[1] + offset[1], key[2] + offset[2]))
+            if other is not None and _any_close(block, fitted[other], tolerance):
+                firsts.append(rows[:1])
+                seconds.append(other[:1])
+    if not firsts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(firsts), np.concatenate(seconds)
+
+
+def find_clusters(rows, tolerance):
+    """
+    Clusters of near-duplicates among ``rows`` of (id, width, height, depth,
+    material), as lists of ids. Boxes without a near-duplicate are left out.
+    """
+    if tolerance <= 0:
+        raise ValueError("Tolerance must be positive.")
+    by_material = defaultdict(list)
+    for row in rows:
+        by_material[row[4]].append(row)
+
+    clusters = []
+    for material_rows in by_material.values():
+        ids = [row[0] for row in material_rows]
+        fitted = np.sort(np.array([row[1:4] for row in material_rows], dtype=np.float64), axis=1)
+        # Small allowance so a difference of exactly the tolerance survives float rounding
+        firsts, seconds = _close_pairs(fitted, tolerance * (1 + 1e-9))
+        groups = _DisjointSet(len(ids))
+        for a, b in zip(firsts.tolist(), seconds.tolist()):
+            groups.union(a, b)
+        members = defaultdict(list)
+        for index in range(len(ids)):
+            members[groups.find(index)].append(ids[index])
+        clusters += [sorted(cluster) for cluster in members.values() if len(cluster) > 1]
+    return clusters
+
+
+def consolidation_report(tolerance=None, queryset=None):
+    """
+    Near-duplicate clusters in the box design catalogue, largest first.
+
+    Each cluster lists its members, the envelope (the smallest box holding
+    every member), the spread of each dimension and, when one exists, a
+    member at least as large as the envelope that could replace the rest.
+    """
+    if tolerance is None:
+        tolerance = getattr(settings, 'BOX_DEDUPE_TOLERANCE_CM', DEFAULT_TOLERANCE_CM)
+    queryset = BoxDesign.objects.all() if queryset is None else queryset
+    rows = list(queryset.values_list('id', 'width', 'height', 'depth', 'material').iterator(chunk_size=10000))
+    boxes = {row[0]: row for row in rows}
+
+    clusters = []
+    for ids in find_clusters(rows, tolerance):
+        fitted = np.sort(np.array([boxes[pk][1:4] for pk in ids], dtype=np.float64), axis=1)
+        envelope = fitted.max(axis=0)
+        covering = np.flatnonzero((fitted >= envelope).all(axis=1))
+        clusters.append({
+            'material': boxes[ids[0]][4],
+            'size': len(ids),
+            'ids': ids,
+            'envelope': envelope.tolist(),
+            'spread': (envelope - fitted.min(axis=0)).tolist(),
+            'keep': ids[int(covering[0])] if len(covering) else None,
+        })
+    clusters.sort(key=lambda cluster: (-cluster['size'], cluster['ids'][0]))
+
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'tolerance_cm': tolerance,
+        'boxes': len(rows),
+        'clusters': clusters,
+        'redundant_boxes': sum(cluster['size'] - 1 for cluster in clusters),
+    }
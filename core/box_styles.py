@@ -0,0 +1,272 @@
+"""
+Parametric box-style library.
+
+Every style describes its panels as arithmetic expressions over the box
+dimensions: ``l`` (length), ``b`` (breadth) and ``h`` (height), in the same
+units the caller passes in (cm for BoxDesign). When a style is registered its
+expressions are validated and compiled into a single Python function, so
+evaluating a layout on the request path is one call with no parsing.
+
+This module has no Django dependency so the FastAPI app in core.main can use it.
+"""
+import ast
+from collections import namedtuple
+from xml.sax.saxutils import escape
+
+# Template for one panel: expressions are strings, fill/label are literals
+PanelTemplate = namedtuple('PanelTemplate', ['x', 'y', 'width', 'height', 'fill', 'label'])
+
+# Evaluated panel and full layout geometry, in unscaled units
+Panel = namedtuple('Panel', ['x', 'y', 'width', 'height', 'fill', 'label'])
+BoxGeometry = namedtuple('BoxGeometry', ['style', 'width', 'height', 'panels'])
+
+DEFAULT_STYLE = 'cross'
+
+_ALLOWED_NAMES = {'l', 'b', 'h'}
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.USub, ast.UAdd,
+)
+
+_registry = {}
+
+
+def panel(x, y, width, height, fill=None, label=None):
+    """
+    Shorthand for declaring a PanelTemplate.
+    """
+    return PanelTemplate(str(x), str(y), str(width), str(height), fill, label)
+
+
+def _check_expression(source):
+    """
+    Reject anything but arithmetic over l, b, h and numeric constants.
+    """
+    tree = ast.parse(source, mode='eval')
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax in box-style expression: {source!r}")
+        if isinstance(node, ast.Name) and node.id not in _ALLOWED_NAMES:
+            raise ValueError(f"Unknown variable '{node.id}' in box-style expression: {source!r}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError(f"Only numeric constants are allowed: {source!r}")
+    return f"({source})"
+
+
+class BoxStyle:
+    """
+    A named, parametric box layout compiled into a fast evaluator.
+    """
+    def __init__(self, code, name, panels, canvas=None, description=''):
+        self.code = code
+        self.name = name
+        self.description = description
+        self.panels = tuple(panels)
+        self.canvas = canvas
+        self._evaluate = self._compile()
+
+    def _compile(self):
+        rects = []
+        for template in self.panels:
+            parts = [_check_expression(expr) for expr in (template.x, template.y, template.width, template.height)]
+            rects.append(f"({', '.join(parts)})")
+
+        canvas = 'None'
+        if self.canvas:
+            canvas = f"({', '.join(_check_expression(expr) for expr in self.canvas)})"
+
+        source = f"lambda l, b, h: ({canvas}, ({', '.join(rects)},))"
+        code = compile(source, f"<box-style {self.code}>", 'eval')
+        return eval(code, {'__builtins__': {}})
+
+    def evaluate(self, length, breadth, height):
+        """
+        Compute the panel geometry for the given dimensions.
+        """
+        canvas, rects = self._evaluate(length, breadth, height)
+        if canvas is None:
+            # Default canvas is the bounding box of all panels
+            canvas = (max(x + w for x, _, w, _ in rects), max(y + h for _, y, _, h in rects))
+        panels = [
+            Panel(x, y, w, h, template.fill, template.label)
+            for (x, y, w, h), template in zip(rects, self.panels)
+        ]
+        return BoxGeometry(self.code, canvas[0], canvas[1], panels)
+
+    def as_dict(self):
+        return {
+            'code': self.code,
+            'name': self.name,
+            'description': self.description,
+            'panel_count': len(self.panels),
+        }
+
+
+def register_style(style):
+    """
+    Add a compiled style to the registry, replacing any style with the same code.
+    """
+    _registry[style.code] = style
+    return style
+
+
+def get_style(code):
+    """
+    Look up a registered style by code.
+    """
+    try:
+        return _registry[code]
+    except KeyError:
+        raise ValueError(f"Unknown box style '{code}'. Available styles: {', '.join(sorted(_registry))}")
+
+
+def available_styles():
+    """
+    All registered styles, ordered by code.
+    """
+    return [_registry[code] for code in sorted(_registry)]
+
+
+def _num(value):
+    """
+    Format a coordinate without a trailing '.0' for whole numbers.
+    """
+    if value == int(value):
+        return str(int(value))
+    return repr(round(value, 4))
+
+
+def render_svg(geometry, scale=1, offset=(0, 0), font_size=12):
+    """
+    Render evaluated geometry as an SVG document string.
+    """
+    dx, dy = offset
+    parts = [
+        '<?xml version="1.0" encoding="utf-8" ?>',
+        f'<svg width="{_num(geometry.width * scale + dx)}" height="{_num(geometry.height * scale + dy)}" '
+        f'xmlns="http://www.w3.org/2000/svg">'
+    ]
+    for p in geometry.panels:
+        parts.append(
+            f'<rect x="{_num(p.x * scale + dx)}" y="{_num(p.y * scale + dy)}" '
+            f'width="{_num(p.width * scale)}" height="{_num(p.height * scale)}" '
+            f'fill="{p.fill or "none"}" stroke="black" />'
+        )
+    for p in geometry.panels:
+        if p.label:
+            parts.append(
+                f'<text x="{_num((p.x + p.width / 2) * scale + dx)}" y="{_num((p.y + p.height / 2) * scale + dy)}" '
+                f'text-anchor="middle" font-size="{font_size}" fill="black">{escape(p.label)}</text>'
+            )
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+
+def _compact(value):
+    """
+    Round a coordinate for JSON, without a trailing '.0' for whole numbers.
+    """
+    value = round(value, 4)
+    return int(value) if value == int(value) else value
+
+
+def compact_geometry(geometry):
+    """
+    Evaluated geometry as plain lists for JSON clients that draw it
+    themselves: ``rects`` is flat (x, y, width, height per panel) and
+    ``fills``/``labels`` run parallel to it.
+    """
+    rects = []
+    for p in geometry.panels:
+        rects += (_compact(p.x), _compact(p.y), _compact(p.width), _compact(p.height))
+    return {
+        'style': geometry.style,
+        'size': [_compact(geometry.width), _compact(geometry.height)],
+        'rects': rects,
+        'fills': [p.fill for p in geometry.panels],
+        'labels': [p.label for p in geometry.panels],
+    }
+
+
+# Built-in styles
+
+# Six-panel cross used by GenerateBoxLayoutView
+register_style(BoxStyle(
+    'cross', 'Six-panel cross',
+    [
+        panel('b', 0, 'l', 'b', 'lightblue', 'Front Panel'),
+        panel('b', 'b + h', 'l', 'b', 'lightgreen', 'Back Panel'),
+        panel('b', 'b', 'l', 'h', 'lightyellow'),
+        panel('b', 'b + h + b', 'l', 'h', 'orange'),
+        panel(0, 'b', 'b', 'h', 'pink'),
+        panel('l + b', 'b', 'b', 'h', 'lightgray'),
+    ],
+    canvas=('l * 2 + b * 2 + 20', 'b + h * 2 + 20'),
+    description='Front/back/top/bottom/side panels laid out as a cross.',
+))
+
+# Twelve-panel layout used by the FastAPI generator in core.main
+register_style(BoxStyle(
+    'tynor-rsc', 'Tynor twelve-panel RSC',
+    [
+        panel('b', 0, 'l', 'b / 2', label='1'),
+        panel('b', 'b / 2', 'l', 'b / 2', label='2'),
+        panel('b', 'b', 'l', 'h', label='3'),
+        panel('b + l', 0, 'b / 2', 'b / 2', label='4'),
+        panel('b + l', 'b', 'b / 2', 'h', label='5'),
+        panel('b + l', 'b + h', 'b / 2', 'b / 2', label='6'),
+        panel('b + l + b / 2', 0, 'l', 'b / 2', label='7'),
+        panel('b + l + b / 2', 'b', 'l', 'h', label='8'),
+        panel('b + l + b / 2', 'b + h', 'l', 'b / 2', label='9'),
+        panel('b + l + l', 0, 'b / 2', 'b / 2', label='10'),
+        panel('b + l + l + b / 2', 'b / 2', 'b / 2', 'h', label='11'),
+        panel('b + l + l + b / 2', 'b / 2 + h', 'b / 2', 'b / 2', label='12'),
+    ],
+    description='Legacy twelve-panel regular slotted container layout.',
+))
+
+# Glue flap width for the FEFCO styles, in cm
+GLUE_FLAP = 3.5
+
+
+def _slotted_container(flap_top, flap_bottom):
+    """
+    Panels for a FEFCO 02xx slotted container: glue flap plus L/B/L/B body
+    panels, with top and bottom flaps of the given heights (None for no flap).
+    """
+    g = GLUE_FLAP
+    body_y = flap_top or 0
+    columns = [
+        (f'{g}', 'l', 'Length'),
+        (f'{g} + l', 'b', 'Breadth'),
+        (f'{g} + l + b', 'l', 'Length'),
+        (f'{g} + l + b + l', 'b', 'Breadth'),
+    ]
+    panels = [panel(0, body_y, g, 'h', label='Glue')]
+    for x, width, label in columns:
+        panels.append(panel(x, body_y, width, 'h', label=label))
+        if flap_top:
+            panels.append(panel(x, 0, width, flap_top))
+        if flap_bottom:
+            panels.append(panel(x, f'{body_y} + h', width, flap_bottom))
+    return panels
+
+
+register_style(BoxStyle(
+    'fefco-0200', 'FEFCO 0200 half slotted container',
+    _slotted_container(None, 'b / 2'),
+    description='Slotted container with bottom flaps only.',
+))
+
+register_style(BoxStyle(
+    'fefco-0201', 'FEFCO 0201 regular slotted container',
+    _slotted_container('b / 2', 'b / 2'),
+    description='Top and bottom flaps of half the breadth, meeting in the middle.',
+))
+
+register_style(BoxStyle(
+    'fefco-0203', 'FEFCO 0203 full overlap slotted container',
+    _slotted_container('b', 'b'),
+    description='Top and bottom flaps of the full breadth, fully overlapping.',
+))
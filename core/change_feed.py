@@ -0,0 +1,206 @@
+"""
+Change feed for incremental sync of designs, CDRs and box designs.
+
+Every save and delete appends a ChangeLogEntry (signals connected by
+CoreConfig.ready; the seeder records its bulk inserts itself). Consumers keep
+the cursor of the last entry they processed and ask for everything after it:
+
+    GET /api/changes/?since=<cursor>&resource=design,cdr&limit=500
+
+The cursor is the entry's ``position``, not its id. Ids are allocated when a
+transaction writes, not when it commits, so a long transaction can commit an
+id below one a consumer has already passed. Entries are therefore written
+without a position, and ``sequence()`` numbers the committed ones, in one
+statement serialised by a lock, before each feed read. An entry that commits
+late is numbered after everything already read, so no consumer misses it.
+
+A feed read is a range scan on the position (or on (resource, position) when
+filtered) and a sync with nothing new is a pair of index probes. Within a page
+only the latest change of each object is returned, with the object's current
+data; deletes are returned as tombstones without data.
+
+``prune()`` deletes old entries, tombstones included, and records how far it
+went. A cursor from before that point would silently miss deletes, so reading
+from it raises CursorExpired (410 Gone from the API) carrying the current head
+cursor: the consumer downloads everything again and continues from there.
+"""
+from django.db import connections, router, transaction
+from django.db.models import Max
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from . import fast_serializers
+from .models import BoxDesign, CDR, ChangeFeedPrune, ChangeLogEntry, Design
+from .serializers import BoxDesignSerializer, CDRSerializer, DesignSerializer
+
+# Resource name -> (model, serializer for the change data)
+FEED_RESOURCES = {
+    'design': (Design, DesignSerializer),
+    'cdr': (CDR, CDRSerializer),
+    'box_design': (BoxDesign, BoxDesignSerializer),
+}
+
+DEFAULT_FEED_LIMIT = 500
+MAX_FEED_LIMIT = 5000
+
+# pg_advisory_xact_lock key serialising sequence() on PostgreSQL
+SEQUENCE_LOCK_KEY = 0x7479_6e6f_7266
+
+
+class CursorExpired(Exception):
+    """
+    The cursor predates a prune; ``head`` is the cursor to continue from after
+    a full download.
+    """
+    def __init__(self, since, pruned_to, head):
+        super().__init__(f"Cursor {since} is older than the retained change feed (pruned up to {pruned_to}); "
+                         f"download everything again and continue from cursor {head}.")
+        self.head = head
+
+
+def resource_name(model):
+    for name, (resource_model, _) in FEED_RESOURCES.items():
+        if model._meta.concrete_model is resource_model:
+            return name
+    return None
+
+
+def record_changes(model, object_ids, action='upsert'):
+    """
+    Append feed entries for objects changed without signals (bulk_create,
+    update()).
+    """
+    resource = resource_name(model)
+    ChangeLogEntry.objects.bulk_create(
+        [ChangeLogEntry(resource=resource, object_id=object_id, action=action) for object_id in object_ids],
+        batch_size=1000,
+    )
+
+
+def _saved(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    ChangeLogEntry.objects.create(resource=resource_name(sender), object_id=instance.pk, action='upsert')
+
+
+def _deleted(sender, instance, **kwargs):
+    ChangeLogEntry.objects.create(resource=resource_name(sender), object_id=instance.pk, action='delete')
+
+
+def connect_signals():
+    for model, _ in FEED_RESOURCES.values():
+        post_save.connect(_saved, sender=model, dispatch_uid=f'core.change_feed.saved.{model._meta.label}')
+        post_delete.connect(_deleted, sender=model, dispatch_uid=f'core.change_feed.deleted.{model._meta.label}')
+
+
+def sequence():
+    """
+    Give the committed entries without a position the next positions, in id
+    order. Returns the number of entries sequenced.
+    """
+    alias = router.db_for_write(ChangeLogEntry)
+    if not ChangeLogEntry.objects.using(alias).filter(position__isnull=True).exists():
+        return 0
+    connection = connections[alias]
+    table = connection.ops.quote_name(ChangeLogEntry._meta.db_table)
+    # One statement: it only sees committed entries (and this transaction's own),
+    # and the lock (SQLite's write lock, a PostgreSQL advisory lock) keeps
+    # concurrent readers from handing out the same positions
+    with transaction.atomic(using=alias), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [SEQUENCE_LOCK_KEY])
+        cursor.execute(
+            f'UPDATE {table} SET position = sequenced.position '
+            f'FROM (SELECT id, (SELECT COALESCE(MAX(position), 0) FROM {table}) '
+            f'+ ROW_NUMBER() OVER (ORDER BY id) AS position FROM {table} WHERE position IS NULL) AS sequenced '
+            f'WHERE {table}.id = sequenced.id'
+        )
+        return cursor.rowcount
+
+
+def pruned_to():
+    """
+    Position up to which entries may have been pruned (0 if never pruned).
+    """
+    return ChangeFeedPrune.objects.aggregate(position=Max('position'))['position'] or 0
+
+
+def head_cursor():
+    """
+    Cursor of the newest sequenced change, to continue from after a full download.
+    """
+    head = ChangeLogEntry.objects.aggregate(position=Max('position'))['position'] or 0
+    return max(head, pruned_to())
+
+
+def read_changes(since=0, resources=None, limit=DEFAULT_FEED_LIMIT):
+    """
+    Changes after cursor ``since``. Returns {'changes', 'next_cursor', 'has_more'};
+    pass ``next_cursor`` back as ``since`` to continue. Raises ValueError for an
+    unknown resource and CursorExpired if entries after ``since`` were pruned.
+    """
+    resources = list(resources or FEED_RESOURCES)
+    unknown = [name for name in resources if name not in FEED_RESOURCES]
+    if unknown:
+        raise ValueError(f"Unknown resource(s): {', '.join(unknown)}. "
+                         f"Available resources: {', '.join(FEED_RESOURCES)}")
+    limit = max(1, min(limit, MAX_FEED_LIMIT))
+
+    sequence()
+    pruned = pruned_to()
+    if since < pruned:
+        raise CursorExpired(since, pruned, head_cursor())
+    entries = ChangeLogEntry.objects.filter(position__gt=since)
+    if len(resources) < len(FEED_RESOURCES):
+        entries = entries.filter(resource__in=resources)
+    page = list(entries.order_by('position').values_list('position', 'resource', 'object_id', 'action')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    # Latest change per object; its position in the page is that of the latest entry
+    latest = {}
+    for cursor, resource, object_id, action in page:
+        latest.pop((resource, object_id), None)
+        latest[(resource, object_id)] = (cursor, action)
+
+    current = {}
+    for name in resources:
+        ids = [object_id for (resource, object_id), (_, action) in latest.items()
+               if resource == name and action == 'upsert']
+        if ids:
+            model, serializer_class = FEED_RESOURCES[name]
+            current[name] = fast_serializers.serialize_by_pk(serializer_class, model.objects.filter(pk__in=ids))
+
+    changes = []
+    for (resource, object_id), (cursor, action) in latest.items():
+        if action == 'upsert':
+            data = current.get(resource, {}).get(object_id)
+            if data is None:
+                # Deleted since; its tombstone is further along the feed
+                continue
+        else:
+            data = None
+        changes.append({'cursor': cursor, 'resource': resource, 'id': object_id, 'action': action, 'data': data})
+
+    return {
+        'changes': changes,
+        'next_cursor': page[-1][0] if page else since,
+        'has_more': has_more,
+    }
+
+
+def prune(older_than):
+    """
+    Delete entries older than the ``older_than`` timedelta and record the
+    highest position deleted; consumers behind it get CursorExpired.
+    Returns the number of entries deleted.
+    """
+    sequence()
+    # Entries still without a position belong to transactions nobody has read yet
+    old = ChangeLogEntry.objects.filter(changed_at__lt=timezone.now() - older_than, position__isnull=False)
+    with transaction.atomic():
+        position = old.aggregate(position=Max('position'))['position']
+        if position is None:
+            return 0
+        deleted, _ = old.filter(position__lte=position).delete()
+        ChangeFeedPrune.objects.create(position=position, deleted=deleted)
+    return deleted
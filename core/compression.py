@@ -0,0 +1,83 @@
+"""
+Pre-compressed response variants for SVG layouts.
+
+Layouts are compressed once when they are rendered or cached, and each request
+only picks the stored variant that matches its Accept-Encoding header. Nothing
+here depends on Django so the FastAPI app in core.main can share it.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip variants are always produced
+    brotli = None
+
+# Encodings in server preference order, with the file suffix used in storage
+ENCODING_SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz',
+    'identity': '',
+}
+PREFERRED_ENCODINGS = ('br', 'gzip')
+
+# Encodings compress_variants() produces in this process
+AVAILABLE_ENCODINGS = tuple(
+    encoding for encoding in ENCODING_SUFFIXES if encoding != 'br' or brotli is not None
+)
+
+
+def compress_variants(data):
+    """
+    Return a dict of encoding -> bytes for the given payload.
+    """
+    variants = {
+        'identity': data,
+        # mtime=0 keeps the gzip output deterministic for identical input
+        'gzip': gzip.compress(data, compresslevel=9, mtime=0),
+    }
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+    return variants
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header into a dict of coding -> q-value.
+    """
+    accepted = {}
+    for item in (header or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding, available):
+    """
+    Pick the best available encoding the client accepts, falling back to identity.
+    """
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get('*', 0.0)
+    for encoding in PREFERRED_ENCODINGS:
+        if encoding in available and accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return 'identity'
+
+
+def variant_headers(encoding):
+    """
+    Response headers for serving the given variant.
+    """
+    headers = {'Vary': 'Accept-Encoding'}
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return headers
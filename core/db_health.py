@@ -0,0 +1,110 @@
+"""
+Database connection health and pool saturation.
+
+``check_databases()`` backs the /api/health/db/ endpoint; ``prometheus_lines()``
+is registered with the metrics registry so pool gauges appear on /api/metrics/.
+Driver errors are logged, never returned: they name the database host and user.
+Pool statistics come from psycopg_pool (Django's native PostgreSQL pool); other
+connection modes report only their configuration.
+"""
+import logging
+import time
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# psycopg_pool.get_stats() keys exported as gauges / counters
+POOL_GAUGES = {
+    'pool_max': 'tynor_db_pool_max_connections',
+    'pool_size': 'tynor_db_pool_connections',
+    'pool_available': 'tynor_db_pool_idle_connections',
+    'requests_waiting': 'tynor_db_pool_waiting_requests',
+}
+POOL_COUNTERS = {
+    'requests_num': 'tynor_db_pool_requests_total',
+    'requests_queued': 'tynor_db_pool_queued_requests_total',
+    'requests_wait_ms': 'tynor_db_pool_wait_milliseconds_total',
+    'requests_errors': 'tynor_db_pool_request_errors_total',
+    'connections_errors': 'tynor_db_pool_connection_errors_total',
+}
+
+
+def connection_mode(alias):
+    """
+    How connections to ``alias`` are reused: 'pool', 'persistent' or 'per-request'.
+    """
+    settings_dict = connections[alias].settings_dict
+    if settings_dict.get('OPTIONS', {}).get('pool'):
+        return 'pool'
+    if settings_dict.get('CONN_MAX_AGE') != 0:
+        return 'persistent'
+    return 'per-request'
+
+
+def pool_stats(alias):
+    """
+    Current psycopg_pool statistics for ``alias``, or None if it isn't pooled.
+    """
+    if connection_mode(alias) != 'pool':
+        return None
+    pool = getattr(connections[alias], 'pool', None)
+    return pool.get_stats() if pool is not None else None
+
+
+def check_database(alias):
+    """
+    Run a trivial query on ``alias`` and report latency, mode and pool usage.
+    """
+    connection = connections[alias]
+    result = {'alias': alias, 'vendor': connection.vendor, 'mode': connection_mode(alias)}
+    start = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except Exception:
+        logger.exception("Health check failed for database '%s'", alias)
+        result.update(ok=False, error="Database check failed; see the server log.")
+    else:
+        result['ok'] = True
+    result['latency_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    stats = pool_stats(alias)
+    if stats is not None:
+        in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+        result['pool'] = {
+            'max': stats.get('pool_max'),
+            'size': stats.get('pool_size'),
+            'in_use': in_use,
+            'waiting': stats.get('requests_waiting', 0),
+            'saturation': round(in_use / stats['pool_max'], 3) if stats.get('pool_max') else None,
+        }
+    return result
+
+
+def check_databases():
+    return [check_database(alias) for alias in connections]
+
+
+def summary(result):
+    """
+    The part of a check_database() result shown to anonymous callers.
+    """
+    return {'alias': result['alias'], 'ok': result['ok']}
+
+
+def prometheus_lines():
+    """
+    Pool gauges and counters for every pooled database alias.
+    """
+    pooled = [(alias, stats) for alias in connections if (stats := pool_stats(alias)) is not None]
+    if not pooled:
+        return []
+    lines = []
+    for key, name in POOL_GAUGES.items():
+        lines += [f'# HELP {name} psycopg_pool {key}.', f'# TYPE {name} gauge']
+        lines += [f'{name}{{database="{alias}"}} {stats.get(key, 0)}' for alias, stats in pooled]
+    for key, name in POOL_COUNTERS.items():
+        lines += [f'# HELP {name} psycopg_pool {key}.', f'# TYPE {name} counter']
+        lines += [f'{name}{{database="{alias}"}} {stats.get(key, 0)}' for alias, stats in pooled]
+    return lines
@@ -0,0 +1,90 @@
+"""
+Read-replica routing.
+
+ReplicaRoutingMiddleware (core.middleware) marks safe requests to views with
+``use_replica = True`` and ReplicaRouter sends their reads to the alias named
+by settings.REPLICA_DATABASE_ALIAS. Everything else, including every write,
+uses the primary. Code outside a request (reports, management commands) can
+opt in with ``read_from_replica()``.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Cookie holding the time until which a client that just wrote reads from the primary
+STICKY_COOKIE = 'tynor_primary_until'
+
+# Apps whose rows authenticate the request (sessions, users, permissions);
+# they are always read from the primary so fresh logins are visible
+PRIMARY_ONLY_APPS = {'admin', 'auth', 'contenttypes', 'sessions'}
+
+_routing = ContextVar('tynor_db_routing', default=None)
+
+
+class RoutingState:
+    """
+    Per-request routing decision; mutable so the middleware can set it once the
+    view is known, after the context has been entered.
+    """
+    def __init__(self, use_replica=False):
+        self.use_replica = use_replica
+
+
+def current_routing():
+    return _routing.get()
+
+
+@contextmanager
+def routing(state):
+    """
+    Make ``state`` the routing decision for the enclosed code.
+    """
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def read_from_replica():
+    """
+    Route reads in the enclosed block to the replica.
+    """
+    return routing(RoutingState(use_replica=True))
+
+
+def replica_alias():
+    """
+    The configured replica alias, or None when there is none or it points at the
+    primary database (e.g. a TEST MIRROR), where it would only add a connection.
+    """
+    alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', None)
+    if not alias or alias == DEFAULT_DB_ALIAS or alias not in connections:
+        return None
+    primary = connections[DEFAULT_DB_ALIAS].settings_dict
+    replica = connections[alias].settings_dict
+    if all(primary.get(key) == replica.get(key) for key in ('ENGINE', 'NAME', 'HOST', 'PORT')):
+        return None
+    return alias
+
+
+class ReplicaRouter:
+    """
+    Database router: reads go to the replica while a replica routing decision
+    is active, except for authentication data; writes always go to the primary.
+    """
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or not state.use_replica:
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS or model._meta.label == settings.AUTH_USER_MODEL:
+            return DEFAULT_DB_ALIAS
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
@@ -0,0 +1,50 @@
+import hashlib
+from django.db.models import Count, Max
+from .box_styles import DEFAULT_STYLE, get_style
+from .models import CDR
+
+# Bump these whenever the PDF or SVG output changes so clients drop stale copies
+CDR_REPORT_VERSION = 1
+BOX_LAYOUT_VERSION = 2
+
+
+def make_etag(*parts):
+    """
+    Build a deterministic ETag value from the given parts.
+    """
+    key = ":".join(str(part) for part in parts)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def cdr_report_etag(request, design_id):
+    """
+    ETag for the CDR report of a design.
+
+    Derived from the number of CDRs and the newest updated_at timestamp (set on
+    every save, so edits count as well as new CDRs), so a single aggregate
+    query decides whether the PDF needs to be rendered at all.
+    """
+    stats = CDR.objects.filter(design_id=design_id).aggregate(
+        count=Count('id'),
+        last_updated=Max('updated_at'),
+    )
+    last_updated = stats['last_updated'].isoformat() if stats['last_updated'] else ''
+    return make_etag('cdr-report', CDR_REPORT_VERSION, design_id, stats['count'], last_updated)
+
+
+def box_layout_etag(request, *args, **kwargs):
+    """
+    ETag for a box layout, derived from the requested style and dimensions.
+
+    Returns None for missing or invalid parameters so the view can report the error.
+    """
+    try:
+        length = int(request.GET.get('L', 0))
+        breadth = int(request.GET.get('B', 0))
+        height = int(request.GET.get('H', 0))
+        style = get_style(request.GET.get('style', DEFAULT_STYLE)).code
+    except (TypeError, ValueError):
+        return None
+    if length <= 0 or breadth <= 0 or height <= 0:
+        return None
+    return make_etag('box-layout', BOX_LAYOUT_VERSION, style, length, breadth, height)
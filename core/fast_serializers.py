@@ -0,0 +1,159 @@
+"""
+Fast read path for list endpoints.
+
+ModelSerializer(many=True) resolves every field of every row through DRF's
+attribute lookup and field machinery. For serializers made only of plain
+model columns, ``read_plan()`` compiles the serializer once into a list of
+(output name, column, converter) entries; rows are then fetched with
+``values_list()`` and turned into dicts directly. The converters reproduce
+each DRF field's ``to_representation()``, so the data is identical to
+``serializer_class(queryset, many=True).data``.
+
+Serializers with anything else (method fields, nested sources, custom
+``to_representation``) have no plan and go through DRF as before.
+"""
+from functools import lru_cache
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, fields as drf_fields, relations, serializers
+from rest_framework.settings import api_settings
+
+
+def _identity(value):
+    return value
+
+
+def _file_url(storage):
+    # FileField.to_representation without a request in the context: the storage URL
+    def convert(name):
+        return storage.url(name) if name else None
+    return convert
+
+
+class DateTimeConverter:
+    """
+    DateTimeField.to_representation with the time zone looked up once per
+    render rather than once per value; it depends on the active time zone.
+    """
+    def __init__(self, field):
+        self.field = field
+
+    def bind(self):
+        output_format = getattr(self.field, 'format', api_settings.DATETIME_FORMAT)
+        if (not settings.USE_TZ or hasattr(self.field, 'timezone')
+                or output_format is None or output_format.lower() != ISO_8601):
+            return self.field.to_representation
+        current = timezone.get_current_timezone()
+        to_representation = self.field.to_representation
+
+        def convert(value):
+            if value.utcoffset() is None:
+                return to_representation(value)
+            text = value.astimezone(current).isoformat()
+            return text[:-6] + 'Z' if text.endswith('+00:00') else text
+        return convert
+
+
+def _converter(field, model):
+    """
+    Converter reproducing ``field.to_representation()`` for a value read with
+    values_list(), or None if the field can't be read that way.
+    """
+    field_type = type(field)
+    if field_type is relations.PrimaryKeyRelatedField and field.pk_field is None:
+        return _identity
+    if field_type in (drf_fields.IntegerField, drf_fields.BooleanField):
+        return _identity
+    if field_type is drf_fields.FloatField:
+        return float
+    if field_type in (drf_fields.CharField, drf_fields.EmailField):
+        return str
+    if field_type is drf_fields.JSONField and not field.binary:
+        return _identity
+    if field_type is drf_fields.DateTimeField:
+        return DateTimeConverter(field)
+    if field_type in (drf_fields.DateField, drf_fields.ChoiceField):
+        # Depend on settings (formats, choices); bound once here
+        return field.to_representation
+    if field_type in (drf_fields.FileField, drf_fields.ImageField):
+        if not getattr(field, 'use_url', True):
+            return _identity
+        return _file_url(model._meta.get_field(field.source).storage)
+    return None
+
+
+class ReadPlan:
+    """
+    Compiled serializer: ``values(queryset)`` selects the columns, ``render(rows)``
+    turns the resulting tuples into serializer-shaped dicts.
+    """
+    def __init__(self, entries):
+        self.names = [name for name, _, _ in entries]
+        self.columns = [column for _, column, _ in entries]
+        self.converters = [converter for _, _, converter in entries]
+
+    def only(self, fields):
+        if fields is None:
+            return self
+        wanted = set(fields)
+        return ReadPlan([entry for entry in zip(self.names, self.columns, self.converters) if entry[0] in wanted])
+
+    def values(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def render(self, rows):
+        converters = [converter.bind() if hasattr(converter, 'bind') else converter for converter in self.converters]
+        entries = list(zip(self.names, converters))
+        return [
+            {name: value if value is None else convert(value) for (name, convert), value in zip(entries, row)}
+            for row in rows
+        ]
+
+
+@lru_cache(maxsize=None)
+def _compile(serializer_class):
+    serializer = serializer_class()
+    if (type(serializer).to_representation is not serializers.Serializer.to_representation
+            or not isinstance(serializer, serializers.ModelSerializer)):
+        return None
+    model = serializer.Meta.model
+    concrete = {field.name for field in model._meta.concrete_fields}
+    entries = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        converter = _converter(field, model)
+        if converter is None or field.source not in concrete:
+            return None
+        entries.append((name, field.source, converter))
+    return ReadPlan(entries)
+
+
+def read_plan(serializer_class, fields=None):
+    """
+    The compiled plan for ``serializer_class`` restricted to ``fields``, or None
+    if the serializer needs DRF's full machinery.
+    """
+    plan = _compile(serializer_class)
+    return plan.only(fields) if plan is not None else None
+
+
+def serialize(serializer_class, queryset, fields=None):
+    """
+    List data for ``queryset``, through the compiled plan when there is one.
+    """
+    plan = read_plan(serializer_class, fields)
+    if plan is None:
+        return serializer_class(serializer_class.project(queryset, fields), many=True, fields=fields).data
+    return plan.render(plan.values(queryset))
+
+
+def serialize_by_pk(serializer_class, queryset):
+    """
+    Serialized data of each object in ``queryset``, keyed by primary key.
+    """
+    plan = read_plan(serializer_class)
+    if plan is None:
+        return {obj.pk: serializer_class(obj).data for obj in queryset}
+    rows = list(queryset.values_list('pk', *plan.columns))
+    return {row[0]: data for row, data in zip(rows, plan.render(row[1:] for row in rows))}
@@ -0,0 +1,213 @@
+"""
+Best-fit search over BoxDesign dimensions.
+
+``find_fits(width, height, depth)`` returns the smallest box designs (by inner
+volume) that hold an item of that size, optionally per material. With
+rotation allowed an item fits iff its sorted dimensions are each no larger
+than the box's sorted dimensions, so every box is stored with its dimensions
+sorted as well as as entered.
+
+The index is a set of numpy arrays held in memory per process, ordered by
+volume. A query starts at the first box at least as large as the item
+(binary search) and scans forward in chunks of SCAN_CHUNK rows until it has
+k fits. That is usually the first chunk or two, but there is no bound: when
+few boxes are of the requested material, or many large enough boxes are too
+narrow in some dimension, the scan runs on to the end of the arrays, a
+vectorised linear scan.
+
+Changes reach the index through the change feed (core.change_feed): before
+each query the index reads the box_design entries after its cursor - one
+index probe when nothing changed, in this process or any other - and applies
+them. Changed boxes go to a small unsorted delta that queries scan in full;
+once it grows past DELTA_LIMIT it is merged into the sorted arrays without
+touching the database.
+"""
+import threading
+import time
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from . import change_feed
+from .models import BoxDesign, ChangeLogEntry
+
+MATERIALS = [value for value, _ in BoxDesign._meta.get_field('material').choices]
+
+# Changed boxes kept outside the sorted arrays before they are merged in
+DELTA_LIMIT = 1024
+
+# Rows tested per step of a scan
+SCAN_CHUNK = 4096
+
+
+def _material_code(material):
+    try:
+        return MATERIALS.index(material)
+    except ValueError:
+        return -1
+
+
+class FitIndex:
+    """
+    In-memory index of box design dimensions (see module docstring).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held for a whole sync, so concurrent queries don't apply the same
+        # entries or reload twice; _lock only guards the arrays
+        self._sync_lock = threading.Lock()
+        self._loaded = False
+        self.cursor = 0
+        self.synced_at = 0.0
+
+    # Building
+
+    def _set_rows(self, rows):
+        """
+        Replace the sorted arrays with ``rows`` of (id, width, height, depth, material code).
+        """
+        table = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        dims = table[:, 1:4]
+        fitted = np.sort(dims, axis=1)
+        volume = fitted.prod(axis=1)
+        order = np.lexsort((table[:, 0], volume))
+        self.ids = table[order, 0].astype(np.int64)
+        self.dims = dims[order]
+        self.fitted = fitted[order]
+        self.volume = volume[order]
+        self.material = table[order, 4].astype(np.int8)
+        self.alive = np.ones(len(order), dtype=bool)
+        self.position = {int(pk): row for row, pk in enumerate(self.ids)}
+        self.delta = {}
+
+    def load(self):
+        """
+        Build the index from the database.
+        """
+        # Take the cursor first: changes made while loading are replayed, and
+        # replaying a change is harmless
+        change_feed.sequence()
+        cursor = ChangeLogEntry.objects.filter(position__isnull=False).order_by('-position').values_list(
+            'position', flat=True).first() or 0
+        rows = [
+            (pk, width, height, depth, _material_code(material))
+            for pk, width, height, depth, material in
+            BoxDesign.objects.values_list('id', 'width', 'height', 'depth', 'material').iterator(chunk_size=10000)
+        ]
+        with self._lock:
+            self._set_rows(rows)
+            self.cursor = cursor
+            self.synced_at = time.monotonic()
+            self._loaded = True
+
+    def _compact(self):
+        live = np.flatnonzero(self.alive)
+        rows = np.column_stack([self.ids[live], self.dims[live], self.material[live]]).tolist()
+        rows += [(pk, *dims, code) for pk, (dims, code) in self.delta.items()]
+        self._set_rows(rows)
+
+    # Incremental updates
+
+    def upsert(self, pk, width, height, depth, material):
+        with self._lock:
+            self._discard(pk)
+            self.delta[pk] = ((width, height, depth), _material_code(material))
+            if len(self.delta) > DELTA_LIMIT:
+                self._compact()
+
+    def remove(self, pk):
+        with self._lock:
+            self._discard(pk)
+
+    def _discard(self, pk):
+        row = self.position.pop(pk, None)
+        if row is not None:
+            self.alive[row] = False
+        self.delta.pop(pk, None)
+
+    def sync(self):
+        """
+        Apply box design changes recorded since the last sync.
+        """
+        with self._sync_lock:
+            self._sync()
+
+    def _sync(self):
+        retention = timedelta(days=getattr(settings, 'CHANGE_FEED_RETENTION_DAYS', 30))
+        if not self._loaded or time.monotonic() - self.synced_at > retention.total_seconds():
+            # Entries this index hasn't seen may have been pruned
+            self.load()
+            return
+        change_feed.sequence()
+        entries = list(ChangeLogEntry.objects.filter(resource='box_design', position__gt=self.cursor)
+                       .order_by('position').values_list('position', 'object_id'))
+        self.synced_at = time.monotonic()
+        if not entries:
+            return
+
+        changed = {object_id for _, object_id in entries}
+        current = {row[0]: row for row in BoxDesign.objects.filter(pk__in=changed)
+                   .values_list('id', 'width', 'height', 'depth', 'material')}
+        for pk in changed:
+            if pk in current:
+                self.upsert(*current[pk])
+            else:
+                self.remove(pk)
+        self.cursor = entries[-1][0]
+
+    # Queries
+
+    def query(self, width, height, depth, material=None, k=5, rotate=True):
+        """
+        Up to ``k`` (id, volume) pairs of the smallest boxes an item of this
+        size fits in, smallest first.
+        """
+        item = np.array([width, height, depth], dtype=np.float64)
+        if rotate:
+            item = np.sort(item)
+        code = None if material is None else _material_code(material)
+        item_volume = float(item.prod())
+
+        with self._lock:
+            hits = []  # (volume, id)
+            dims = self.fitted if rotate else self.dims
+            start = int(np.searchsorted(self.volume, item_volume, side='left'))
+            while start < len(self.ids) and len(hits) < k:
+                stop = start + SCAN_CHUNK
+                mask = self.alive[start:stop] & (dims[start:stop] >= item).all(axis=1)
+                if code is not None:
+                    mask &= self.material[start:stop] == code
+                rows = start + np.flatnonzero(mask)[:k - len(hits)]
+                hits += zip(self.volume[rows].tolist(), self.ids[rows].tolist())
+                start = stop
+
+            for pk, (box, box_code) in self.delta.items():
+                box_dims = sorted(box) if rotate else box
+                if (code is None or box_code == code) and all(b >= i for b, i in zip(box_dims, item)):
+                    hits.append((box[0] * box[1] * box[2], pk))
+
+        return [(pk, volume) for volume, pk in sorted(hits)[:k]]
+
+
+_index = FitIndex()
+
+
+def find_fits(width, height, depth, material=None, k=5, rotate=True):
+    """
+    The ``k`` smallest box designs holding an item of the given size, as
+    (BoxDesign id, inner volume) pairs. Raises ValueError for non-positive
+    dimensions or an unknown material.
+    """
+    if min(width, height, depth) <= 0:
+        raise ValueError("Width, height and depth must be positive.")
+    if material is not None and material not in MATERIALS:
+        raise ValueError(f"Unknown material {material!r}. Available materials: {', '.join(MATERIALS)}")
+    _index.sync()
+    return _index.query(width, height, depth, material, k, rotate)
+
+
+def reset():
+    """
+    Drop the in-memory index; the next query reloads it.
+    """
+    global _index
+    _index = FitIndex()
@@ -0,0 +1,12 @@
+"""
+Process pool initializer for password hashing in core.user_import.
+
+Kept free of model imports so spawned workers can load it without the app
+registry: hashing only needs settings.PASSWORD_HASHERS, and django.setup()
+would also run every AppConfig.ready() (layout warm-up, signal wiring).
+"""
+from django.conf import settings
+
+
+def init_worker():
+    settings.PASSWORD_HASHERS  # Configure settings from DJANGO_SETTINGS_MODULE
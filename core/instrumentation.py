@@ -0,0 +1,225 @@
+"""
+Request-level instrumentation for the core views.
+
+InstrumentationMiddleware (core.middleware) creates a RequestRecorder per
+request. Code on hot paths marks its phases with ``phase()`` or
+``timed_phase()``; each phase records wall time and the queries it ran. The
+results are sent back as a Server-Timing header and aggregated into a
+process-wide registry served in Prometheus text format by MetricsView.
+
+With instrumentation disabled no recorder is active; phases are still timed
+so core.slowlog can report operations that exceed their thresholds.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from . import slowlog
+
+_current_recorder = ContextVar('tynor_request_recorder', default=None)
+
+# Upper bounds (seconds) of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestRecorder:
+    """
+    Collects per-phase timings and query counts for one request.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}  # name -> [seconds, queries]
+        self.db_time = 0.0
+        self.queries = 0
+        self._stack = []
+
+    def add_phase(self, name, elapsed):
+        totals = self.phases.setdefault(name, [0.0, 0])
+        totals[0] += elapsed
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        """
+        connection.execute_wrapper hook: time every query and attribute it to
+        the innermost active phase.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            if self._stack:
+                self.phases.setdefault(self._stack[-1], [0.0, 0])[1] += 1
+
+    def server_timing(self, total):
+        """
+        Format the recorded phases as a Server-Timing header value.
+        """
+        entries = [f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"']
+        for name, (elapsed, queries) in self.phases.items():
+            entries.append(f'{name};dur={elapsed * 1000:.2f}')
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+
+def current_recorder():
+    return _current_recorder.get()
+
+
+@contextmanager
+def recording(recorder):
+    """
+    Make ``recorder`` the active recorder for the enclosed code.
+    """
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+
+@contextmanager
+def phase(name, **context):
+    """
+    Time the enclosed block as a named phase of the current request.
+
+    Keyword arguments (dimensions, row counts, ...) describe the operation in
+    the slow-operation log; the yielded dict can be updated inside the block.
+    """
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder._stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield context
+    finally:
+        elapsed = time.perf_counter() - start
+        if recorder is not None:
+            recorder._stack.pop()
+            recorder.add_phase(name, elapsed)
+        slowlog.report(name, elapsed, **context)
+
+
+def timed_phase(name):
+    """
+    Decorator form of ``phase()``.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + '}'
+
+
+class MetricsRegistry:
+    """
+    Thread-safe, process-wide aggregate of request and phase metrics.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collectors = []
+        self.reset()
+
+    def register_collector(self, collector):
+        """
+        Add a callable returning extra Prometheus text lines (e.g. cache or pool
+        gauges) to every scrape. Collectors survive reset().
+        """
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}   # (view, method, status) -> count
+            self.durations = {}  # view -> [bucket counts..., sum, count]
+            self.queries = {}    # view -> total queries
+            self.phases = {}     # (view, phase) -> [seconds, queries, count]
+
+    def observe_request(self, view, method, status, recorder, total):
+        with self._lock:
+            key = (view, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            histogram = self.durations.setdefault(view, [0] * len(DURATION_BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    histogram[i] += 1
+            histogram[-2] += total
+            histogram[-1] += 1
+
+            self.queries[view] = self.queries.get(view, 0) + recorder.queries
+            db = self.phases.setdefault((view, 'db'), [0.0, 0, 0])
+            db[0] += recorder.db_time
+            db[1] += recorder.queries
+            db[2] += 1
+            for name, (elapsed, queries) in recorder.phases.items():
+                totals = self.phases.setdefault((view, name), [0.0, 0, 0])
+                totals[0] += elapsed
+                totals[1] += queries
+                totals[2] += 1
+
+    def render_prometheus(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            lines = [
+                '# HELP tynor_requests_total Requests handled, by view, method and status.',
+                '# TYPE tynor_requests_total counter',
+            ]
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(f'tynor_requests_total{_labels(view=view, method=method, status=status)} {count}')
+
+            lines += [
+                '# HELP tynor_request_duration_seconds Request wall time, by view.',
+                '# TYPE tynor_request_duration_seconds histogram',
+            ]
+            for view, histogram in sorted(self.durations.items()):
+                for bound, count in zip(DURATION_BUCKETS, histogram):
+                    lines.append(f'tynor_request_duration_seconds_bucket{_labels(view=view, le=bound)} {count}')
+                lines.append(f'tynor_request_duration_seconds_bucket{_labels(view=view, le="+Inf")} {histogram[-1]}')
+                lines.append(f'tynor_request_duration_seconds_sum{_labels(view=view)} {histogram[-2]:.6f}')
+                lines.append(f'tynor_request_duration_seconds_count{_labels(view=view)} {histogram[-1]}')
+
+            lines += [
+                '# HELP tynor_request_queries_total Database queries issued, by view.',
+                '# TYPE tynor_request_queries_total counter',
+            ]
+            for view, count in sorted(self.queries.items()):
+                lines.append(f'tynor_request_queries_total{_labels(view=view)} {count}')
+
+            lines += [
+                '# HELP tynor_phase_seconds_total Time spent in each instrumented phase.',
+                '# TYPE tynor_phase_seconds_total counter',
+            ]
+            for (view, name), (elapsed, _, _) in sorted(self.phases.items()):
+                lines.append(f'tynor_phase_seconds_total{_labels(view=view, phase=name)} {elapsed:.6f}')
+            lines += [
+                '# HELP tynor_phase_queries_total Queries issued inside each instrumented phase.',
+                '# TYPE tynor_phase_queries_total counter',
+            ]
+            for (view, name), (_, queries, _) in sorted(self.phases.items()):
+                lines.append(f'tynor_phase_queries_total{_labels(view=view, phase=name)} {queries}')
+            lines += [
+                '# HELP tynor_phase_calls_total Requests that entered each instrumented phase.',
+                '# TYPE tynor_phase_calls_total counter',
+            ]
+            for (view, name), (_, _, count) in sorted(self.phases.items()):
+                lines.append(f'tynor_phase_calls_total{_labels(view=view, phase=name)} {count}')
+        for collector in self._collectors:
+            lines += collector()
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
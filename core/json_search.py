@@ -0,0 +1,154 @@
+"""
+Indexed search over the ``dimensions`` / ``material_specs`` JSON fields.
+
+The hot keys (width, height, depth and material type) are copied into plain,
+B-tree indexed columns whenever a design is saved, so range filters never decode
+JSON. Other keys are matched with JSON containment, which PostgreSQL answers
+from GIN indexes (added by migration); SQLite falls back to key lookups.
+"""
+import json
+import math
+import re
+from django.db import connections, models
+from django.db.models import Q
+
+SEARCH_DIMENSIONS = ('width', 'height', 'depth')
+SEARCH_COLUMNS = SEARCH_DIMENSIONS + ('material_type',)
+
+# JSON keys accepted as spec.<key> / dim.<key> filters
+KEY_PATTERN = re.compile(r'^[A-Za-z0-9_]+$')
+
+DEFAULT_SEARCH_LIMIT = 100
+MAX_SEARCH_LIMIT = 1000
+
+
+def to_number(value):
+    """
+    Parse a JSON dimension into a float, or None if it isn't a finite number.
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def search_column_values(dimensions, material_specs):
+    """
+    Values of the denormalised search columns for the given JSON fields.
+    """
+    dimensions = dimensions if isinstance(dimensions, dict) else {}
+    material_specs = material_specs if isinstance(material_specs, dict) else {}
+    values = {name: to_number(dimensions.get(name)) for name in SEARCH_DIMENSIONS}
+    material = material_specs.get('type')
+    values['material_type'] = str(material)[:50] if material not in (None, '') else None
+    return values
+
+
+class JSONSearchColumns(models.Model):
+    """
+    Abstract base adding indexed copies of the hot dimension and material keys.
+    Kept in sync by save(); bulk inserts must call sync_search_columns() first.
+    """
+    width = models.FloatField(null=True, blank=True, editable=False)
+    height = models.FloatField(null=True, blank=True, editable=False)
+    depth = models.FloatField(null=True, blank=True, editable=False)
+    material_type = models.CharField(max_length=50, null=True, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+        indexes = [
+            models.Index(fields=['material_type', 'width'], name='%(app_label)s_%(class)s_mat_w'),
+            models.Index(fields=['width'], name='%(app_label)s_%(class)s_width'),
+            models.Index(fields=['height'], name='%(app_label)s_%(class)s_height'),
+            models.Index(fields=['depth'], name='%(app_label)s_%(class)s_depth'),
+        ]
+
+    def sync_search_columns(self):
+        for name, value in search_column_values(self.dimensions, self.material_specs).items():
+            setattr(self, name, value)
+
+    def save(self, *args, **kwargs):
+        self.sync_search_columns()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'dimensions', 'material_specs'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | set(SEARCH_COLUMNS)
+        super().save(*args, **kwargs)
+
+
+def _float_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    number = to_number(value)
+    if number is None:
+        raise ValueError(f"'{name}' must be a number.")
+    return number
+
+
+def _json_value(value):
+    """
+    Interpret a query string value as JSON when possible (3, true, "3"),
+    otherwise as a plain string.
+    """
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def search_filter(params, vendor):
+    """
+    Build the filter for a search request (a QueryDict or dict). Raises
+    ValueError for malformed parameters.
+
+    - material=Cardboard              exact material type
+    - min_width=30, max_depth=50, ... ranges over width/height/depth
+    - spec.<key>=value, dim.<key>=value  any other JSON key
+    """
+    query = Q()
+    if params.get('material'):
+        query &= Q(material_type=params['material'])
+    for name in SEARCH_DIMENSIONS:
+        low = _float_param(params, f'min_{name}')
+        high = _float_param(params, f'max_{name}')
+        if low is not None:
+            query &= Q(**{f'{name}__gte': low})
+        if high is not None:
+            query &= Q(**{f'{name}__lte': high})
+
+    containment = {'material_specs': {}, 'dimensions': {}}
+    for param, value in params.items():
+        prefix, _, key = param.partition('.')
+        field = {'spec': 'material_specs', 'dim': 'dimensions'}.get(prefix)
+        if field is None or not key:
+            continue
+        if not KEY_PATTERN.match(key) or '__' in key:
+            raise ValueError(f"Invalid JSON key in '{param}'.")
+        containment[field][key] = _json_value(value)
+
+    for field, pairs in containment.items():
+        if not pairs:
+            continue
+        if vendor == 'postgresql':
+            # jsonb @> uses the GIN (jsonb_path_ops) index
+            query &= Q(**{f'{field}__contains': pairs})
+        else:
+            for key, value in pairs.items():
+                query &= Q(**{f'{field}__{key}': value})
+    return query
+
+
+def search(queryset, params):
+    """
+    Apply search parameters, ordering and limit/offset paging to a design queryset.
+    """
+    vendor = connections[queryset.db].vendor
+    try:
+        limit = min(int(params.get('limit', DEFAULT_SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+        offset = max(int(params.get('offset', 0)), 0)
+    except ValueError:
+        raise ValueError("'limit' and 'offset' must be integers.")
+    return queryset.filter(search_filter(params, vendor)).order_by('id')[offset:offset + max(limit, 0)]
@@ -0,0 +1,268 @@
+"""
+Layout artifacts precomputed when designs and box designs change.
+
+After a Design or BoxDesign is saved (and the transaction commits), a
+background worker builds its layout artifacts and records them in a
+LayoutArtifact row:
+
+- the layout SVG with its gzip/brotli variants, stored where
+  GenerateBoxLayoutView and /api/box_layouts/ look for them;
+- a PNG thumbnail;
+- the board area and cost (settings.BOARD_COST_PER_M2 by material).
+
+Files are named after the style and dimensions, so designs of the same size
+share them and rebuilding an unchanged size only updates the row. Each row
+keeps a hash of the inputs it was built from; saves that don't change the
+dimensions, material or style cost nothing.
+
+The row is marked ``pending`` when the save is recorded, so readers see that
+a build is queued rather than no artifacts at all. Rows bulk-created without
+signals (the seeder), and pending rows whose job was lost with a restarted
+worker, can be built with the ``build_layout_artifacts`` management command.
+"""
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from PIL import Image, ImageDraw
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+from . import layout_engine
+from .box_styles import DEFAULT_STYLE, get_style
+from .etags import BOX_LAYOUT_VERSION, make_etag
+from .models import BoxDesign, Design, LayoutArtifact
+from .utils import store_layout_variants
+
+logger = logging.getLogger(__name__)
+
+# Storage directory for cached box layouts and their compressed variants
+LAYOUT_STORAGE_DIR = 'box_layouts'
+
+# Resource name -> model
+ARTIFACT_MODELS = {
+    'design': Design,
+    'box_design': BoxDesign,
+}
+
+# Fields whose changes invalidate the artifacts
+INPUT_FIELDS = {
+    Design: {'dimensions', 'material_specs', 'width', 'height', 'depth', 'material_type'},
+    BoxDesign: {'width', 'height', 'depth', 'material'},
+}
+
+# Longest side of the thumbnail, in pixels
+THUMBNAIL_SIZE = 256
+
+# Bump when thumbnails or costs change so existing rows are rebuilt
+ARTIFACT_VERSION = 1
+
+_executor = None
+
+
+def layout_file_path(length, breadth, height, style=DEFAULT_STYLE, extension='svg'):
+    """
+    Storage path of the layout file for the given style and dimensions.
+    Fractional dimensions are written with 'p' for the point (10p5) to keep
+    the name a valid /api/box_layouts/ file name.
+    """
+    size = 'x'.join(str(value).replace('.', 'p') for value in (length, breadth, height))
+    return f"{LAYOUT_STORAGE_DIR}/{get_style(style).code}-{size}-v{BOX_LAYOUT_VERSION}.{extension}"
+
+
+def resource_name(model):
+    for name, artifact_model in ARTIFACT_MODELS.items():
+        if model._meta.concrete_model is artifact_model:
+            return name
+    return None
+
+
+def layout_inputs(instance):
+    """
+    (length, breadth, height, style, material) of a design or box design, or
+    None when it has no complete dimensions. Length is the width and breadth
+    the depth, as in the FastAPI generator.
+    """
+    if isinstance(instance, BoxDesign):
+        dimensions, material = (instance.width, instance.depth, instance.height), instance.material
+    else:
+        dimensions, material = (instance.width, instance.depth, instance.height), instance.material_type
+    if any(value is None or value <= 0 for value in dimensions):
+        return None
+    style = getattr(settings, 'LAYOUT_ARTIFACT_STYLE', DEFAULT_STYLE)
+    return (*layout_engine.normalize(*dimensions, style), material)
+
+
+def source_key(inputs):
+    return make_etag('layout-artifact', ARTIFACT_VERSION, BOX_LAYOUT_VERSION, *inputs)
+
+
+def render_thumbnail(geometry, size=THUMBNAIL_SIZE):
+    """
+    PNG bytes of the layout drawn to fit a ``size`` pixel square.
+    """
+    padding = 4
+    scale = (size - 2 * padding) / max(geometry.width, geometry.height)
+    image = Image.new('RGB', (round(geometry.width * scale) + 2 * padding, round(geometry.height * scale) + 2 * padding),
+                      'white')
+    draw = ImageDraw.Draw(image)
+    for panel in geometry.panels:
+        x, y = panel.x * scale + padding, panel.y * scale + padding
+        draw.rectangle([x, y, x + panel.width * scale, y + panel.height * scale], fill=panel.fill, outline='black')
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def board_cost(geometry, material):
+    """
+    (blank area, panel area, cost) in cm2 and currency units; cost is None for
+    materials without a price.
+    """
+    blank_area = geometry.width * geometry.height
+    board_area = sum(panel.width * panel.height for panel in geometry.panels)
+    rate = getattr(settings, 'BOARD_COST_PER_M2', {}).get(material)
+    cost = round(blank_area / 10000 * rate, 4) if rate is not None else None
+    return blank_area, board_area, cost
+
+
+def _save_once(path, content):
+    if not default_storage.exists(path):
+        default_storage.save(path, ContentFile(content))
+    return path
+
+
+def build(model, pk):
+    """
+    Build (or confirm up to date) the artifacts of one object. Returns its
+    LayoutArtifact, or None if the object is gone or has no dimensions.
+    """
+    instance = model._default_manager.filter(pk=pk).first()
+    content_type = ContentType.objects.get_for_model(model)
+    try:
+        inputs = layout_inputs(instance) if instance is not None else None
+    except ValueError as e:
+        artifact, _ = LayoutArtifact.objects.update_or_create(
+            content_type=content_type, object_id=pk, defaults={'status': 'failed', 'source_key': '', 'error': str(e)},
+        )
+        return artifact
+    if inputs is None:
+        LayoutArtifact.objects.filter(content_type=content_type, object_id=pk).delete()
+        return None
+
+    key = source_key(inputs)
+    artifact, _ = LayoutArtifact.objects.get_or_create(content_type=content_type, object_id=pk)
+    if artifact.status == 'ready' and artifact.source_key == key:
+        return artifact
+
+    length, breadth, height, style, material = inputs
+    try:
+        svg_path = layout_file_path(length, breadth, height, style)
+        if not default_storage.exists(svg_path):
+            store_layout_variants(svg_path, layout_engine.render_variants(length, breadth, height, style))
+        geometry = layout_engine.geometry(length, breadth, height, style)
+        thumbnail_path = _save_once(layout_file_path(length, breadth, height, style, 'png'), render_thumbnail(geometry))
+        blank_area, board_area, cost = board_cost(geometry, material)
+        values = {
+            'status': 'ready', 'source_key': key, 'svg_path': svg_path, 'thumbnail_path': thumbnail_path,
+            'blank_area_cm2': blank_area, 'board_area_cm2': board_area, 'cost': cost, 'error': '',
+        }
+    except Exception as e:
+        logger.exception("Failed to build layout artifacts for %s #%s", model._meta.label, pk)
+        values = {'status': 'failed', 'source_key': key, 'error': str(e)}
+
+    # A save while this build ran has queued another build; let that one write
+    current = model._default_manager.filter(pk=pk).first()
+    try:
+        if current is None or layout_inputs(current) != inputs:
+            return artifact
+    except ValueError:
+        return artifact
+    for field, value in values.items():
+        setattr(artifact, field, value)
+    artifact.save()
+    return artifact
+
+
+def _build_logged(model, pk):
+    try:
+        build(model, pk)
+    except Exception:
+        logger.exception("Layout artifact job failed for %s #%s", model._meta.label, pk)
+
+
+def _build_in_worker(model, pk):
+    try:
+        _build_logged(model, pk)
+    finally:
+        # Worker threads get their own connections; don't leave them open
+        connections.close_all()
+
+
+def mark_pending(model, instance):
+    """
+    Mark the artifacts of a just-saved object as pending. Returns False when
+    the stored artifacts already match it and no build is needed.
+    """
+    try:
+        inputs = layout_inputs(instance)
+    except ValueError:
+        inputs = ()  # Invalid dimensions: build() records the error
+    if inputs is None:
+        return True  # No dimensions: build() removes any stale artifacts
+    content_type = ContentType.objects.get_for_model(model)
+    artifact = LayoutArtifact.objects.filter(content_type=content_type, object_id=instance.pk).first()
+    if inputs and artifact is not None and artifact.status == 'ready' and artifact.source_key == source_key(inputs):
+        return False
+    LayoutArtifact.objects.update_or_create(
+        content_type=content_type, object_id=instance.pk, defaults={'status': 'pending'},
+    )
+    return True
+
+
+def enqueue(model, pk):
+    """
+    Build the artifacts of one object on the worker pool, or right away when
+    settings.LAYOUT_ARTIFACT_WORKERS is 0. Failures are logged, never raised.
+    """
+    global _executor
+    workers = getattr(settings, 'LAYOUT_ARTIFACT_WORKERS', 2)
+    if not workers:
+        _build_logged(model, pk)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='layout-artifacts')
+    _executor.submit(_build_in_worker, model, pk)
+
+
+def _saved(sender, instance, update_fields=None, **kwargs):
+    if kwargs.get('raw') or (update_fields is not None and not INPUT_FIELDS[sender] & set(update_fields)):
+        return
+    if mark_pending(sender, instance):
+        transaction.on_commit(partial(enqueue, sender, instance.pk), using=router.db_for_write(sender))
+
+
+def _deleted(sender, instance, **kwargs):
+    LayoutArtifact.objects.filter(
+        content_type=ContentType.objects.get_for_model(sender), object_id=instance.pk
+    ).delete()
+
+
+def connect_signals():
+    for model in ARTIFACT_MODELS.values():
+        post_save.connect(_saved, sender=model, dispatch_uid=f'core.layout_artifacts.saved.{model._meta.label}')
+        post_delete.connect(_deleted, sender=model, dispatch_uid=f'core.layout_artifacts.deleted.{model._meta.label}')
+
+
+def artifact_for(resource, pk):
+    """
+    The LayoutArtifact of a design or box design, or None. Raises ValueError
+    for an unknown resource.
+    """
+    if resource not in ARTIFACT_MODELS:
+        raise ValueError(f"Unknown resource '{resource}'. Available resources: {', '.join(ARTIFACT_MODELS)}")
+    content_type = ContentType.objects.get_for_model(ARTIFACT_MODELS[resource])
+    return LayoutArtifact.objects.filter(content_type=content_type, object_id=pk).first()
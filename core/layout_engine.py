@@ -0,0 +1,176 @@
+"""
+Shared box layout engine.
+
+Every layout entry point (the Django views, the async views, core.utils and the
+FastAPI app in core.main) renders through the functions here, so caching,
+warm-up and metrics behave the same everywhere. Layouts are described by a box
+style (core.box_styles) and dimensions; presentation options (scale, offset,
+font size) are explicit arguments so each entry point keeps its own look.
+
+Rendered SVG text and its compressed variants are kept in in-process LRU caches
+keyed by normalised arguments, so 10, 10.0 and "10" share one entry. Clients
+that draw layouts themselves (core/static/box_layout.js) fetch the compact
+geometry JSON from ``geometry_json()`` instead, which skips SVG rendering and
+compression altogether.
+
+Like box_styles and compression, this module has no Django dependency. Django
+plugs its instrumentation in with ``set_phase_hook()`` (see CoreConfig.ready).
+"""
+import json
+import math
+from contextlib import nullcontext
+from functools import lru_cache
+from .box_styles import DEFAULT_STYLE, available_styles, compact_geometry, get_style, render_svg
+from .compression import compress_variants
+
+# Maximum number of distinct layouts kept rendered / compressed in memory
+RENDER_CACHE_SIZE = 1024
+
+# Largest accepted dimension; larger values overflow the panel arithmetic
+MAX_DIMENSION = 100000
+
+# Layouts rendered by warm_up() for every style, as (length, breadth, height)
+DEFAULT_WARM_UP_SIZES = ((30, 20, 15),)
+
+# Context manager factory used to time engine phases: hook(name, **context)
+_phase_hook = None
+
+
+def set_phase_hook(hook):
+    """
+    Install the context manager used to time render/compress phases
+    (core.instrumentation.phase under Django). Pass None to disable.
+    """
+    global _phase_hook
+    _phase_hook = hook
+
+
+def _phase(name, **context):
+    if _phase_hook is None:
+        return nullcontext(context)
+    return _phase_hook(name, **context)
+
+
+def _dimension(value):
+    """
+    Normalise a dimension to a positive int or float up to MAX_DIMENSION.
+    """
+    number = float(value)
+    if not math.isfinite(number) or number <= 0:
+        raise ValueError(f"Dimensions must be positive numbers, got {value!r}.")
+    if number > MAX_DIMENSION:
+        raise ValueError(f"Dimensions must be at most {MAX_DIMENSION}, got {value!r}.")
+    return int(number) if number.is_integer() else number
+
+
+def normalize(length, breadth, height, style=DEFAULT_STYLE):
+    """
+    Validate and canonicalise layout arguments. Raises ValueError for bad
+    dimensions or an unknown style.
+    """
+    return _dimension(length), _dimension(breadth), _dimension(height), get_style(style).code
+
+
+def geometry(length, breadth, height, style=DEFAULT_STYLE):
+    """
+    Panel geometry of a layout in unscaled units.
+    """
+    length, breadth, height, style = normalize(length, breadth, height, style)
+    return get_style(style).evaluate(length, breadth, height)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _geometry_json(length, breadth, height, style):
+    with _phase('geometry', style=style):
+        geometry = get_style(style).evaluate(length, breadth, height)
+        return json.dumps(compact_geometry(geometry), separators=(',', ':')).encode('utf-8')
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render(length, breadth, height, style, scale, offset, font_size):
+    with _phase('render', style=style, length=length, breadth=breadth, height=height):
+        return render_svg(get_style(style).evaluate(length, breadth, height), scale, offset, font_size)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_variants(length, breadth, height, style, scale, offset, font_size):
+    svg = _render(length, breadth, height, style, scale, offset, font_size)
+    with _phase('compress', style=style):
+        return compress_variants(svg.encode('utf-8'))
+
+
+def geometry_json(length, breadth, height, style=DEFAULT_STYLE):
+    """
+    Compact panel geometry of a layout as UTF-8 JSON bytes (see
+    box_styles.compact_geometry), in unscaled units.
+    """
+    return _geometry_json(*normalize(length, breadth, height, style))
+
+
+def render(length, breadth, height, style=DEFAULT_STYLE, scale=1, offset=(0, 0), font_size=12):
+    """
+    Render a layout as an SVG document string.
+    """
+    return _render(*normalize(length, breadth, height, style), scale, tuple(offset), font_size)
+
+
+def render_variants(length, breadth, height, style=DEFAULT_STYLE, scale=1, offset=(0, 0), font_size=12):
+    """
+    Render a layout and return its encoding -> bytes variants (identity, gzip
+    and, when available, brotli). The returned dict is shared; don't mutate it.
+    """
+    return _render_variants(*normalize(length, breadth, height, style), scale, tuple(offset), font_size)
+
+
+def warm_up(sizes=DEFAULT_WARM_UP_SIZES, styles=None, **options):
+    """
+    Pre-render and compress the given sizes for every style (or ``styles``).
+    Returns the number of layouts rendered.
+    """
+    codes = styles or [style.code for style in available_styles()]
+    count = 0
+    for code in codes:
+        for length, breadth, height in sizes:
+            render_variants(length, breadth, height, code, **options)
+            count += 1
+    return count
+
+
+def cache_stats():
+    """
+    Hit/miss counters and sizes of the render and compression caches.
+    """
+    stats = {}
+    for name, cached in (('render', _render), ('variants', _render_variants), ('geometry', _geometry_json)):
+        info = cached.cache_info()
+        stats[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'maxsize': info.maxsize}
+    return stats
+
+
+def clear_cache():
+    _render.cache_clear()
+    _render_variants.cache_clear()
+    _geometry_json.cache_clear()
+
+
+def prometheus_lines():
+    """
+    Cache metrics in the Prometheus text format, for any framework's /metrics endpoint.
+    """
+    stats = cache_stats()
+    lines = [
+        '# HELP tynor_layout_cache_hits_total Layout engine cache hits.',
+        '# TYPE tynor_layout_cache_hits_total counter',
+    ]
+    lines += [f'tynor_layout_cache_hits_total{{cache="{name}"}} {s["hits"]}' for name, s in stats.items()]
+    lines += [
+        '# HELP tynor_layout_cache_misses_total Layout engine cache misses (renders or compressions).',
+        '# TYPE tynor_layout_cache_misses_total counter',
+    ]
+    lines += [f'tynor_layout_cache_misses_total{{cache="{name}"}} {s["misses"]}' for name, s in stats.items()]
+    lines += [
+        '# HELP tynor_layout_cache_entries Layouts currently held in each cache.',
+        '# TYPE tynor_layout_cache_entries gauge',
+    ]
+    lines += [f'tynor_layout_cache_entries{{cache="{name}"}} {s["size"]}' for name, s in stats.items()]
+    return lines
@@ -0,0 +1,152 @@
+"""
+Live box layout preview over a WebSocket.
+
+The layout page (core/static/box_layout.js) keeps one connection open at
+LIVE_PREVIEW_PATH and sends the form state as it changes:
+
+    {"seq": 7, "L": 30, "B": 20, "H": 15.5, "style": "cross"}
+
+and the server answers each update it processes with the panel geometry
+(box_styles.compact_geometry): in full for the first layout and after a
+style change, otherwise as a diff against the previous layout.
+
+    {"seq": 7, "type": "full", "style": ..., "size": [...], "rects": [...], "fills": [...], "labels": [...]}
+    {"seq": 8, "type": "diff", "size": [...], "rects": [index, value, index, value, ...]}
+    {"seq": 9, "type": "error", "error": "..."}
+
+A diff lists only the rect coordinates that changed (``size`` is always
+sent). Updates that arrive while one is being answered are coalesced: only
+the newest is answered, so a fast typist never builds up a backlog. ``seq``
+is echoed back so the client can tell which update a reply belongs to.
+
+This is a plain ASGI application; ``websocket_router()`` puts it in front of
+Django's ASGI handler in tynor_box_system/asgi.py. Like the geometry
+endpoint, it needs no authentication.
+"""
+import asyncio
+import json
+import logging
+from .box_styles import DEFAULT_STYLE, compact_geometry
+from . import layout_engine
+
+logger = logging.getLogger(__name__)
+
+LIVE_PREVIEW_PATH = '/ws/box_layout/'
+
+# Larger messages are answered with an error instead of being parsed
+MAX_MESSAGE_BYTES = 4096
+
+
+def diff_geometry(previous, current):
+    """
+    Message turning ``previous`` compact geometry into ``current``, or None
+    when a full message is needed (no previous layout or another style).
+    """
+    if previous is None or previous['style'] != current['style']:
+        return None
+    rects = []
+    for index, (old, new) in enumerate(zip(previous['rects'], current['rects'])):
+        if old != new:
+            rects += (index, new)
+    return {'type': 'diff', 'size': current['size'], 'rects': rects}
+
+
+def _parse(text):
+    """
+    (length, breadth, height, style) from an update message; raises ValueError.
+    """
+    if len(text) > MAX_MESSAGE_BYTES:
+        raise ValueError("Message too large.")
+    try:
+        update = json.loads(text)
+    except json.JSONDecodeError:
+        raise ValueError("Messages must be JSON objects.")
+    if not isinstance(update, dict):
+        raise ValueError("Messages must be JSON objects.")
+    return update.get('seq'), (update.get('L'), update.get('B'), update.get('H'), update.get('style') or DEFAULT_STYLE)
+
+
+class PreviewSession:
+    """
+    State of one connection: the newest unanswered update and the last
+    geometry sent.
+    """
+    def __init__(self, send):
+        self.send = send
+        self.latest = None
+        self.ready = asyncio.Event()
+        self.sent = None
+
+    def push(self, text):
+        self.latest = text
+        self.ready.set()
+
+    async def _send(self, message):
+        await self.send({'type': 'websocket.send', 'text': json.dumps(message, separators=(',', ':'))})
+
+    async def answer(self, text):
+        seq = None
+        try:
+            seq, arguments = _parse(text)
+            if None in arguments[:3]:
+                raise ValueError("L, B and H are required.")
+            current = compact_geometry(layout_engine.geometry(*arguments))
+        except (TypeError, ValueError) as e:
+            await self._send({'seq': seq, 'type': 'error', 'error': str(e)})
+            return
+        except Exception:
+            # Any other failure answers this update only; the session keeps running
+            logger.exception("Live preview update failed")
+            await self._send({'seq': seq, 'type': 'error', 'error': "Could not lay out these dimensions."})
+            return
+        message = diff_geometry(self.sent, current) or dict(current, type='full')
+        self.sent = current
+        await self._send(dict(message, seq=seq))
+
+    async def run(self):
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            text, self.latest = self.latest, None
+            await self.answer(text)
+
+
+async def application(scope, receive, send):
+    """
+    ASGI application for the live preview WebSocket.
+    """
+    if scope['type'] != 'websocket' or scope['path'] != LIVE_PREVIEW_PATH:
+        # Reject the handshake (HTTP 403)
+        await send({'type': 'websocket.close'})
+        return
+
+    session = PreviewSession(send)
+    worker = None
+    try:
+        while True:
+            event = await receive()
+            if event['type'] == 'websocket.connect':
+                await send({'type': 'websocket.accept'})
+                worker = asyncio.create_task(session.run())
+            elif event['type'] == 'websocket.receive':
+                text = event.get('text')
+                if text is None:
+                    text = (event.get('bytes') or b'').decode('utf-8', 'replace')
+                session.push(text)
+            elif event['type'] == 'websocket.disconnect':
+                break
+    finally:
+        if worker is not None:
+            worker.cancel()
+
+
+def websocket_router(http_application):
+    """
+    ASGI application sending WebSocket connections to the live preview and
+    everything else to ``http_application`` (Django).
+    """
+    async def router(scope, receive, send):
+        if scope['type'] == 'websocket':
+            return await application(scope, receive, send)
+        return await http_application(scope, receive, send)
+    return router
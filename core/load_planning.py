@@ -0,0 +1,164 @@
+"""
+Pallet and container load planning for box designs.
+
+For every carton, ``plan_loads()`` tries the six orientations (or, for
+upright-only cartons, the two that keep the height vertical) and, for each,
+the layer patterns below, then stacks as many layers as the carrier's
+height allows:
+
+- a plain grid of identically oriented cartons;
+- two blocks: ``a`` columns of the orientation along the carrier's length,
+  with the rest of the length filled by cartons turned 90 degrees, for every
+  possible ``a``; and the same split along the width.
+
+All cartons, orientations and splits are evaluated at once as numpy arrays,
+so a whole catalogue is planned in one pass. Dimensions are outer sizes in
+cm; weight limits are not modelled.
+
+Cartons with a dimension below MIN_DIMENSION_CM (or not a finite number)
+are not planned. Cartons more than MAX_SPLITS columns long on a carrier are
+split at MAX_SPLITS evenly spaced points instead of every column.
+
+``plan_box_designs()`` caches each result in the Django cache under the
+carton's dimensions, so repricing a catalogue only computes new or changed
+sizes.
+"""
+import itertools
+import math
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+# Usable length, width and stacking height in cm
+DEFAULT_CARRIERS = {
+    'euro_pallet': (120.0, 80.0, 150.0),
+    'us_pallet': (121.9, 101.6, 150.0),
+    'container_20ft': (589.8, 235.2, 239.3),
+    'container_40ft': (1203.2, 235.2, 239.3),
+    'container_40ft_hc': (1203.2, 235.2, 269.8),
+}
+
+# Bump when the planning rules change so cached plans are recomputed
+PLAN_VERSION = 2
+PLAN_CACHE_SECONDS = 7 * 24 * 3600
+
+# Cartons planned per numpy batch (bounds the size of the split arrays)
+BATCH_SIZE = 512
+# Most two-block split points tried per carton and orientation
+MAX_SPLITS = 256
+# Smallest carton dimension planned, in cm
+MIN_DIMENSION_CM = 0.1
+
+# (length, width, height) axis order of each orientation of a (width, height, depth) carton
+ORIENTATIONS = np.array(list(itertools.permutations(range(3))))
+# Orientations keeping the carton's height (axis 1) vertical
+UPRIGHT = np.array([order[2] == 1 for order in ORIENTATIONS])
+
+
+def carriers():
+    return getattr(settings, 'LOAD_PLAN_CARRIERS', DEFAULT_CARRIERS)
+
+
+def plannable(size):
+    """
+    Whether a (width, height, depth) carton can be planned.
+    """
+    return all(value is not None and math.isfinite(value) and value >= MIN_DIMENSION_CM for value in size)
+
+
+def _two_block(length, width, l, w):
+    """
+    Best count for cartons of footprint l x w (arrays) on a length x width
+    floor, over grids and two-block splits along the length.
+    """
+    columns = np.floor(length / l)
+    count = min(int(columns.max(initial=0)), MAX_SPLITS)
+    splits = np.arange(count + 1)
+    columns = columns[..., None]
+    a = np.where(
+        columns <= count,
+        np.minimum(splits, columns),  # splits past a carton's column count repeat its last one
+        np.floor(splits * columns / max(count, 1)),  # long rows: evenly spaced splits, grid included
+    )
+    first = a * np.floor(width / w)[..., None]
+    rest = np.floor((length - a * l[..., None]) / w[..., None]) * np.floor(width / l)[..., None]
+    return (first + rest).max(axis=-1)
+
+
+def plan_loads(dims, carrier, upright=False):
+    """
+    Best load of each carton in ``dims`` (an (n, 3) array of width, height,
+    depth) on ``carrier`` (length, width, height). Returns a dict of arrays:
+    ``orientation`` (n, 3: length, width, height as placed), ``per_layer``,
+    ``layers``, ``total`` and ``utilisation`` (share of the carrier volume).
+    """
+    dims = np.asarray(dims, dtype=np.float64).reshape(-1, 3)
+    length, width, height = carrier
+    results = {key: [] for key in ('orientation', 'per_layer', 'layers', 'total')}
+
+    for start in range(0, len(dims), BATCH_SIZE):
+        placed = dims[start:start + BATCH_SIZE][:, ORIENTATIONS]  # (n, 6, 3)
+        l, w, h = placed[..., 0], placed[..., 1], placed[..., 2]
+        per_layer = np.maximum(_two_block(length, width, l, w), _two_block(width, length, w, l))
+        layers = np.floor(height / h)
+        total = per_layer * layers
+        if upright:
+            total = np.where(UPRIGHT, total, -1)
+        # Most cartons; among equals, fewest layers (more stable stacks)
+        best = np.lexsort((layers, -total), axis=-1)[:, 0] if total.size else np.zeros(0, dtype=int)
+        rows = np.arange(len(best))
+        results['orientation'].append(placed[rows, best])
+        results['per_layer'].append(per_layer[rows, best])
+        results['layers'].append(layers[rows, best])
+        results['total'].append(np.maximum(total[rows, best], 0))
+
+    plan = {key: np.concatenate(values) if values else np.zeros((0, 3) if key == 'orientation' else 0)
+            for key, values in results.items()}
+    plan['per_layer'] = np.where(plan['total'] > 0, plan['per_layer'], 0)
+    plan['layers'] = np.where(plan['total'] > 0, plan['layers'], 0)
+    plan['utilisation'] = plan['total'] * dims.prod(axis=1) / (length * width * height)
+    return plan
+
+
+def _cache_key(carrier_name, upright, size):
+    return f'load-plan:{PLAN_VERSION}:{carrier_name}:{int(upright)}:' + ':'.join(f'{value:g}' for value in size)
+
+
+def plan_box_designs(rows, carrier_names=None, upright=False):
+    """
+    Load plans for ``rows`` of (id, width, height, depth), as
+    {id: {carrier: plan}}, or {id: None} for cartons that can't be planned
+    (see ``plannable()``). Raises ValueError for an unknown carrier.
+    """
+    available = carriers()
+    carrier_names = list(carrier_names or available)
+    unknown = [name for name in carrier_names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown carrier(s): {', '.join(unknown)}. Available carriers: {', '.join(available)}")
+
+    sizes = sorted({tuple(row[1:4]) for row in rows if plannable(row[1:4])})
+    keys = {(name, size): _cache_key(name, upright, size) for name in carrier_names for size in sizes}
+    cached = cache.get_many(list(keys.values()))
+    plans = {key: cached[cache_key] for key, cache_key in keys.items() if cache_key in cached}
+
+    for name in carrier_names:
+        missing = [size for size in sizes if (name, size) not in plans]
+        if not missing:
+            continue
+        plan = plan_loads(missing, available[name], upright)
+        computed = {}
+        for index, size in enumerate(missing):
+            computed[(name, size)] = {
+                'orientation': plan['orientation'][index].tolist(),
+                'per_layer': int(plan['per_layer'][index]),
+                'layers': int(plan['layers'][index]),
+                'total': int(plan['total'][index]),
+                'utilisation': round(float(plan['utilisation'][index]), 4),
+            }
+        plans.update(computed)
+        cache.set_many({keys[key]: value for key, value in computed.items()}, timeout=PLAN_CACHE_SECONDS)
+
+    return {
+        row[0]: {name: plans[(name, tuple(row[1:4]))] for name in carrier_names} if plannable(row[1:4]) else None
+        for row in rows
+    }
@@ -0,0 +1,149 @@
+"""
+Login throttling and verified-credential caching for LoginView.
+
+Every attempt takes a token from two buckets in the Django cache (shared by
+all workers when CACHES points at Redis): one per username and one per client
+IP. Buckets refill at a steady rate up to their capacity; an attempt that
+finds either bucket empty is rejected with 429 before authenticate() runs, so
+brute-force and runaway-client traffic never reaches the password hasher.
+
+Successful logins are remembered for settings.LOGIN_AUTH_CACHE_SECONDS under
+an HMAC of the username and password (keyed with a salted_hmac key derived
+for this purpose, not SECRET_KEY itself), together with the authenticating
+backend and the user's stored password hash. A repeat login with the same
+credentials loads the user through that backend, checks that it may still
+authenticate and compares hashes instead of running PBKDF2 again; changing
+the password, deactivating the user or removing the backend invalidates the
+entry. Passwords are never stored.
+
+Attempt outcomes are exported on /api/metrics/ (``prometheus_lines``).
+"""
+import hashlib
+import hmac
+import math
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth import load_backend
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+# Bucket name -> (capacity, tokens refilled per second)
+DEFAULT_BUCKETS = {
+    'username': (10, 1 / 6),
+    'ip': (30, 1.0),
+}
+
+OUTCOMES = ('throttled', 'cached', 'success', 'failure')
+
+_lock = threading.Lock()
+_counts = dict.fromkeys(OUTCOMES, 0)
+
+
+def record(outcome):
+    with _lock:
+        _counts[outcome] += 1
+
+
+def attempt_counts():
+    with _lock:
+        return dict(_counts)
+
+
+def reset_counts():
+    with _lock:
+        _counts.update(dict.fromkeys(OUTCOMES, 0))
+
+
+def client_ip(request):
+    # REMOTE_ADDR only: X-Forwarded-For is set by the client unless a trusted
+    # proxy rewrites it
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+def _bucket_keys(username, ip):
+    digest = hashlib.sha256(username.lower().encode()).hexdigest()[:32]
+    return {'username': f'login-bucket:user:{digest}', 'ip': f'login-bucket:ip:{ip}'}
+
+
+def take_token(username, ip, now=None):
+    """
+    Take one token from the username and IP buckets. Returns 0 if the attempt
+    may proceed, otherwise the seconds until both buckets have a token again
+    (no tokens are taken then).
+
+    The read-modify-write is not atomic across workers; concurrent attempts can
+    each see the same token, which lets a burst through by at most the number
+    of workers.
+    """
+    buckets = getattr(settings, 'LOGIN_THROTTLE_BUCKETS', DEFAULT_BUCKETS)
+    now = time.time() if now is None else now
+    keys = {name: key for name, key in _bucket_keys(username, ip).items() if name in buckets}
+    stored = cache.get_many(list(keys.values()))
+
+    levels, wait = {}, 0.0
+    for name, key in keys.items():
+        capacity, rate = buckets[name]
+        tokens, updated = stored.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens < 1:
+            wait = max(wait, (1 - tokens) / rate)
+        levels[key] = (tokens, capacity / rate)
+    if wait:
+        return math.ceil(wait)
+
+    for key, (tokens, full_after) in levels.items():
+        # An untouched bucket is full again after capacity / rate seconds
+        cache.set(key, (tokens - 1, now), timeout=math.ceil(full_after))
+    return 0
+
+
+def _credential_key(username, password):
+    mac = salted_hmac('core.login_throttle.credential', f'{username}\0{password}', algorithm='sha256')
+    return f'login-verified:{mac.hexdigest()}'
+
+
+def cached_user(username, password):
+    """
+    The user verified with these credentials within the cache period, or None.
+    The user is loaded through the backend that authenticated it, which must
+    still be configured and still accept the user.
+    """
+    if not getattr(settings, 'LOGIN_AUTH_CACHE_SECONDS', 0):
+        return None
+    entry = cache.get(_credential_key(username, password))
+    if entry is None:
+        return None
+    user_id, backend_path, password_hash = entry
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return None
+    backend = load_backend(backend_path)
+    user = backend.get_user(user_id)
+    if user is None or not hmac.compare_digest(user.password, password_hash):
+        return None
+    if not getattr(backend, 'user_can_authenticate', lambda user: True)(user):
+        return None
+    user.backend = backend_path
+    return user
+
+
+def remember(username, password, user):
+    """
+    Cache a user just returned by authenticate() for these credentials.
+    """
+    timeout = getattr(settings, 'LOGIN_AUTH_CACHE_SECONDS', 0)
+    if timeout and getattr(user, 'backend', None):
+        cache.set(_credential_key(username, password), (user.pk, user.backend, user.password), timeout=timeout)
+
+
+def prometheus_lines():
+    """
+    Login attempt counters in the Prometheus text format.
+    """
+    counts = attempt_counts()
+    lines = [
+        '# HELP tynor_login_attempts_total Login attempts by outcome (throttled attempts skip password hashing).',
+        '# TYPE tynor_login_attempts_total counter',
+    ]
+    lines += [f'tynor_login_attempts_total{{outcome="{outcome}"}} {counts[outcome]}' for outcome in OUTCOMES]
+    return lines
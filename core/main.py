@@ -1,7 +1,9 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse, Response
 from pydantic import BaseModel
-import svgwrite
+from core import layout_engine
+from core.box_styles import available_styles
+from core.compression import choose_encoding, variant_headers
 
 app = FastAPI()
 
@@ -9,63 +11,63 @@ class BoxLayoutRequest(BaseModel):
     width: int  # Width of the box
     height: int  # Height of the box
     depth: int  
+    style: str = "tynor-rsc"  # Code of a registered box style
 
-def create_svg(width, height, depth):
-    try:
-        # File name
-        svg_filename = "box_layout.svg"
-        dwg = svgwrite.Drawing(svg_filename, profile="tiny", size=("2000px", "2000px"))
-
-        # Colors and style
-        border_color = "black"
-        text_color = "black"
-        font_size = "15px"
-
-        # Scale factor for visualization
-        scale = 10
-
-        # Scaled dimensions
-        scaled_width = width * scale
-        scaled_height = height * scale
-        scaled_depth = depth * scale
-
-        # Base offsets for placement
-        x_offset = 100
-        y_offset = 100
-
-        # Adjusted panel placements based on the reference image
-        panels = [
-            # Panel number, position (x, y), size (width, height)
-            ("1", (x_offset + scaled_depth, y_offset), (scaled_width, scaled_depth / 2)),  # Top flap above back
-            ("2", (x_offset + scaled_depth, y_offset + scaled_depth / 2), (scaled_width, scaled_depth / 2)),  # Bottom flap above back
-            ("3", (x_offset + scaled_depth, y_offset + scaled_depth), (scaled_width, scaled_height)),  # Back panel
-            ("4", (x_offset + scaled_depth + scaled_width, y_offset), (scaled_depth / 2, scaled_depth / 2)),  # Top-left corner of 7 (half width of 7)
-            ("5", (x_offset + scaled_depth + scaled_width, y_offset + scaled_depth), (scaled_depth / 2, scaled_height)),  # Right side panel
-            ("6", (x_offset + scaled_depth + scaled_width, y_offset + scaled_depth + scaled_height), (scaled_depth / 2, scaled_depth / 2)),  # Right-bottom flap under 5
-            ("7", (x_offset + scaled_depth + scaled_width + scaled_depth / 2, y_offset), (scaled_width, scaled_depth / 2)),  # Top flap above front
-            ("8", (x_offset + scaled_depth + scaled_width + scaled_depth / 2, y_offset + scaled_depth), (scaled_width, scaled_height)),  # Front panel
-            ("9", (x_offset + scaled_depth + scaled_width + scaled_depth / 2, y_offset + scaled_depth + scaled_height), (scaled_width, scaled_depth / 2)),  # Bottom flap under 8
-            ("10", (x_offset + scaled_depth + scaled_width + scaled_width, y_offset), (scaled_depth / 2, scaled_depth / 2)),  # Top-right corner of 7 (half width of 7)
-            ("11", (x_offset + scaled_depth + scaled_width + scaled_width + scaled_depth / 2, y_offset + scaled_depth / 2), (scaled_depth / 2, scaled_height)),  # Right strip
-            ("12", (x_offset + scaled_depth + scaled_width + scaled_width + scaled_depth / 2, y_offset + scaled_depth / 2 + scaled_height), (scaled_depth / 2, scaled_depth / 2)),  # Right-bottom corner
-        ]
-
-        # Draw panels
-        for panel_num, pos, size in panels:
-            dwg.add(dwg.rect(insert=pos, size=size, stroke=border_color, fill="none"))
-            dwg.add(dwg.text(panel_num, insert=(pos[0] + size[0] / 2, pos[1] + size[1] / 2),
-                             fill=text_color, font_size=font_size, text_anchor="middle"))
-
-        dwg.save()
-        return svg_filename
+# Presentation used by this service: panels drawn at 10px per unit, inset by 100px
+LAYOUT_OPTIONS = {"scale": 10, "offset": (100, 100), "font_size": 15}
 
+def create_svg(width, height, depth, style="tynor-rsc"):
+    """
+    Render the layout SVG through the shared layout engine (length = width, breadth = depth).
+    """
+    try:
+        return layout_engine.render(width, depth, height, style, **LAYOUT_OPTIONS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating SVG: {str(e)}")
 
+def layout_variants(width, height, depth, style):
+    """
+    Identity/gzip/brotli variants of a layout, cached by the layout engine.
+    """
+    try:
+        return layout_engine.render_variants(width, depth, height, style, **LAYOUT_OPTIONS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.on_event("startup")
+def warm_up_layouts():
+    layout_engine.warm_up(**LAYOUT_OPTIONS)
+
 @app.post("/generate-box-layout/")
-def generate_box_layout(request: BoxLayoutRequest):
+def generate_box_layout(request: BoxLayoutRequest, accept_encoding: str = Header(default="")):
     try:
-        svg_file = create_svg(request.width, request.height, request.depth)
-        return FileResponse(svg_file, media_type="image/svg+xml", filename=svg_file)
+        variants = layout_variants(request.width, request.height, request.depth, request.style)
+        encoding = choose_encoding(accept_encoding, variants)
+        headers = variant_headers(encoding)
+        headers["Content-Disposition"] = 'attachment; filename="box_layout.svg"'
+        return Response(content=variants[encoding], media_type="image/svg+xml", headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@app.get("/box-layout-geometry/")
+def box_layout_geometry(width: float, height: float, depth: float, style: str = "tynor-rsc"):
+    """
+    Compact panel geometry for clients that draw the layout themselves.
+    """
+    try:
+        content = layout_engine.geometry_json(width, depth, height, style)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=content, media_type="application/json")
+
+@app.get("/box-styles/")
+def list_box_styles():
+    return [style.as_dict() for style in available_styles()]
+
+@app.get("/metrics/", response_class=PlainTextResponse)
+def layout_metrics():
+    return "\n".join(layout_engine.prometheus_lines()) + "\n"
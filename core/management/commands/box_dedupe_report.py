@@ -0,0 +1,54 @@
+import csv
+import io
+import json
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.box_dedupe import DEFAULT_TOLERANCE_CM, consolidation_report
+
+
+class Command(BaseCommand):
+    """
+    Report near-duplicate box designs that could be consolidated.
+    """
+    help = "Cluster box designs whose dimensions differ by at most a tolerance and report the clusters."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tolerance', type=float,
+                            default=getattr(settings, 'BOX_DEDUPE_TOLERANCE_CM', DEFAULT_TOLERANCE_CM),
+                            help="Largest difference per dimension, in cm (default: settings.BOX_DEDUPE_TOLERANCE_CM).")
+        parser.add_argument('--format', choices=('json', 'csv'), default='json')
+        parser.add_argument('--output', help="Write the report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            report = consolidation_report(options['tolerance'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        output = io.StringIO()
+        if options['format'] == 'json':
+            json.dump(report, output, indent=2)
+            output.write('\n')
+        else:
+            writer = csv.writer(output, lineterminator='\n')
+            writer.writerow(['cluster', 'material', 'size', 'keep', 'envelope_cm', 'spread_cm', 'ids'])
+            for number, cluster in enumerate(report['clusters'], start=1):
+                writer.writerow([
+                    number, cluster['material'], cluster['size'], cluster['keep'] or '',
+                    'x'.join(f'{value:g}' for value in cluster['envelope']),
+                    'x'.join(f'{value:g}' for value in cluster['spread']),
+                    ' '.join(map(str, cluster['ids'])),
+                ])
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output.getvalue())
+        else:
+            self.stdout.write(output.getvalue(), ending='')
+
+        self.stderr.write(
+            f"{len(report['clusters'])} clusters, {report['redundant_boxes']} redundant of "
+            f"{report['boxes']} box designs ({elapsed:.1f}s)"
+        )
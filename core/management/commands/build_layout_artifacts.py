@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core.layout_artifacts import ARTIFACT_MODELS, build
+
+
+class Command(BaseCommand):
+    """
+    Build missing or outdated layout artifacts, e.g. after rows were
+    bulk-loaded without signals.
+    """
+    help = "Build layout SVGs, thumbnails and board costs for designs and box designs that need them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('resources', nargs='*',
+                            help=f"Resources to build (default: all of {', '.join(ARTIFACT_MODELS)}).")
+
+    def handle(self, *args, **options):
+        unknown = [name for name in options['resources'] if name not in ARTIFACT_MODELS]
+        if unknown:
+            raise CommandError(f"Unknown resource(s): {', '.join(unknown)}.")
+        start = time.perf_counter()
+        for name in options['resources'] or ARTIFACT_MODELS:
+            model = ARTIFACT_MODELS[name]
+            counts = dict.fromkeys(('ready', 'failed', 'pending', 'skipped'), 0)
+            for pk in model.objects.values_list('pk', flat=True).iterator(chunk_size=1000):
+                artifact = build(model, pk)
+                counts[artifact.status if artifact is not None else 'skipped'] += 1
+            self.stdout.write(f"{name}: {counts['ready']} ready, {counts['failed']} failed, "
+                              f"{counts['skipped']} without dimensions")
+        self.stdout.write(f"Built layout artifacts in {time.perf_counter() - start:.1f}s")
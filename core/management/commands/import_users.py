@@ -0,0 +1,40 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core.user_import import default_hash_workers, import_users, read_csv
+
+
+class Command(BaseCommand):
+    """
+    Provision users in bulk from a CSV or JSON file.
+    """
+    help = "Create users from a CSV (username,email,password[,role,first_name,last_name]) or JSON list."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a header row, or a .json file holding a list of users.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Password hashing processes (default: settings.USER_IMPORT_HASH_WORKERS or CPU count).")
+        parser.add_argument('--skip-invalid', action='store_true', help="Create the valid rows even if others fail.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as f:
+                content = f.read()
+            rows = json.loads(content) if options['path'].endswith('.json') else read_csv(content)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+        if not isinstance(rows, list):
+            raise CommandError("Expected a list of users.")
+
+        start = time.perf_counter()
+        result = import_users(rows, skip_invalid=options['skip_invalid'], dry_run=options['dry_run'],
+                              workers=options['workers'] or default_hash_workers())
+        elapsed = time.perf_counter() - start
+        for error in result.errors:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        if result.errors and not result.created and not options['skip_invalid']:
+            raise CommandError(f"{len(result.errors)} invalid row(s); no users created.")
+        verb = "Validated" if options['dry_run'] else "Created"
+        count = len(rows) - len(result.errors) if options['dry_run'] else len(result.created)
+        self.stdout.write(f"{verb} {count} users in {elapsed:.1f}s")
@@ -0,0 +1,21 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.change_feed import prune
+
+
+class Command(BaseCommand):
+    """
+    Drop change feed entries older than the retention period.
+    """
+    help = "Delete change feed entries (including tombstones) older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'CHANGE_FEED_RETENTION_DAYS', 30),
+                            help="Retention in days (default: settings.CHANGE_FEED_RETENTION_DAYS).")
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError("--days must be at least 1.")
+        deleted = prune(timedelta(days=options['days']))
+        self.stdout.write(f"Deleted {deleted} change feed entries older than {options['days']} days")
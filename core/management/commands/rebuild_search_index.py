@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core.search import SEARCH_MODELS, rebuild_index
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the full-text search entries, e.g. after rows were bulk-loaded
+    without signals.
+    """
+    help = "Recreate the full-text search index for designs, CDRs and box designs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('types', nargs='*',
+                            help=f"Types to rebuild (default: all of {', '.join(SEARCH_MODELS)}).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per batch (default: 1000).")
+
+    def handle(self, *args, **options):
+        unknown = [name for name in options['types'] if name not in SEARCH_MODELS]
+        if unknown:
+            raise CommandError(f"Unknown search type(s): {', '.join(unknown)}.")
+        start = time.perf_counter()
+        counts = rebuild_index(options['types'] or None, options['batch_size'])
+        for name, count in counts.items():
+            self.stdout.write(f"Indexed {count} {name} rows")
+        self.stdout.write(f"Rebuilt search index in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,38 @@
+import logging
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Clear shared emails so the core_user_email_unique constraint can be added.
+    """
+    help = ("For each email used by several users, keep it on the oldest account and clear it on the others "
+            "(blank emails are exempt from the constraint).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="List the changes without saving them.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects
+        duplicates = (users.exclude(email='').values('email')
+                      .annotate(count=Count('id')).filter(count__gt=1).values_list('email', flat=True))
+        cleared = 0
+        with transaction.atomic():
+            for email in list(duplicates):
+                keep, *others = users.filter(email=email).order_by('id').values_list('id', 'username')
+                self.stdout.write(f"{email!r} kept by #{keep[0]} ({keep[1]}); "
+                                  + ', '.join(f'#{pk} ({username})' for pk, username in others)
+                                  + (" would be cleared" if options['dry_run'] else " cleared"))
+                if not options['dry_run']:
+                    users.filter(id__in=[pk for pk, _ in others]).update(email='')
+                    for pk, username in others:
+                        logger.warning("Cleared duplicate email %r on user #%s (%s); #%s keeps it",
+                                       email, pk, username, keep[0])
+                cleared += len(others)
+        verb = "Would clear" if options['dry_run'] else "Cleared"
+        self.stdout.write(f"{verb} {cleared} duplicate emails")
@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from core.benchmarks import compare_to_baseline, run_benchmarks
+
+
+class Command(BaseCommand):
+    """
+    Run the performance benchmarks in core.benchmarks against a throwaway test
+    database seeded at each requested size, and compare with a JSON baseline.
+    """
+    help = "Benchmark layout generation, list views and report rendering against a seeded test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, action='append',
+                            help="Rows to seed per table; repeat for several sizes (default: 1000 and 100000).")
+        parser.add_argument('--only', action='append',
+                            help="Only run benchmarks whose name starts with this prefix (repeatable).")
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'benchmark_baseline.json'),
+                            help="Path of the JSON baseline file.")
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help="Allowed relative p50 latency growth before failing (default: 0.25).")
+        parser.add_argument('--p99-threshold', type=float, default=None,
+                            help="Allowed relative p99 latency growth (default: twice --threshold).")
+        parser.add_argument('--update-baseline', action='store_true',
+                            help="Write the results as the new baseline instead of comparing.")
+
+    def handle(self, *args, **options):
+        row_counts = options['rows'] or [1000, 100000]
+        verbosity = options['verbosity']
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=verbosity, interactive=False)
+        results = {}
+        try:
+            for rows in row_counts:
+                self.stdout.write(f"Seeding {rows} rows...")
+                # Each size runs in a transaction that is rolled back afterwards
+                with transaction.atomic():
+                    results[str(rows)] = run_benchmarks(rows, only=options['only'])
+                    transaction.set_rollback(True)
+                for name, stats in results[str(rows)].items():
+                    self.stdout.write(
+                        f"  {name:<28} {stats['throughput']:>10.1f}/s  p50 {stats['p50_ms']:>9.3f}ms  "
+                        f"p99 {stats['p99_ms']:>9.3f}ms  {stats['queries']:g} queries"
+                    )
+        finally:
+            teardown_databases(old_config, verbosity=verbosity)
+            teardown_test_environment()
+
+        baseline_path = Path(options['baseline'])
+        if options['update_baseline'] or not baseline_path.exists():
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        regressions = compare_to_baseline(results, baseline, options['threshold'], options['p99_threshold'])
+        if regressions:
+            raise CommandError("Performance regressions detected:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
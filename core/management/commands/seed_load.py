@@ -0,0 +1,73 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core.models import User
+from core.seeding import DEFAULT_BATCH_SIZE, Seeder, parse_weights
+
+
+class Command(BaseCommand):
+    """
+    Seed production-scale synthetic data across the core and tynor_box_system apps.
+    """
+    help = "Generate synthetic users, designs, CDRs and box designs with bulk_create for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help="Users to create (default: 1000).")
+        parser.add_argument('--designs', type=int, default=100000, help="core.Design rows (default: 100000).")
+        parser.add_argument('--cdrs', type=int, default=200000, help="core.CDR rows (default: 200000).")
+        parser.add_argument('--box-designs', type=int, default=100000, help="core.BoxDesign rows (default: 100000).")
+        parser.add_argument('--tynor-designs', type=int, default=0, help="tynor_box_system.Design rows (default: 0).")
+        parser.add_argument('--tynor-cdrs', type=int, default=0, help="tynor_box_system.CDR rows (default: 0).")
+        parser.add_argument('--roles', default='Designer=70,Reviewer=20,Admin=10',
+                            help="Role distribution as NAME=WEIGHT pairs.")
+        parser.add_argument('--statuses', default='Pending=60,Approved=35,Rejected=5',
+                            help="Approval status distribution; values a model does not support are skipped.")
+        parser.add_argument('--materials', default='Cardboard=70,Plastic=20,Metal=10',
+                            help="Material distribution as NAME=WEIGHT pairs.")
+        parser.add_argument('--min-dimension', type=float, default=5, help="Smallest dimension in cm (default: 5).")
+        parser.add_argument('--max-dimension', type=float, default=120, help="Largest dimension in cm (default: 120).")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f"Rows per bulk_create batch (default: {DEFAULT_BATCH_SIZE}).")
+        parser.add_argument('--seed', type=int, default=None, help="Random seed for reproducible data.")
+        parser.add_argument('--prefix', default='load', help="Username prefix for generated users (default: load).")
+
+    def handle(self, *args, **options):
+        if options['min_dimension'] <= 0 or options['min_dimension'] > options['max_dimension']:
+            raise CommandError("Dimensions must satisfy 0 < --min-dimension <= --max-dimension.")
+        try:
+            seeder = Seeder(
+                roles=parse_weights(options['roles']),
+                statuses=parse_weights(options['statuses']),
+                materials=parse_weights(options['materials']),
+                dimension_range=(options['min_dimension'], options['max_dimension']),
+                batch_size=options['batch_size'],
+                seed=options['seed'],
+                prefix=options['prefix'],
+            )
+
+            user_ids = self._timed("users", lambda: seeder.users(options['users']))
+            if not user_ids:
+                user_ids = list(User.objects.values_list('id', flat=True))
+            if not user_ids:
+                raise CommandError("No users to own the generated rows; pass --users.")
+
+            design_ids = self._timed("designs", lambda: seeder.designs(options['designs'], user_ids))
+            if options['cdrs'] and design_ids:
+                self._timed("CDRs", lambda: seeder.cdrs(options['cdrs'], design_ids, user_ids))
+            self._timed("box designs", lambda: seeder.box_designs(options['box_designs'], user_ids))
+
+            tynor_design_ids = self._timed(
+                "tynor designs", lambda: seeder.tynor_designs(options['tynor_designs'], user_ids)
+            )
+            if options['tynor_cdrs'] and tynor_design_ids:
+                self._timed("tynor CDRs", lambda: seeder.tynor_cdrs(options['tynor_cdrs'], tynor_design_ids, user_ids))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def _timed(self, label, func):
+        start = time.perf_counter()
+        ids = func()
+        elapsed = time.perf_counter() - start
+        if ids:
+            rate = len(ids) / elapsed if elapsed else 0
+            self.stdout.write(f"Created {len(ids)} {label} in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+        return ids
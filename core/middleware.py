@@ -0,0 +1,189 @@
+import cProfile
+import random
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import Resolver404, resolve
+from .db_routers import STICKY_COOKIE, RoutingState, current_routing, routing
+from .instrumentation import RequestRecorder, metrics, recording
+from .slowlog import SlowQueryLogger, threshold_ms
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class HybridMiddleware:
+    """
+    Base for middleware that wraps the whole request and optionally installs a
+    database execute wrapper on every configured database, so queries routed
+    to the replica are seen too. Works under both WSGI and ASGI, so async views
+    are not pushed into a thread. Subclasses implement any of ``wrap(request)``
+    (a context manager entered around the view),
+    ``query_wrapper(state, connection)`` and ``finish(request, response, state)``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self.wrap(request) as state, ExitStack() as installed:
+            for connection in connections.all():
+                wrapper = self.query_wrapper(state, connection)
+                if wrapper:
+                    installed.enter_context(connection.execute_wrapper(wrapper))
+            response = self.get_response(request)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        with self.wrap(request) as state:
+            # The async ORM runs queries on the request's sync thread, which has
+            # its own connections, so the wrappers are installed there
+            installed = await sync_to_async(self._install_query_wrappers)(state)
+            try:
+                response = await self.get_response(request)
+            finally:
+                if installed:
+                    await sync_to_async(self._remove_query_wrappers)(installed)
+        return self.finish(request, response, state)
+
+    def _install_query_wrappers(self, state):
+        installed = []
+        for connection in connections.all():
+            wrapper = self.query_wrapper(state, connection)
+            if wrapper:
+                connection.execute_wrappers.append(wrapper)
+                installed.append((connection, wrapper))
+        return installed
+
+    def _remove_query_wrappers(self, installed):
+        for connection, wrapper in installed:
+            connection.execute_wrappers.remove(wrapper)
+
+    def wrap(self, request):
+        return nullcontext()
+
+    def query_wrapper(self, state, connection):
+        return None
+
+    def finish(self, request, response, state):
+        return response
+
+
+class InstrumentationMiddleware(HybridMiddleware):
+    """
+    Opt-in request instrumentation (settings.INSTRUMENTATION_ENABLED).
+
+    Records per-phase timings and query counts for every request, adds them as a
+    Server-Timing header, feeds the Prometheus metrics registry and writes
+    sampled cProfile dumps for the URL names listed in
+    settings.INSTRUMENTATION_PROFILE_SAMPLE_RATES.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', False):
+            raise MiddlewareNotUsed("Request instrumentation is disabled.")
+        super().__init__(get_response)
+        self.sample_rates = getattr(settings, 'INSTRUMENTATION_PROFILE_SAMPLE_RATES', {})
+        self.profile_dir = Path(getattr(settings, 'INSTRUMENTATION_PROFILE_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+    @contextmanager
+    def wrap(self, request):
+        view_name = self.view_name(request)
+        recorder = RequestRecorder()
+        profiler = None
+        if random.random() < self.sample_rates.get(view_name, 0):
+            profiler = cProfile.Profile()
+
+        with recording(recorder):
+            if profiler is not None:
+                profiler.enable()
+            try:
+                yield view_name, recorder, profiler
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+
+    def query_wrapper(self, state, connection):
+        return state[1].query_wrapper
+
+    def finish(self, request, response, state):
+        view_name, recorder, profiler = state
+        total = time.perf_counter() - recorder.started
+        response['Server-Timing'] = recorder.server_timing(total)
+        metrics.observe_request(view_name, request.method, response.status_code, recorder, total)
+        if profiler is not None:
+            self.dump_profile(profiler, view_name)
+        return response
+
+    @staticmethod
+    def view_name(request):
+        """
+        URL name used to label metrics; unresolved paths share one label.
+        """
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return 'unresolved'
+        return match.url_name or match.view_name or 'unnamed'
+
+    def dump_profile(self, profiler, view_name):
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.profile_dir / f"{view_name}-{time.time_ns()}.prof")
+
+
+class SlowQueryMiddleware(HybridMiddleware):
+    """
+    Log queries slower than SLOW_OPERATION_THRESHOLDS_MS['query'] to the
+    structured slow-operation log (core.slowlog).
+    """
+    def __init__(self, get_response):
+        if threshold_ms('query') is None:
+            raise MiddlewareNotUsed("Slow query logging is disabled.")
+        super().__init__(get_response)
+
+    def query_wrapper(self, state, connection):
+        return SlowQueryLogger(connection)
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Send reads of safe (GET/HEAD) requests to views marked ``use_replica`` to
+    the read replica (core.db_routers). A successful write sets a short-lived
+    cookie that keeps the client on the primary for REPLICA_STICKY_SECONDS, so
+    it reads its own writes despite replication lag.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'REPLICA_DATABASE_ALIAS', None):
+            raise MiddlewareNotUsed("No read replica is configured.")
+        super().__init__(get_response)
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+    def wrap(self, request):
+        return routing(RoutingState())
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        if request.method in SAFE_METHODS and getattr(view, 'use_replica', False) and not self.is_sticky(request):
+            current_routing().use_replica = True
+
+    def is_sticky(self, request):
+        try:
+            return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def finish(self, request, response, state):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                STICKY_COOKIE, f'{time.time() + self.sticky_seconds:.0f}',
+                max_age=self.sticky_seconds, httponly=True, samesite='Lax',
+            )
+        return response
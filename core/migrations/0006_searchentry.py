@@ -0,0 +1,88 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Search type -> (model, indexed field); mirrors core.search.SEARCH_MODELS
+SEARCHABLE = (('Design', 'name'), ('CDR', 'specifications'), ('BoxDesign', 'text'))
+
+POSTGRESQL_FORWARD = [
+    "ALTER TABLE core_searchentry ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', document)) STORED",
+    "CREATE INDEX core_searchentry_vector_gin ON core_searchentry USING GIN (search_vector)",
+]
+POSTGRESQL_REVERSE = [
+    "DROP INDEX IF EXISTS core_searchentry_vector_gin",
+    "ALTER TABLE core_searchentry DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE core_searchentry_fts USING fts5("
+    "document, content='core_searchentry', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER core_searchentry_fts_insert AFTER INSERT ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(rowid, document) VALUES (new.id, new.document); END",
+    "CREATE TRIGGER core_searchentry_fts_delete AFTER DELETE ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, document) VALUES ('delete', old.id, old.document); END",
+    "CREATE TRIGGER core_searchentry_fts_update AFTER UPDATE ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, document) VALUES ('delete', old.id, old.document); "
+    "INSERT INTO core_searchentry_fts(rowid, document) VALUES (new.id, new.document); END",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS core_searchentry_fts_update",
+    "DROP TRIGGER IF EXISTS core_searchentry_fts_delete",
+    "DROP TRIGGER IF EXISTS core_searchentry_fts_insert",
+    "DROP TABLE IF EXISTS core_searchentry_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+
+
+def create_text_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD})
+
+
+def drop_text_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRESQL_REVERSE, 'sqlite': SQLITE_REVERSE})
+
+
+def index_existing_rows(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    SearchEntry = apps.get_model('core', 'SearchEntry')
+    alias = schema_editor.connection.alias
+    for model_name, field in SEARCHABLE:
+        model = apps.get_model('core', model_name)
+        content_type, _ = ContentType.objects.using(alias).get_or_create(app_label='core', model=model_name.lower())
+        SearchEntry.objects.using(alias).bulk_create(
+            (SearchEntry(content_type=content_type, object_id=pk, document=text or '')
+             for pk, text in model.objects.using(alias).values_list('pk', field).iterator(chunk_size=1000)),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0005_design_depth_design_height_design_material_type_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('document', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='core_searchentry_object')],
+            },
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+        migrations.RunPython(index_existing_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:32
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """
+    Registration only checked emails with a racy exists() and the admin not at
+    all, so existing users may share one. Stop before adding the constraint
+    and list them rather than picking which account loses its email; see
+    ``manage.py resolve_duplicate_emails``.
+    """
+    User = apps.get_model('core', 'User')
+    users = User.objects.using(schema_editor.connection.alias)
+    duplicates = (users.exclude(email='').values('email')
+                  .annotate(count=Count('id')).filter(count__gt=1).values_list('email', flat=True))
+    conflicts = [
+        f"  {email!r}: " + ', '.join(f'#{pk} ({username})' for pk, username in
+                                     users.filter(email=email).order_by('id').values_list('id', 'username'))
+        for email in duplicates
+    ]
+    if conflicts:
+        raise RuntimeError(
+            "Users share an email address, so core_user_email_unique cannot be added. Resolve them by hand or "
+            "with `manage.py resolve_duplicate_emails` and migrate again:\n" + '\n'.join(conflicts)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0007_changelogentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(condition=models.Q(('email', ''), _negated=True), fields=('email',), name='core_user_email_unique'),
+        ),
+    ]
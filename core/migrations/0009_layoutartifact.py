@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0008_user_email_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayoutArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('source_key', models.CharField(blank=True, max_length=40)),
+                ('svg_path', models.CharField(blank=True, max_length=255)),
+                ('thumbnail_path', models.CharField(blank=True, max_length=255)),
+                ('blank_area_cm2', models.FloatField(blank=True, null=True)),
+                ('board_area_cm2', models.FloatField(blank=True, null=True)),
+                ('cost', models.FloatField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='core_layoutartifact_object')],
+            },
+        ),
+    ]
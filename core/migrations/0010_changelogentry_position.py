@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-19 12:07
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def sequence_existing_entries(apps, schema_editor):
+    # Existing entries have all committed; keeping their ids as positions
+    # keeps the cursors consumers already hold valid
+    ChangeLogEntry = apps.get_model('core', 'ChangeLogEntry')
+    ChangeLogEntry.objects.using(schema_editor.connection.alias).update(position=F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_layoutartifact'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='changelogentry',
+            name='core_changelog_resource_id',
+        ),
+        migrations.AddField(
+            model_name='changelogentry',
+            name='position',
+            field=models.PositiveBigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(sequence_existing_entries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['resource', 'position'], name='core_changelog_resource_pos'),
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(condition=models.Q(('position__isnull', True)), fields=['id'], name='core_changelog_unsequenced'),
+        ),
+    ]
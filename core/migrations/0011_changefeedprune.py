@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-19 12:21
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def record_earlier_prunes(apps, schema_editor):
+    # Entries before the oldest one left may have been pruned already
+    ChangeLogEntry = apps.get_model('core', 'ChangeLogEntry')
+    ChangeFeedPrune = apps.get_model('core', 'ChangeFeedPrune')
+    alias = schema_editor.connection.alias
+    oldest = ChangeLogEntry.objects.using(alias).aggregate(position=Min('position'))['position']
+    if oldest and oldest > 1:
+        ChangeFeedPrune.objects.using(alias).create(position=oldest - 1, deleted=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_changelogentry_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeFeedPrune',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveBigIntegerField(db_index=True)),
+                ('deleted', models.PositiveIntegerField()),
+                ('pruned_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(record_earlier_prunes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_changefeedprune'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cdr',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from .json_search import JSONSearchColumns
 
 # Custom User Model
 class User(AbstractUser):
@@ -14,14 +16,21 @@ class User(AbstractUser):
     )
     role = models.CharField(max_length=50, choices=ROLE_CHOICES, default='Designer')
 
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # Backs the set-based email check of bulk imports (core.user_import)
+            models.UniqueConstraint(fields=['email'], condition=~models.Q(email=''), name='core_user_email_unique'),
+        ]
+
     def __str__(self):
         return self.username
 
 
 # Core Design Model
-class Design(models.Model):
+class Design(JSONSearchColumns):
     """
     Model for managing core designs.
+    Hot dimension/material keys are copied to indexed columns (core.json_search).
     """
     user = models.ForeignKey(
         get_user_model(),
@@ -92,6 +101,7 @@ class CDR(models.Model):
         default='Pending'
     )
     generated_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Changes the CDR report ETag (core.etags)
 
     def __str__(self):
         return f"CDR for {self.design.name} by {self.generated_by.username}"
@@ -118,3 +128,99 @@ class BoxDesign(models.Model):
 
     def __str__(self):
         return f"Box Design: {self.text} ({self.width}x{self.height}x{self.depth})"
+
+
+# Full-text Search Index
+class SearchEntry(models.Model):
+    """
+    Searchable text of one design, CDR or box design (see core.search).
+    PostgreSQL adds a generated tsvector column and SQLite an FTS5 table over
+    ``document``; both are created by migration, outside the model.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    document = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='core_searchentry_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type.model} #{self.object_id}"
+
+
+# Change Feed
+class ChangeLogEntry(models.Model):
+    """
+    One change to a design, CDR or box design, for incremental sync (see
+    core.change_feed). The position, assigned once the entry has committed, is
+    the feed cursor; deletes are kept as tombstones.
+    """
+    ACTION_CHOICES = (
+        ('upsert', 'Upsert'),
+        ('delete', 'Delete'),
+    )
+    resource = models.CharField(max_length=20)
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+    position = models.PositiveBigIntegerField(null=True, blank=True, unique=True)
+
+    class Meta:
+        indexes = [
+            # Per-resource feeds: WHERE resource = %s AND position > %s ORDER BY position
+            models.Index(fields=['resource', 'position'], name='core_changelog_resource_pos'),
+            models.Index(fields=['changed_at'], name='core_changelog_changed_at'),
+            # Entries waiting for a position
+            models.Index(fields=['id'], condition=models.Q(position__isnull=True), name='core_changelog_unsequenced'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.resource} #{self.object_id}"
+
+
+class ChangeFeedPrune(models.Model):
+    """
+    One run of change_feed.prune(): entries up to ``position`` may be gone, so
+    cursors before it can no longer be continued.
+    """
+    position = models.PositiveBigIntegerField(db_index=True)
+    deleted = models.PositiveIntegerField()
+    pruned_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Pruned to {self.position}"
+
+
+# Precomputed Layout Artifacts
+class LayoutArtifact(models.Model):
+    """
+    Layout SVG, thumbnail and board cost of one design or box design, built in
+    the background after it is saved (see core.layout_artifacts).
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    source_key = models.CharField(max_length=40, blank=True)  # Hash of the inputs the artifacts were built from
+    svg_path = models.CharField(max_length=255, blank=True)
+    thumbnail_path = models.CharField(max_length=255, blank=True)
+    blank_area_cm2 = models.FloatField(null=True, blank=True)  # Board sheet the layout is cut from
+    board_area_cm2 = models.FloatField(null=True, blank=True)  # Sum of the panel areas
+    cost = models.FloatField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='core_layoutartifact_object'),
+        ]
+
+    def __str__(self):
+        return f"Layout artifacts for {self.content_type.model} #{self.object_id} ({self.status})"
@@ -0,0 +1,63 @@
+"""
+JSON renderer backed by orjson, when it is installed.
+
+Output is byte-for-byte what DRF's JSONRenderer produces for compact, UTF-8,
+strict JSON: types orjson would format differently (datetimes, decimals,
+dataclasses) go through DRF's encoder, \\u2028/\\u2029 are escaped the same way,
+and anything orjson can't match exactly (indentation, exponent floats,
+non-string keys) is rendered by JSONRenderer itself. orjson writes NaN and
+infinities as null; output containing null is checked for them and handed to
+JSONRenderer, which rejects them as strict JSON does.
+"""
+import math
+import re
+from decimal import Decimal
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional; JSONRenderer is used instead
+    orjson = None
+
+# Python writes 1e+16 / 1e-05 where orjson writes 1e16 / 1e-5
+_EXPONENT = re.compile(rb'[0-9]e[-+]?[0-9]', re.IGNORECASE)
+
+
+def _has_non_finite(data):
+    """
+    Whether ``data`` contains a NaN or infinite float or Decimal.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, Decimal):
+            if not value.is_finite():
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for JSONRenderer (see module docstring).
+    """
+    if orjson is not None:
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact or not self.strict
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except (TypeError, ValueError):
+            return super().render(data, accepted_media_type, renderer_context)
+        if _EXPONENT.search(ret) or (b'null' in ret and _has_non_finite(data)):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,225 @@
+"""
+Full-text search over design names, CDR specifications and box design text.
+
+Each searchable object has one SearchEntry row holding its text, kept current
+by signals (``connect_signals()``, called from CoreConfig.ready) and by
+``index_instances()`` for bulk inserts that bypass them. The migration adds a
+vendor-specific index over ``SearchEntry.document``:
+
+- PostgreSQL: a generated ``search_vector`` tsvector column with a GIN index,
+  queried with ``to_tsquery`` and ranked with ``ts_rank``.
+- SQLite: an FTS5 table (``core_searchentry_fts``) kept in sync by triggers,
+  queried with MATCH and ranked by bm25.
+
+Other backends fall back to ``icontains`` on the entries, which is slow but
+returns the same objects.
+"""
+import re
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, router, transaction
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from .models import BoxDesign, CDR, Design, SearchEntry
+
+# Search type -> (model, indexed field)
+SEARCH_MODELS = {
+    'design': (Design, 'name'),
+    'cdr': (CDR, 'specifications'),
+    'box_design': (BoxDesign, 'text'),
+}
+
+FTS_TABLE = 'core_searchentry_fts'
+TEXT_SEARCH_CONFIG = 'english'
+
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 500
+
+# Words in a query; everything else (quotes, operators) is ignored
+TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def search_type(model):
+    """
+    The search type name for ``model`` (or an instance), or None if it isn't indexed.
+    """
+    for name, (indexed_model, _) in SEARCH_MODELS.items():
+        if model._meta.concrete_model is indexed_model:
+            return name
+    return None
+
+
+def document_for(instance):
+    _, field = SEARCH_MODELS[search_type(instance)]
+    return getattr(instance, field) or ''
+
+
+def terms(query):
+    return TERM_PATTERN.findall(query or '')
+
+
+def index_instance(instance):
+    """
+    Create or refresh the search entry of one object.
+    """
+    SearchEntry.objects.update_or_create(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        defaults={'document': document_for(instance)},
+    )
+
+
+def index_instances(instances, batch_size=1000):
+    """
+    Add search entries for newly bulk-created objects of one model.
+    """
+    instances = [instance for instance in instances if instance.pk is not None]
+    if not instances:
+        return 0
+    content_type = ContentType.objects.get_for_model(instances[0])
+    SearchEntry.objects.bulk_create(
+        (SearchEntry(content_type=content_type, object_id=instance.pk, document=document_for(instance))
+         for instance in instances),
+        batch_size=batch_size,
+    )
+    return len(instances)
+
+
+def rebuild_index(types=None, batch_size=1000):
+    """
+    Recreate the search entries of the given types (default: all). Returns the
+    number of entries written per type.
+    """
+    counts = {}
+    for name in types or SEARCH_MODELS:
+        model, field = SEARCH_MODELS[name]
+        with transaction.atomic():
+            SearchEntry.objects.filter(content_type=ContentType.objects.get_for_model(model)).delete()
+            batch = []
+            counts[name] = 0
+            for instance in model.objects.only('pk', field).iterator(chunk_size=batch_size):
+                batch.append(instance)
+                if len(batch) == batch_size:
+                    counts[name] += index_instances(batch, batch_size)
+                    batch = []
+            counts[name] += index_instances(batch, batch_size)
+    return counts
+
+
+def _saved(sender, instance, update_fields=None, **kwargs):
+    _, field = SEARCH_MODELS[search_type(sender)]
+    if kwargs.get('raw') or (update_fields is not None and field not in update_fields):
+        return
+    index_instance(instance)
+
+
+def _deleted(sender, instance, **kwargs):
+    SearchEntry.objects.filter(
+        content_type=ContentType.objects.get_for_model(sender), object_id=instance.pk
+    ).delete()
+
+
+def connect_signals():
+    for model, _ in SEARCH_MODELS.values():
+        post_save.connect(_saved, sender=model, dispatch_uid=f'core.search.saved.{model._meta.label}')
+        post_delete.connect(_deleted, sender=model, dispatch_uid=f'core.search.deleted.{model._meta.label}')
+
+
+def _content_type_ids(types):
+    return [ContentType.objects.get_for_model(SEARCH_MODELS[name][0]).pk for name in types]
+
+
+def _ranked_ids(alias, words, content_type_ids, limit):
+    """
+    Ids of the best matching entries, best first, using the backend's index.
+    """
+    connection = connections[alias]
+    placeholders = ', '.join(['%s'] * len(content_type_ids))
+    if connection.vendor == 'postgresql':
+        sql = (
+            f'SELECT id FROM core_searchentry '
+            f'WHERE content_type_id IN ({placeholders}) AND search_vector @@ to_tsquery(%s, %s) '
+            f'ORDER BY ts_rank(search_vector, to_tsquery(%s, %s)) DESC, id LIMIT %s'
+        )
+        tsquery = ' & '.join(f'{word}:*' for word in words)
+        params = [*content_type_ids, TEXT_SEARCH_CONFIG, tsquery, TEXT_SEARCH_CONFIG, tsquery, limit]
+    elif connection.vendor == 'sqlite':
+        sql = (
+            f'SELECT e.id FROM {FTS_TABLE} JOIN core_searchentry e ON e.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s AND e.content_type_id IN ({placeholders}) '
+            f'ORDER BY {FTS_TABLE}.rank, e.id LIMIT %s'
+        )
+        params = [' '.join(f'"{word}"*' for word in words), *content_type_ids, limit]
+    else:
+        entries = SearchEntry.objects.using(alias).filter(content_type_id__in=content_type_ids)
+        for word in words:
+            entries = entries.filter(document__icontains=word)
+        return list(entries.order_by('id').values_list('id', flat=True)[:limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search(query, types=None, limit=DEFAULT_SEARCH_LIMIT):
+    """
+    Search entries matching every word of ``query`` (as a prefix), best first.
+    Raises ValueError for an unknown type.
+    """
+    types = list(types or SEARCH_MODELS)
+    unknown = [name for name in types if name not in SEARCH_MODELS]
+    if unknown:
+        raise ValueError(f"Unknown search type(s): {', '.join(unknown)}. "
+                         f"Available types: {', '.join(SEARCH_MODELS)}")
+    words = terms(query)
+    if not words:
+        return []
+
+    alias = router.db_for_read(SearchEntry)
+    ids = _ranked_ids(alias, words, _content_type_ids(types), max(1, min(limit, MAX_SEARCH_LIMIT)))
+    entries = SearchEntry.objects.using(alias).select_related('content_type').in_bulk(ids)
+    return [entries[pk] for pk in ids if pk in entries]
+
+
+def search_ids(model, query, limit=MAX_SEARCH_LIMIT):
+    """
+    Primary keys of ``model`` objects matching ``query``, best first.
+    """
+    return [entry.object_id for entry in search(query, [search_type(model)], limit)]
+
+
+def matching_ids(model, query):
+    """
+    Unranked, unlimited queryset of the primary keys of ``model`` objects
+    matching ``query``, for use as a subquery (``pk__in=matching_ids(...)``).
+    """
+    alias = router.db_for_read(SearchEntry)
+    connection = connections[alias]
+    words = terms(query)
+    entries = SearchEntry.objects.using(alias).filter(
+        content_type_id__in=_content_type_ids([search_type(model)]),
+    )
+    if not words:
+        return entries.none().values('object_id')
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{word}:*' for word in words)
+        entries = entries.filter(id__in=RawSQL(
+            'SELECT id FROM core_searchentry WHERE search_vector @@ to_tsquery(%s, %s)',
+            (TEXT_SEARCH_CONFIG, tsquery),
+        ))
+    elif connection.vendor == 'sqlite':
+        entries = entries.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (' '.join(f'"{word}"*' for word in words),),
+        ))
+    else:
+        for word in words:
+            entries = entries.filter(document__icontains=word)
+    return entries.values('object_id')
+
+
+def as_result(entry):
+    return {
+        'type': search_type(entry.content_type.model_class()),
+        'id': entry.object_id,
+        'text': entry.document,
+    }
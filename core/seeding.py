@@ -0,0 +1,209 @@
+"""
+Synthetic data generation for load testing and benchmarks.
+
+Rows are built in batches with weighted random choices and inserted with
+bulk_create, so millions of rows can be seeded in minutes. Foreign keys are
+assigned through *_id attributes from id lists, without loading model
+instances. Signals and custom save() logic do not run for bulk inserts.
+"""
+import random
+import re
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models.functions import Length
+from tynor_box_system.models import Design as TynorDesign, CDR as TynorCDR
+from .models import User, Design, CDR, BoxDesign
+from .json_search import JSONSearchColumns
+from .search import index_instances, search_type
+from .change_feed import record_changes, resource_name
+
+DEFAULT_BATCH_SIZE = 5000
+MATERIALS = ['Cardboard', 'Plastic', 'Metal']
+COLORS = ['Brown', 'White', 'Blue', 'Black', 'Kraft']
+
+
+def parse_weights(value):
+    """
+    Parse "Designer=70,Reviewer=20,Admin=10" into {'Designer': 70.0, ...}.
+    """
+    weights = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition('=')
+        try:
+            weights[name.strip()] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight in '{item}'. Use NAME=WEIGHT pairs.")
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError(f"No positive weights in '{value}'.")
+    return weights
+
+
+def weights_for_field(model, field_name, weights):
+    """
+    Restrict weights to a field's choices (matched case-insensitively), returning
+    them keyed by the stored choice value.
+    """
+    choices = {str(value).lower(): value for value, _ in model._meta.get_field(field_name).choices}
+    matched = {choices[name.lower()]: weight for name, weight in weights.items() if name.lower() in choices}
+    if not matched:
+        raise ValueError(f"None of {sorted(weights)} are valid choices for {model.__name__}.{field_name}.")
+    return matched
+
+
+class Seeder:
+    """
+    Batched row generator. Distributions are given as {value: weight} dicts and
+    dimensions are drawn uniformly from ``dimension_range``.
+    """
+    def __init__(self, roles=None, statuses=None, materials=None, dimension_range=(5, 120),
+                 batch_size=DEFAULT_BATCH_SIZE, seed=None, prefix='load'):
+        self.rng = random.Random(seed)
+        self.roles = roles or {'Designer': 70, 'Reviewer': 20, 'Admin': 10}
+        self.statuses = statuses or {'Pending': 60, 'Approved': 35, 'Rejected': 5}
+        self.materials = materials or {'Cardboard': 70, 'Plastic': 20, 'Metal': 10}
+        self.dimension_range = dimension_range
+        self.batch_size = batch_size
+        self.prefix = prefix
+
+    def _pick(self, weights, count):
+        return self.rng.choices(list(weights), weights=list(weights.values()), k=count)
+
+    def _dimension(self):
+        low, high = self.dimension_range
+        return round(self.rng.uniform(low, high), 1)
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def _insert(self, model, total, build):
+        """
+        Build and insert ``total`` rows in batches; ``build(start, count)`` returns
+        the model instances for one batch. Returns the ids of the new rows.
+        """
+        ids = []
+        for start, count in self._batches(total):
+            instances = build(start, count)
+            if issubclass(model, JSONSearchColumns):
+                # bulk_create bypasses save(), which fills the search columns
+                for instance in instances:
+                    instance.sync_search_columns()
+            with transaction.atomic():
+                created = model.objects.bulk_create(instances, batch_size=self.batch_size)
+                if search_type(model):
+                    # bulk_create sends no post_save signals
+                    index_instances(created, self.batch_size)
+                if resource_name(model):
+                    record_changes(model, [obj.pk for obj in created])
+            ids.extend(obj.pk for obj in created)
+        return ids
+
+    def _next_user_number(self):
+        """
+        One past the highest numbered ``<prefix><n>`` username, so new names don't
+        collide with earlier runs even after some seeded users were deleted.
+        """
+        # Without leading zeros the longest, then greatest, name has the highest number
+        latest = (User.objects.filter(username__regex=rf'^{re.escape(self.prefix)}(0|[1-9][0-9]*)$')
+                  .order_by(Length('username').desc(), '-username').values_list('username', flat=True).first())
+        return int(latest[len(self.prefix):]) + 1 if latest else 0
+
+    def users(self, total, password='loadtest'):
+        # One hash shared by every seeded user; hashing per row would dominate the run
+        password_hash = make_password(password)
+        offset = self._next_user_number()
+
+        def build(start, count):
+            roles = self._pick(self.roles, count)
+            return [
+                User(username=f'{self.prefix}{offset + start + i}', email=f'{self.prefix}{offset + start + i}@example.com',
+                     password=password_hash, role=roles[i])
+                for i in range(count)
+            ]
+        return self._insert(User, total, build)
+
+    def designs(self, total, user_ids):
+        statuses = weights_for_field(Design, 'status', self.statuses)
+
+        def build(start, count):
+            owners = self.rng.choices(user_ids, k=count)
+            picked_statuses = self._pick(statuses, count)
+            materials = self._pick(self.materials, count)
+            return [
+                Design(
+                    user_id=owners[i], name=f'Design {start + i}', version=self.rng.randint(1, 5),
+                    dimensions={'width': self._dimension(), 'height': self._dimension(), 'depth': self._dimension()},
+                    material_specs={'type': materials[i], 'color': self.rng.choice(COLORS)},
+                    status=picked_statuses[i],
+                )
+                for i in range(count)
+            ]
+        return self._insert(Design, total, build)
+
+    def cdrs(self, total, design_ids, user_ids):
+        statuses = weights_for_field(CDR, 'approval_status', self.statuses)
+
+        def build(start, count):
+            designs = self.rng.choices(design_ids, k=count)
+            authors = self.rng.choices(user_ids, k=count)
+            picked_statuses = self._pick(statuses, count)
+            return [
+                CDR(design_id=designs[i], generated_by_id=authors[i],
+                    specifications=f'Specification {start + i}: {self.rng.choice(COLORS)} print, {self._dimension()} cm panel',
+                    approval_status=picked_statuses[i])
+                for i in range(count)
+            ]
+        return self._insert(CDR, total, build)
+
+    def box_designs(self, total, user_ids):
+        statuses = weights_for_field(BoxDesign, 'approval_status', self.statuses)
+        materials = weights_for_field(BoxDesign, 'material', self.materials)
+
+        def build(start, count):
+            owners = self.rng.choices(user_ids, k=count)
+            picked_statuses = self._pick(statuses, count)
+            picked_materials = self._pick(materials, count)
+            return [
+                BoxDesign(
+                    user_id=owners[i], width=self._dimension(), height=self._dimension(), depth=self._dimension(),
+                    material=picked_materials[i], text=f'Box {start + i}', logo='logos/placeholder.png',
+                    approval_status=picked_statuses[i],
+                )
+                for i in range(count)
+            ]
+        return self._insert(BoxDesign, total, build)
+
+    def tynor_designs(self, total, user_ids):
+        statuses = weights_for_field(TynorDesign, 'approval_status', self.statuses)
+
+        def build(start, count):
+            owners = self.rng.choices(user_ids, k=count)
+            picked_statuses = self._pick(statuses, count)
+            materials = self._pick(self.materials, count)
+            return [
+                TynorDesign(
+                    user_id=owners[i], name=f'Tynor Design {start + i}', version=str(self.rng.randint(1, 5)),
+                    dimensions={'width': self._dimension(), 'height': self._dimension(), 'depth': self._dimension()},
+                    material_specs={'type': materials[i], 'color': self.rng.choice(COLORS)},
+                    approval_status=picked_statuses[i],
+                )
+                for i in range(count)
+            ]
+        return self._insert(TynorDesign, total, build)
+
+    def tynor_cdrs(self, total, design_ids, user_ids):
+        statuses = weights_for_field(TynorCDR, 'approval_status', self.statuses)
+
+        def build(start, count):
+            designs = self.rng.choices(design_ids, k=count)
+            authors = self.rng.choices(user_ids, k=count)
+            picked_statuses = self._pick(statuses, count)
+            return [
+                TynorCDR(design_id=designs[i], generated_by_id=authors[i],
+                         specifications={'material': self.rng.choice(MATERIALS), 'panel_cm': self._dimension()},
+                         approval_status=picked_statuses[i])
+                for i in range(count)
+            ]
+        return self._insert(TynorCDR, total, build)
@@ -1,9 +1,66 @@
+from functools import lru_cache
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .json_search import SEARCH_COLUMNS
 from .models import User, Design, CDR, BoxDesign
 
+
+@lru_cache(maxsize=None)
+def readable_fields(serializer_class):
+    """
+    Output field name -> source attribute of a serializer class.
+    """
+    return {name: field.source for name, field in serializer_class().fields.items() if not field.write_only}
+
+
+# Sparse fieldsets (?fields=) shared by the list endpoints
+class SparseFieldsMixin:
+    """
+    ``?fields=id,name,status`` projection. Pass ``fields`` to drop the other
+    fields from the output, and narrow the query with ``project()`` so the
+    dropped columns are never selected.
+    """
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        """
+        Field names requested with ?fields=, or None for all fields. Raises
+        ValueError for unknown names.
+        """
+        raw = getattr(request, 'query_params', request.GET).get('fields', '')
+        names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        if not names:
+            return None
+        unknown = [name for name in names if name not in readable_fields(cls)]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. "
+                             f"Available fields: {', '.join(readable_fields(cls))}")
+        return names
+
+    @classmethod
+    def project(cls, queryset, fields):
+        """
+        Restrict ``queryset`` to the columns behind ``fields``. Fields that aren't
+        plain model columns (nested sources, methods) leave the query unchanged.
+        """
+        if fields is None:
+            return queryset
+        concrete = {field.name for field in queryset.model._meta.concrete_fields}
+        columns = {queryset.model._meta.pk.name}
+        for name in fields:
+            source = readable_fields(cls)[name]
+            if source not in concrete:
+                return queryset
+            columns.add(source)
+        return queryset.only(*columns)
+
 # Serializer for User model
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the User model
     """
@@ -33,7 +90,7 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 # Serializer for Design model
-class DesignSerializer(serializers.ModelSerializer):
+class DesignSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Design model
     """
@@ -41,11 +98,11 @@ class DesignSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Design
-        fields = '__all__'  # Includes all fields from the Design model
+        exclude = SEARCH_COLUMNS  # All model fields except the denormalised search columns
 
 
 # Serializer for CDR model
-class CDRSerializer(serializers.ModelSerializer):
+class CDRSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the CDR model
     """
@@ -92,7 +149,7 @@ class CDRSerializer(serializers.ModelSerializer):
 
 
 # Serializer for BoxDesign model
-class BoxDesignSerializer(serializers.ModelSerializer):
+class BoxDesignSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the BoxDesign model with all fields mapped.
     """
@@ -107,11 +164,11 @@ class BoxDesignSerializer(serializers.ModelSerializer):
         Validate box design fields for logical correctness.
         """
         # Validate width, height, and depth are greater than 0
-        if data.get('width') and data['width'] <= 0:
+        if data.get('width') is not None and data['width'] <= 0:
             raise serializers.ValidationError("Width must be greater than 0.")
-        if data.get('height') and data['height'] <= 0:
+        if data.get('height') is not None and data['height'] <= 0:
             raise serializers.ValidationError("Height must be greater than 0.")
-        if data.get('depth') and data['depth'] <= 0:
+        if data.get('depth') is not None and data['depth'] <= 0:
             raise serializers.ValidationError("Depth must be greater than 0.")
         
         # Optionally validate the logo (e.g., check if it's a valid image)
@@ -0,0 +1,122 @@
+"""
+Structured slow-operation log.
+
+Queries, serializer passes and renders that exceed the thresholds in
+settings.SLOW_OPERATION_THRESHOLDS_MS are logged to the ``core.slow`` logger as
+JSON records. Query records carry the SQL (and optionally an EXPLAIN snippet
+and the parameter types, never their values); render and serializer records
+carry the context passed to ``phase()``, such as dimensions, style or row
+counts.
+"""
+import json
+import logging
+import time
+from django.conf import settings
+
+logger = logging.getLogger('core.slow')
+
+# Longest SQL / EXPLAIN text kept in a record
+SNIPPET_LENGTH = 2000
+
+
+def threshold_ms(kind):
+    """
+    Configured threshold for an operation kind (a phase name or 'query'), or None.
+    """
+    return getattr(settings, 'SLOW_OPERATION_THRESHOLDS_MS', {}).get(kind)
+
+
+def report(kind, elapsed, **context):
+    """
+    Log an operation of the given kind if it took longer than its threshold.
+    """
+    limit = threshold_ms(kind)
+    if limit is None or elapsed * 1000 < limit:
+        return False
+    logger.warning(
+        "slow %s", kind,
+        extra={'slow_operation': {
+            'kind': kind,
+            'duration_ms': round(elapsed * 1000, 2),
+            'threshold_ms': limit,
+            **context,
+        }},
+    )
+    return True
+
+
+def param_summary(params, many=False):
+    """
+    Count and type names of a query's parameters. The values themselves are
+    never logged: they include password hashes, emails and session data.
+    """
+    if many:
+        return {'executemany': True}
+    params = list(params.values()) if isinstance(params, dict) else list(params or [])
+    return {'count': len(params), 'types': [type(param).__name__ for param in params[:50]]}
+
+
+class SlowQueryLogger:
+    """
+    connection.execute_wrapper hook that logs queries slower than the 'query'
+    threshold, with an EXPLAIN snippet when settings.SLOW_QUERY_EXPLAIN is on
+    and the parameter count and types when settings.SLOW_QUERY_LOG_PARAM_TYPES
+    is on. Parameter values are not logged.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self._explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            limit = threshold_ms('query')
+            if not self._explaining and limit is not None and elapsed * 1000 >= limit:
+                details = {
+                    'sql': sql[:SNIPPET_LENGTH],
+                    'database': self.connection.alias,
+                }
+                if getattr(settings, 'SLOW_QUERY_LOG_PARAM_TYPES', False):
+                    details['params'] = param_summary(params, many)
+                if getattr(settings, 'SLOW_QUERY_EXPLAIN', False) and not many:
+                    details['explain'] = self.explain(sql, params)
+                report('query', elapsed, **details)
+
+    def explain(self, sql, params):
+        """
+        Return the query plan for a slow SELECT, truncated to SNIPPET_LENGTH.
+        """
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return None
+        prefix = 'EXPLAIN QUERY PLAN ' if self.connection.vendor == 'sqlite' else 'EXPLAIN '
+        self._explaining = True
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+        except Exception as e:
+            plan = f"EXPLAIN failed: {e}"
+        finally:
+            self._explaining = False
+        return plan[:SNIPPET_LENGTH]
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format log records as one JSON object per line, merging any
+    ``slow_operation`` details into the record.
+    """
+    def format(self, record):
+        payload = {
+            'timestamp': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        payload.update(getattr(record, 'slow_operation', {}))
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
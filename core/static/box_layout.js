@@ -1,21 +1,222 @@
-document.getElementById('box-dimensions-form').addEventListener('submit', function(event) {
-    event.preventDefault();
-    const length = document.getElementById('length').value;
-    const breadth = document.getElementById('breadth').value;
-    const height = document.getElementById('height').value;
-
-    fetch('/generate-box-layout', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ length, breadth, height })
-    })
-    .then(response => response.blob())
-    .then(blob => {
+// Box layout preview drawn in the browser from compact panel geometry.
+//
+// The server returns {style, size: [w, h], rects: [x, y, w, h, ...], fills, labels}
+// from /api/box_layout_geometry/ (a few hundred bytes, cached by the layout
+// engine), and this script turns it into SVG. Changing a dimension only fetches
+// new geometry; the downloadable SVG is serialised from the preview.
+//
+// When the page is served over ASGI, updates go over one WebSocket instead
+// (core.live_preview): the form state is sent at most once per animation frame
+// and the server answers with geometry diffs. Without the socket, the preview
+// falls back to fetching geometry.
+const BoxLayout = (function () {
+    const SVG_NS = 'http://www.w3.org/2000/svg';
+    const GEOMETRY_URL = '/api/box_layout_geometry/';
+    const LIVE_PREVIEW_PATH = '/ws/box_layout/';
+
+    // Geometry already fetched, by "L:B:H:style"
+    const cache = new Map();
+    let pending = null;
+
+    function fetchGeometry(length, breadth, height, style) {
+        const key = [length, breadth, height, style].join(':');
+        // Only the latest request matters while dimensions are being typed,
+        // so a slower earlier response can't draw over a newer preview
+        if (pending) {
+            pending.abort();
+            pending = null;
+        }
+        if (cache.has(key)) {
+            return Promise.resolve(cache.get(key));
+        }
+        pending = new AbortController();
+        const query = new URLSearchParams({ L: length, B: breadth, H: height, style });
+        return fetch(GEOMETRY_URL + '?' + query, { signal: pending.signal })
+            .then(response => response.json().then(body => {
+                if (!response.ok) {
+                    throw new Error(body.error || response.statusText);
+                }
+                cache.set(key, body);
+                return body;
+            }));
+    }
+
+    function element(name, attributes) {
+        const node = document.createElementNS(SVG_NS, name);
+        for (const [attribute, value] of Object.entries(attributes)) {
+            node.setAttribute(attribute, value);
+        }
+        return node;
+    }
+
+    // Draw geometry into an <svg> element, scaled to fit its width
+    function render(svg, geometry, options = {}) {
+        const padding = options.padding ?? 10;
+        const fontSize = options.fontSize ?? 12;
+        const [width, height] = geometry.size;
+        const scale = options.scale ?? ((svg.clientWidth || 600) - 2 * padding) / width;
+        const fragment = document.createDocumentFragment();
+        const rects = geometry.rects;
+
+        svg.setAttribute('viewBox', `0 0 ${width * scale + 2 * padding} ${height * scale + 2 * padding}`);
+        for (let i = 0; i < rects.length; i += 4) {
+            fragment.appendChild(element('rect', {
+                x: rects[i] * scale + padding,
+                y: rects[i + 1] * scale + padding,
+                width: rects[i + 2] * scale,
+                height: rects[i + 3] * scale,
+                fill: geometry.fills[i / 4] || 'none',
+                stroke: 'black',
+            }));
+        }
+        geometry.labels.forEach((label, index) => {
+            if (!label) {
+                return;
+            }
+            const i = index * 4;
+            const text = element('text', {
+                x: (rects[i] + rects[i + 2] / 2) * scale + padding,
+                y: (rects[i + 1] + rects[i + 3] / 2) * scale + padding,
+                'text-anchor': 'middle',
+                'font-size': fontSize,
+                fill: 'black',
+            });
+            text.textContent = label;
+            fragment.appendChild(text);
+        });
+        svg.replaceChildren(fragment);
+    }
+
+    function download(svg, filename) {
+        const source = new XMLSerializer().serializeToString(svg);
         const link = document.createElement('a');
-        link.href = URL.createObjectURL(blob);
-        link.download = 'box_layout.svg';
+        link.href = URL.createObjectURL(new Blob([source], { type: 'image/svg+xml' }));
+        link.download = filename;
         link.click();
+        setTimeout(() => URL.revokeObjectURL(link.href), 0);
+    }
+
+    // Live channel: send(update) returns false when the socket isn't open
+    function live(onGeometry, onError) {
+        const url = (location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + LIVE_PREVIEW_PATH;
+        let socket = null;
+        let geometry = null;
+        let queued = null;
+        let seq = 0;
+        let retryDelay = 1000;
+
+        function connect() {
+            socket = new WebSocket(url);
+            socket.onopen = () => { retryDelay = 1000; };
+            socket.onmessage = event => {
+                const message = JSON.parse(event.data);
+                if (message.type === 'error') {
+                    onError(message.error);
+                    return;
+                }
+                if (message.type === 'full') {
+                    geometry = message;
+                } else {
+                    const rects = geometry.rects.slice();
+                    for (let i = 0; i < message.rects.length; i += 2) {
+                        rects[message.rects[i]] = message.rects[i + 1];
+                    }
+                    geometry = { ...geometry, size: message.size, rects };
+                }
+                onGeometry(geometry);
+            };
+            socket.onclose = () => {
+                socket = null;
+                geometry = null;
+                setTimeout(connect, retryDelay);
+                retryDelay = Math.min(retryDelay * 2, 30000);
+            };
+        }
+
+        function flush() {
+            if (socket && socket.readyState === WebSocket.OPEN && queued) {
+                socket.send(JSON.stringify({ seq: ++seq, ...queued }));
+            }
+            queued = null;
+        }
+
+        function send(update) {
+            if (!socket || socket.readyState !== WebSocket.OPEN) {
+                return false;
+            }
+            if (!queued) {
+                requestAnimationFrame(flush);
+            }
+            queued = update;
+            return true;
+        }
+
+        connect();
+        return { send };
+    }
+
+    return { fetchGeometry, render, download, live };
+})();
+
+(function () {
+    const form = document.getElementById('box-dimensions-form');
+    if (!form) {
+        return;
+    }
+    const preview = document.getElementById('box-layout-preview');
+    const error = document.getElementById('box-layout-error');
+    const styleSelect = document.getElementById('style');
+    const field = id => document.getElementById(id).value;
+
+    const channel = 'WebSocket' in window ? BoxLayout.live(
+        geometry => {
+            error.textContent = '';
+            BoxLayout.render(preview, geometry);
+        },
+        message => { error.textContent = message; },
+    ) : null;
+
+    function update(event) {
+        const length = field('length');
+        const breadth = field('breadth');
+        const height = field('height');
+        if (!(length > 0 && breadth > 0 && height > 0)) {
+            return Promise.resolve(false);
+        }
+        if (event && channel && channel.send({ L: length, B: breadth, H: height, style: styleSelect.value })) {
+            return Promise.resolve(true);
+        }
+        return BoxLayout.fetchGeometry(length, breadth, height, styleSelect.value)
+            .then(geometry => {
+                error.textContent = '';
+                BoxLayout.render(preview, geometry);
+                return true;
+            })
+            .catch(e => {
+                if (e.name !== 'AbortError') {
+                    error.textContent = e.message;
+                }
+                return false;
+            });
+    }
+
+    // The style list needs a signed-in user; the default style works without it
+    fetch('/api/box_styles/')
+        .then(response => response.ok ? response.json() : [])
+        .then(styles => styles.forEach(style => {
+            if (![...styleSelect.options].some(option => option.value === style.code)) {
+                styleSelect.add(new Option(style.name, style.code));
+            }
+        }))
+        .catch(() => {});
+
+    form.addEventListener('input', update);
+    form.addEventListener('submit', function (event) {
+        event.preventDefault();
+        update().then(drawn => {
+            if (drawn) {
+                BoxLayout.download(preview, 'box_layout.svg');
+            }
+        });
     });
-});
+})();
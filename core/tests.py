@@ -1,9 +1,68 @@
 # app_name/tests/test_design.py
 
+import contextlib
+import gzip
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import global_settings
+from django.contrib.sessions.models import Session
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.db import connection, connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
-from django.contrib.auth import get_user_model
-from core.models import Design  # Replace 'app_name' with your actual app name
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth import get_user_model, user_logged_in
+from core.models import Design, CDR, BoxDesign, ChangeLogEntry  # Replace 'app_name' with your actual app name
+from core import layout_artifacts, layout_engine, load_planning
+from core.etags import make_etag, BOX_LAYOUT_VERSION
+from core.box_styles import BoxStyle, get_style, panel
+from core.compression import AVAILABLE_ENCODINGS, choose_encoding
+from core.benchmarks import compare_to_baseline
+from core.box_dedupe import consolidation_report
+from core.seeding import parse_weights, weights_for_field
+from core.instrumentation import metrics
+from core.slowlog import JSONFormatter
+from core import db_health
+from core.db_routers import STICKY_COOKIE, ReplicaRouter, current_routing, read_from_replica
+from core.middleware import ReplicaRoutingMiddleware
+from core.views import DatabaseHealthView, DesignView, GenerateBoxLayoutView
+from tynor_box_system.models import Design as TynorDesign
+
+
+@contextlib.contextmanager
+def second_database(test, alias='second'):
+    """
+    A migrated SQLite database under ``alias`` that ``test`` may use for the
+    enclosed block, for tests that need queries on a real second database (the
+    configured replica is a TEST MIRROR of the primary).
+    """
+    with tempfile.TemporaryDirectory() as directory, \
+            mock.patch.object(type(test), 'databases', {*test.databases, alias}):
+        connections.settings[alias] = connections.configure_settings({
+            'default': connections.settings['default'],
+            alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(directory, 'second.sqlite3')},
+        })[alias]
+        try:
+            call_command('migrate', database=alias, verbosity=0)
+            yield alias
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
 
 
 class DesignTests(APITestCase):
@@ -130,3 +189,1384 @@ class DesignTests(APITestCase):
         # Assert that the design was deleted
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Design.objects.count(), 0)  # Ensure the design was deleted
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='reportuser', password='password')
+        self.client.login(username='reportuser', password='password')
+        self.design = Design.objects.create(user=self.user, name='Report Design')
+        CDR.objects.create(design=self.design, generated_by=self.user, specifications='Spec A')
+        self.report_url = f'/api/cdr_report/{self.design.id}/'
+
+    def test_report_returns_etag(self):
+        response = self.client.get(self.report_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_report_matching_etag_returns_not_modified(self):
+        etag = self.client.get(self.report_url)['ETag']
+
+        response = self.client.get(self.report_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_new_cdr_changes_report_etag(self):
+        etag = self.client.get(self.report_url)['ETag']
+        CDR.objects.create(design=self.design, generated_by=self.user, specifications='Spec B')
+
+        response = self.client.get(self.report_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_edited_cdr_changes_report_etag(self):
+        etag = self.client.get(self.report_url)['ETag']
+        cdr = CDR.objects.get(design=self.design)
+        cdr.approval_status = 'Approved'
+        cdr.save()
+
+        response = self.client.get(self.report_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_layout_matching_etag_returns_not_modified(self):
+        etag = '"%s"' % make_etag('box-layout', BOX_LAYOUT_VERSION, 'cross', 10, 5, 8)
+
+        response = self.client.get('/api/generate_box_layout/?L=10&B=5&H=8', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_layout_invalid_dimensions_skip_etag(self):
+        response = self.client.get('/api/generate_box_layout/?L=0&B=5&H=8', HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BoxStyleTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='styleuser', password='password')
+        self.client.login(username='styleuser', password='password')
+
+    def test_list_box_styles(self):
+        response = self.client.get('/api/box_styles/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        codes = [style['code'] for style in response.data]
+        self.assertIn('cross', codes)
+        self.assertIn('fefco-0201', codes)
+
+    def test_style_geometry(self):
+        geometry = get_style('fefco-0201').evaluate(30, 20, 10)
+
+        # Glue flap, four body panels and top/bottom flaps on each
+        self.assertEqual(len(geometry.panels), 13)
+        self.assertEqual(geometry.height, 20 / 2 + 10 + 20 / 2)
+
+    def test_unknown_style_rejected(self):
+        response = self.client.get('/api/generate_box_layout/?L=10&B=5&H=8&style=missing')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_expression_rejected(self):
+        with self.assertRaises(ValueError):
+            BoxStyle('bad', 'Bad', [panel('__import__("os")', 0, 'l', 'h')])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class CompressedSVGTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='svguser', password='password')
+        self.client.login(username='svguser', password='password')
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding('gzip, deflate, br', AVAILABLE_ENCODINGS), 'br')
+        self.assertEqual(choose_encoding('gzip;q=1.0, br;q=0', AVAILABLE_ENCODINGS), 'gzip')
+        self.assertEqual(choose_encoding('', AVAILABLE_ENCODINGS), 'identity')
+
+    def test_layout_file_served_compressed(self):
+        response = self.client.get('/api/generate_box_layout/?L=10&B=5&H=8')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        url = response.json()['url']
+
+        plain = self.client.get(url)
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+
+    def test_generate_svg_negotiates_encoding(self):
+        data = {'length': 100, 'breadth': 50, 'height': 80}
+
+        plain = self.client.post('/api/generate_svg/', data, format='json')
+        compressed = self.client.post('/api/generate_svg/', data, format='json', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(plain['Content-Type'], 'image/svg+xml')
+        self.assertTrue(plain.content.startswith(b'<?xml'))
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+
+
+class LayoutEngineTests(SimpleTestCase):
+    def setUp(self):
+        layout_engine.clear_cache()
+
+    def test_equivalent_arguments_share_cache_entry(self):
+        first = layout_engine.render_variants(10, 5, 8)
+        second = layout_engine.render_variants('10', 5.0, 8)
+
+        self.assertIs(first, second)
+        self.assertEqual(layout_engine.cache_stats()['variants']['misses'], 1)
+
+    def test_entry_points_render_through_engine(self):
+        from core.main import create_svg
+
+        view_svg = GenerateBoxLayoutView().generate_box_data(30, 20, 15, 'tynor-rsc')
+        fastapi_svg = create_svg(30, 15, 20)
+
+        self.assertEqual(view_svg, layout_engine.render(30, 20, 15, 'tynor-rsc'))
+        self.assertEqual(fastapi_svg, layout_engine.render(30, 20, 15, 'tynor-rsc', scale=10, offset=(100, 100), font_size=15))
+
+    def test_invalid_dimensions_rejected(self):
+        for dimensions in [(0, 5, 8), (10, -1, 8), (10, 5, 'nan')]:
+            with self.assertRaises(ValueError):
+                layout_engine.render(*dimensions)
+
+    def test_warm_up_renders_every_style(self):
+        count = layout_engine.warm_up([(10, 5, 8)])
+
+        self.assertEqual(count, layout_engine.cache_stats()['variants']['size'])
+        self.assertIn('tynor_layout_cache_entries{cache="variants"}', '\n'.join(layout_engine.prometheus_lines()))
+
+
+class BenchmarkBaselineTests(SimpleTestCase):
+    def setUp(self):
+        self.baseline = {'1000': {'api.design_list': {'p50_ms': 10.0, 'p99_ms': 20.0, 'queries': 1}}}
+
+    def test_within_threshold_passes(self):
+        results = {'1000': {'api.design_list': {'p50_ms': 11.0, 'p99_ms': 25.0, 'queries': 1}}}
+
+        self.assertEqual(compare_to_baseline(results, self.baseline, threshold=0.25), [])
+
+    def test_latency_and_query_regressions_fail(self):
+        results = {'1000': {'api.design_list': {'p50_ms': 15.0, 'p99_ms': 20.0, 'queries': 3}}}
+
+        regressions = compare_to_baseline(results, self.baseline, threshold=0.25)
+
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('p50', regressions[0])
+        self.assertIn('queries', regressions[1])
+
+
+class SeedLoadTests(TestCase):
+    def test_seed_load_command_creates_rows(self):
+        call_command('seed_load', users=5, designs=20, cdrs=30, box_designs=10, tynor_designs=4, tynor_cdrs=6,
+                     batch_size=7, seed=1, statuses='Approved=1', stdout=StringIO())
+
+        self.assertEqual(get_user_model().objects.filter(username__startswith='load').count(), 5)
+        self.assertEqual(Design.objects.count(), 20)
+        self.assertEqual(CDR.objects.count(), 30)
+        self.assertEqual(BoxDesign.objects.count(), 10)
+        self.assertEqual(TynorDesign.objects.count(), 4)
+        self.assertFalse(Design.objects.exclude(status='Approved').exists())
+        self.assertFalse(TynorDesign.objects.exclude(approval_status='approved').exists())
+
+    def test_reseeding_after_deletes_continues_numbering(self):
+        from core.seeding import Seeder
+        User = get_user_model()
+        Seeder(seed=1).users(12)
+        User.objects.filter(username__in=['load0', 'load3']).delete()
+        User.objects.create_user(username='load007', password='x')
+
+        Seeder(seed=1).users(2)
+
+        self.assertEqual(User.objects.filter(username__in=['load12', 'load13']).count(), 2)
+
+    def test_weights_restricted_to_field_choices(self):
+        weights = weights_for_field(Design, 'status', parse_weights('pending=3,Approved=1,Rejected=1'))
+
+        self.assertEqual(weights, {'Pending': 3.0, 'Approved': 1.0})
+
+    def test_invalid_weights_rejected(self):
+        with self.assertRaises(ValueError):
+            parse_weights('Designer=lots')
+
+
+@override_settings(INSTRUMENTATION_ENABLED=True)
+class InstrumentationTests(APITestCase):
+    def setUp(self):
+        metrics.reset()
+        self.user = get_user_model().objects.create_user(username='metricsuser', password='password')
+        self.client.login(username='metricsuser', password='password')
+        self.design = Design.objects.create(user=self.user, name='Metrics Design')
+        CDR.objects.create(design=self.design, generated_by=self.user, specifications='Spec A')
+
+    def test_server_timing_reports_phases(self):
+        response = self.client.get(f'/api/cdr_report/{self.design.id}/')
+
+        self.assertIn('reportlab;dur=', response['Server-Timing'])
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+    def test_metrics_endpoint_exposes_request_counts(self):
+        self.client.get(f'/api/cdr_report/{self.design.id}/')
+
+        with self.settings(HEALTH_CHECK_TOKEN='monitor'):
+            response = self.client.get('/api/metrics/', HTTP_X_HEALTH_TOKEN='monitor')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn('tynor_requests_total{view="cdr_report",method="GET",status="200"} 1', body)
+        self.assertIn('tynor_phase_seconds_total{view="cdr_report",phase="reportlab"}', body)
+
+    @override_settings(HEALTH_CHECK_TOKEN='monitor')
+    def test_metrics_need_staff_or_token(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+        anonymous = self.client_class()
+        self.assertEqual(anonymous.get('/api/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(anonymous.get('/api/metrics/', HTTP_X_HEALTH_TOKEN='guess').status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_200_OK)
+
+    def test_sampled_profile_dump(self):
+        profile_dir = tempfile.mkdtemp()
+        with self.settings(INSTRUMENTATION_PROFILE_SAMPLE_RATES={'cdr_report': 1.0},
+                           INSTRUMENTATION_PROFILE_DIR=profile_dir):
+            self.client_class().get(f'/api/cdr_report/{self.design.id}/')
+
+        self.assertTrue(any(name.startswith('cdr_report-') for name in os.listdir(profile_dir)))
+
+    @override_settings(INSTRUMENTATION_ENABLED=False)
+    def test_disabled_by_default(self):
+        response = self.client.get('/api/box_styles/')
+
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SlowOperationLogTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='slowuser', password='password')
+        self.client.login(username='slowuser', password='password')
+        # Cached layouts are not re-rendered, so start from an empty engine cache
+        layout_engine.clear_cache()
+
+    @override_settings(SLOW_OPERATION_THRESHOLDS_MS={'render': 0})
+    def test_slow_render_logged_with_dimensions(self):
+        with self.assertLogs('core.slow', level='WARNING') as logs:
+            GenerateBoxLayoutView().generate_box_data(10, 5, 8)
+
+        details = logs.records[0].slow_operation
+        self.assertEqual(details['kind'], 'render')
+        self.assertEqual((details['length'], details['breadth'], details['height']), (10, 5, 8))
+
+    @override_settings(SLOW_OPERATION_THRESHOLDS_MS={'query': 0}, SLOW_QUERY_EXPLAIN=True)
+    def test_slow_query_logged_with_sql_and_explain(self):
+        with self.assertLogs('core.slow', level='WARNING') as logs:
+            self.client.get('/api/designs/')
+
+        queries = [record.slow_operation for record in logs.records if record.slow_operation['kind'] == 'query']
+        design_query = next(q for q in queries if 'core_design' in q['sql'])
+        self.assertTrue(design_query['explain'])
+        self.assertNotIn('params', design_query)
+
+    @override_settings(SLOW_OPERATION_THRESHOLDS_MS={'query': 0}, SLOW_QUERY_LOG_PARAM_TYPES=True)
+    def test_slow_query_params_logged_without_values(self):
+        with self.assertLogs('core.slow', level='WARNING') as logs:
+            self.client.post('/api/designs/', {'name': 'Secret design', 'dimensions': {'width': 10}}, format='json')
+
+        insert = next(record.slow_operation for record in logs.records
+                      if record.slow_operation['kind'] == 'query' and 'INSERT' in record.slow_operation['sql'])
+        self.assertIn('str', insert['params']['types'])
+        self.assertNotIn('Secret design', json.dumps(insert))
+
+    @override_settings(SLOW_OPERATION_THRESHOLDS_MS={'query': 0}, REPLICA_DATABASE_ALIAS='second')
+    def test_slow_query_on_replica_logged(self):
+        with second_database(self), self.assertLogs('core.slow', level='WARNING') as logs:
+            self.client_class().get('/api/designs/', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+        databases = {record.slow_operation['database'] for record in logs.records
+                     if record.slow_operation['kind'] == 'query' and 'core_design' in record.slow_operation['sql']}
+        self.assertEqual(databases, {'second'})
+
+    def test_json_formatter(self):
+        record = logging.LogRecord('core.slow', logging.WARNING, __file__, 1, 'slow %s', ('render',), None)
+        record.slow_operation = {'kind': 'render', 'duration_ms': 12.5}
+
+        payload = json.loads(JSONFormatter().format(record))
+
+        self.assertEqual(payload['message'], 'slow render')
+        self.assertEqual(payload['duration_ms'], 12.5)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='asyncuser', password='password')
+        Design.objects.create(user=self.user, name='Sync Design', dimensions={'width': 10})
+
+    async def test_design_list_matches_sync_view(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get('/api/async/designs/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sync_response = await sync_to_async(self.sync_get)('/api/designs/')
+        self.assertEqual(response.content, sync_response.content)
+
+    def sync_get(self, url):
+        self.client.force_login(self.user)
+        return self.client.get(url)
+
+    async def test_create_design(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.post(
+            '/api/async/designs/', {'name': 'Async Design', 'dimensions': {'width': 5}}, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        design = await Design.objects.aget(name='Async Design')
+        self.assertEqual(design.user_id, self.user.id)
+
+    def sync_post(self, url, data):
+        self.client.force_login(self.user)
+        return self.client.post(url, data, content_type='application/json')
+
+    async def test_create_matches_sync_view(self):
+        await self.async_client.aforce_login(self.user)
+        design = await Design.objects.aget(name='Sync Design')
+        volatile = {'id', 'created_at', 'updated_at', 'generated_at'}
+        payloads = {
+            'designs': {'name': 'Posted', 'dimensions': {'width': 5}},
+            'cdrs': {'design': design.pk, 'generated_by': self.user.pk, 'specifications': 'Spec'},
+            'box_designs': {'width': 3, 'height': 2, 'depth': 1, 'material': 'Metal', 'text': 'Posted'},
+        }
+        for resource, payload in payloads.items():
+            with self.subTest(resource):
+                response = await self.async_client.post(f'/api/async/{resource}/', payload,
+                                                        content_type='application/json')
+                sync_response = await sync_to_async(self.sync_post)(f'/api/{resource}/', payload)
+
+                self.assertEqual((response.status_code, response['Content-Type']),
+                                 (sync_response.status_code, sync_response['Content-Type']))
+                body, sync_body = response.json(), sync_response.json()
+                self.assertEqual(list(body), list(sync_body))
+                for key in volatile & body.keys():
+                    body[key] = sync_body[key]
+                self.assertEqual(json.dumps(body), json.dumps(sync_body))
+        self.assertEqual(await BoxDesign.objects.filter(user=self.user).acount(), 2)
+
+    async def test_create_design_with_jwt(self):
+        token = str(AccessToken.for_user(self.user))
+
+        response = await self.async_client.post(
+            '/api/async/designs/', {'name': 'JWT Design'}, content_type='application/json',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    async def test_unauthenticated_rejected(self):
+        response = await self.async_client.get('/api/async/designs/')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_generate_box_layout(self):
+        response = await self.async_client.get('/api/async/generate_box_layout/', {'L': 10, 'B': 5, 'H': 8})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        layout = await self.async_client.get(response.json()['url'], headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(layout['Content-Encoding'], 'gzip')
+        self.assertIn(b'<svg', gzip.decompress(layout.content))
+
+    @override_settings(INSTRUMENTATION_ENABLED=True)
+    async def test_instrumentation_counts_async_queries(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get('/api/async/designs/')
+
+        self.assertNotIn('"0 queries"', response['Server-Timing'])
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+
+
+@override_settings(REPLICA_DATABASE_ALIAS='replica', REPLICA_STICKY_SECONDS=10)
+@mock.patch('core.db_routers.replica_alias', return_value='replica')
+class ReplicaRoutingTests(SimpleTestCase):
+    def route(self, request, view):
+        seen = {}
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            seen['use_replica'] = current_routing().use_replica
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(request)
+        return seen['use_replica'], response
+
+    def test_router_reads_replica_only_inside_replica_block(self, replica_alias):
+        router = ReplicaRouter()
+
+        self.assertIsNone(router.db_for_read(Design))
+        with read_from_replica():
+            self.assertEqual(router.db_for_read(Design), 'replica')
+            # Authentication data always comes from the primary
+            self.assertEqual(router.db_for_read(get_user_model()), 'default')
+            self.assertEqual(router.db_for_read(Session), 'default')
+            self.assertEqual(router.db_for_write(Design), 'default')
+
+    def test_safe_request_to_marked_view_uses_replica(self, replica_alias):
+        use_replica, _ = self.route(RequestFactory().get('/api/designs/'), DesignView.as_view())
+
+        self.assertTrue(use_replica)
+
+    def test_unmarked_view_uses_primary(self, replica_alias):
+        use_replica, _ = self.route(RequestFactory().get('/api/generate_box_layout/'), GenerateBoxLayoutView.as_view())
+
+        self.assertFalse(use_replica)
+
+    def test_write_sets_sticky_primary_cookie(self, replica_alias):
+        use_replica, response = self.route(RequestFactory().post('/api/designs/'), DesignView.as_view())
+
+        self.assertFalse(use_replica)
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 10)
+
+        request = RequestFactory().get('/api/designs/')
+        request.COOKIES[STICKY_COOKIE] = response.cookies[STICKY_COOKIE].value
+        use_replica, _ = self.route(request, DesignView.as_view())
+        self.assertFalse(use_replica)
+
+    def test_expired_sticky_cookie_ignored(self, replica_alias):
+        request = RequestFactory().get('/api/designs/')
+        request.COOKIES[STICKY_COOKIE] = str(int(time.time()) - 1)
+
+        use_replica, _ = self.route(request, DesignView.as_view())
+
+        self.assertTrue(use_replica)
+
+    @override_settings(REPLICA_DATABASE_ALIAS=None)
+    def test_disabled_without_replica(self, replica_alias):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaRoutingMiddleware(lambda request: HttpResponse())
+
+
+@override_settings(REPLICA_DATABASE_ALIAS='second', REPLICA_STICKY_SECONDS=10)
+class ReplicaDatabaseTests(APITestCase):
+    def test_reads_use_replica_until_client_writes(self):
+        user = get_user_model().objects.create_user(username='replicated', password='pw')
+        Design.objects.create(user=user, name='On primary')
+        with second_database(self) as replica:
+            get_user_model().objects.using(replica).create(pk=user.pk, username='replicated')
+            Design.objects.using(replica).create(user_id=user.pk, name='On replica')
+            client = self.client_class()
+            client.force_authenticate(user=user)
+
+            self.assertEqual([d['name'] for d in client.get('/api/designs/').json()], ['On replica'])
+
+            response = client.post('/api/designs/', {'name': 'Written', 'dimensions': {'width': 10}}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.content)
+            self.assertIn(STICKY_COOKIE, client.cookies)
+            self.assertEqual(sorted(d['name'] for d in client.get('/api/designs/').json()), ['On primary', 'Written'])
+
+            del client.cookies[STICKY_COOKIE]
+            self.assertEqual([d['name'] for d in client.get('/api/designs/').json()], ['On replica'])
+
+
+class DatabaseHealthTests(TestCase):
+    databases = '__all__'
+
+    def test_health_endpoint_reports_each_database(self):
+        response = self.client.get('/api/health/db/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        default = next(db for db in response.json()['databases'] if db['alias'] == 'default')
+        self.assertEqual(default, {'alias': 'default', 'ok': True})
+
+        request = RequestFactory().get('/api/health/db/')
+        request.user = mock.Mock(is_authenticated=True, is_staff=True)
+        databases = json.loads(DatabaseHealthView.as_view()(request).content)['databases']
+        self.assertEqual(next(db for db in databases if db['alias'] == 'default')['mode'], 'per-request')
+
+    @override_settings(HEALTH_CHECK_TOKEN='monitor-token')
+    def test_driver_errors_are_logged_not_returned(self):
+        with mock.patch('django.db.backends.utils.CursorWrapper.execute',
+                        side_effect=Exception('connection to server at "db.internal" (10.0.0.5), port 5432 failed')), \
+                self.assertLogs('core.db_health', level='ERROR'):
+            response = self.client.get('/api/health/db/', headers={'X-Health-Token': 'monitor-token'})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('latency_ms', response.json()['databases'][0])
+        self.assertNotIn('db.internal', response.content.decode())
+
+    def test_failed_check_returns_unavailable(self):
+        with mock.patch('core.views.check_databases', return_value=[{'alias': 'default', 'ok': False}]):
+            response = self.client.get('/api/health/db/')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_pool_saturation_exported(self):
+        stats = {'pool_max': 4, 'pool_size': 4, 'pool_available': 1, 'requests_waiting': 2, 'requests_num': 9}
+        with mock.patch('core.db_health.pool_stats', side_effect=lambda alias: stats if alias == 'default' else None):
+            health = db_health.check_database('default')
+            body = metrics.render_prometheus()
+
+        self.assertEqual(health['pool'], {'max': 4, 'size': 4, 'in_use': 3, 'waiting': 2, 'saturation': 0.75})
+        self.assertIn('tynor_db_pool_waiting_requests{database="default"} 2', body)
+        self.assertIn('tynor_db_pool_requests_total{database="default"} 9', body)
+
+
+class JSONSearchTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='searcher', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.small = Design.objects.create(user=self.user, name='Small', version=1,
+                                           dimensions={'width': 10, 'height': 5, 'depth': 5},
+                                           material_specs={'type': 'Cardboard', 'color': 'Red', 'ply': 3})
+        self.large = Design.objects.create(user=self.user, name='Large', version=1,
+                                           dimensions={'width': '40.5', 'height': 30, 'depth': 20},
+                                           material_specs={'type': 'Plastic', 'color': 'Red'})
+
+    def search(self, **params):
+        response = self.client.get('/api/designs/search/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return [design['name'] for design in response.json()]
+
+    def test_save_syncs_search_columns(self):
+        self.assertEqual((self.large.width, self.large.material_type), (40.5, 'Plastic'))
+
+        self.small.dimensions = {'width': 12}
+        self.small.save(update_fields=['dimensions'])
+        self.small.refresh_from_db()
+        self.assertEqual((self.small.width, self.small.height), (12.0, None))
+
+    def test_range_and_material_filters(self):
+        self.assertEqual(self.search(min_width=20), ['Large'])
+        self.assertEqual(self.search(material='Cardboard', max_depth=10), ['Small'])
+        self.assertEqual(self.search(material='Metal'), [])
+
+    def test_json_key_filters(self):
+        self.assertEqual(self.search(**{'spec.color': 'Red'}), ['Small', 'Large'])
+        self.assertEqual(self.search(**{'spec.ply': '3'}), ['Small'])
+
+    def test_search_columns_hidden_from_output(self):
+        response = self.client.get('/api/designs/search/')
+
+        self.assertNotIn('width', response.json()[0])
+
+    def test_invalid_parameters_rejected(self):
+        for params in ({'min_width': 'wide'}, {'spec.a__b': '1'}, {'limit': 'all'}):
+            response = self.client.get('/api/designs/search/', params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_tynor_design_search(self):
+        TynorDesign.objects.create(user=self.user, name='Tynor', version='1', approval_status='approved',
+                                   dimensions={'width': 25}, material_specs={'type': 'Metal'})
+
+        response = self.client.get('/api/tynor_designs/search/', {'material': 'Metal', 'min_width': 20})
+        self.assertEqual([design['name'] for design in response.json()], ['Tynor'])
+
+
+class FullTextSearchTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='reader', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.design = Design.objects.create(user=self.user, name='Corrugated shipping carton')
+        self.cdr = CDR.objects.create(design=self.design, generated_by=self.user,
+                                      specifications='Red flexo print on kraft cartons')
+        self.box = BoxDesign.objects.create(user=self.user, width=10, height=10, depth=10, material='Cardboard',
+                                            text='Fragile glassware', logo='logos/placeholder.png')
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return [(result['type'], result['id']) for result in response.json()]
+
+    def test_matches_words_and_prefixes_across_types(self):
+        self.assertEqual(set(self.search(q='carton')), {('design', self.design.pk), ('cdr', self.cdr.pk)})
+        self.assertEqual(self.search(q='glass'), [('box_design', self.box.pk)])
+        self.assertEqual(self.search(q='carton', type='cdr'), [('cdr', self.cdr.pk)])
+        self.assertEqual(self.search(q='red carton glassware'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.box.text = 'Stackable crates'
+        self.box.save()
+        self.assertEqual(self.search(q='glassware'), [])
+        self.assertEqual(self.search(q='crates'), [('box_design', self.box.pk)])
+
+        self.design.delete()
+        self.assertEqual(self.search(q='carton'), [])
+
+    def test_rebuild_command_indexes_bulk_created_rows(self):
+        BoxDesign.objects.bulk_create([
+            BoxDesign(user=self.user, width=5, height=5, depth=5, material='Metal', text='Tool chest',
+                      logo='logos/placeholder.png'),
+        ])
+        self.assertEqual(self.search(q='chest'), [])
+
+        call_command('rebuild_search_index', 'box_design', stdout=StringIO())
+        self.assertEqual(len(self.search(q='chest')), 1)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.search(q='"*:'), [])
+        response = self.client.get('/api/search/', {'q': 'carton', 'type': 'user'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_admin_search_uses_index(self):
+        admin_user = get_user_model().objects.create_superuser(username='root', password='password123')
+        self.client.force_login(admin_user)
+
+        response = self.client.get('/admin/core/design/', {'q': 'corrugated'})
+
+        self.assertContains(response, 'Corrugated shipping carton')
+        self.assertContains(response, '1 design')
+
+    def test_admin_search_is_not_capped_and_matches_related_names(self):
+        admin_user = get_user_model().objects.create_superuser(username='root', password='password123')
+        self.client.force_login(admin_user)
+        with mock.patch('core.search.MAX_SEARCH_LIMIT', 1):
+            Design.objects.create(user=self.user, name='Corrugated tray')
+
+            response = self.client.get('/admin/core/design/', {'q': 'corrugated'})
+            self.assertContains(response, '2 designs')
+
+        response = self.client.get('/admin/core/cdr/', {'q': 'shipping'})
+        self.assertContains(response, '1 cdr')
+        response = self.client.get('/admin/core/cdr/', {'q': 'rea'})  # Substring of the username
+        self.assertContains(response, '1 cdr')
+
+
+class AdminChangeListTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(username='root', password='password123')
+        self.client.force_login(self.admin)
+        for i in range(3):
+            design = Design.objects.create(user=self.admin, name=f'Design {i}', dimensions={'width': i})
+            CDR.objects.create(design=design, generated_by=self.admin, specifications=f'Spec {i}')
+
+    def test_changelist_query_count_is_constant(self):
+        # Session, user, count and one joined page query; no per-row lookups
+        with self.assertNumQueries(4):
+            response = self.client.get('/admin/core/cdr/')
+
+        self.assertContains(response, 'Design 2 (v1)')
+        self.assertContains(response, '3 cdrs')
+
+    def test_changelist_defers_large_columns(self):
+        response = self.client.get('/admin/core/design/')
+
+        designs = list(response.context['cl'].result_list)
+        self.assertEqual(designs[0].get_deferred_fields(), {'dimensions', 'material_specs'})
+
+    def test_estimated_count_used_for_large_tables(self):
+        with mock.patch('core.admin_mixins.estimated_count', return_value=2500000):
+            response = self.client.get('/admin/core/design/')
+
+        self.assertEqual(response.context['cl'].result_count, 2500000)
+        self.assertContains(response, '2500000 designs')
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='sparse', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.design = Design.objects.create(user=self.user, name='Sparse', dimensions={'width': 10},
+                                            material_specs={'type': 'Cardboard'})
+
+    def test_fields_limit_output_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/designs/', {'fields': 'id,name,status'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), [{'id': self.design.pk, 'name': 'Sparse', 'status': 'Pending'}])
+        select = next(query['sql'] for query in queries.captured_queries if 'FROM "core_design"' in query['sql'])
+        self.assertNotIn('material_specs', select)
+
+    def test_all_fields_by_default(self):
+        response = self.client.get('/api/designs/')
+
+        self.assertIn('dimensions', response.json()[0])
+
+    def test_unknown_field_rejected(self):
+        response = self.client.get('/api/cdrs/', {'fields': 'id,password'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.json()['error'])
+
+    def test_async_list_and_search_support_fields(self):
+        self.client.force_login(self.user)  # the async views authenticate outside DRF
+        response = self.client.get('/api/async/designs/', {'fields': 'name'})
+        self.assertEqual(response.json(), [{'name': 'Sparse'}])
+
+        response = self.client.get('/api/designs/search/', {'material': 'Cardboard', 'fields': 'id'})
+        self.assertEqual(response.json(), [{'id': self.design.pk}])
+
+
+class FastReadPathTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='fast', email='fast@example.com', password='pw',
+                                                         role='Reviewer')
+        design = Design.objects.create(user=self.user, name='Café box \u2028', version=3,
+                                       dimensions={'width': 10.5, 'tags': ['a', None]},
+                                       material_specs={'type': 'Metal'}, status='Approved')
+        CDR.objects.create(design=design, generated_by=self.user, specifications='Spec')
+        BoxDesign.objects.create(user=self.user, width=1.25, height=2, depth=3, material='Plastic', text='Box',
+                                 logo='logos/placeholder.png')
+        BoxDesign.objects.create(user=self.user, width=1, height=2, depth=3, material='Metal', text='No logo', logo='')
+
+    def test_plans_match_model_serializers(self):
+        from core import fast_serializers
+        from core.serializers import UserSerializer, DesignSerializer, CDRSerializer, BoxDesignSerializer
+        from tynor_box_system.serializers import CDRSerializer as TynorCDRSerializer
+
+        for serializer_class in (UserSerializer, DesignSerializer, CDRSerializer, BoxDesignSerializer):
+            queryset = serializer_class.Meta.model.objects.order_by('pk')
+            expected = serializer_class(queryset, many=True).data
+            self.assertIsNotNone(fast_serializers.read_plan(serializer_class))
+            self.assertEqual(fast_serializers.serialize(serializer_class, queryset), expected)
+        # design_name comes from a related object, so DRF serializes it
+        self.assertIsNone(fast_serializers.read_plan(TynorCDRSerializer))
+
+    def test_renderer_matches_json_renderer(self):
+        from rest_framework.renderers import JSONRenderer
+        from core.renderers import FastJSONRenderer
+        from core.serializers import DesignSerializer
+
+        data = DesignSerializer(Design.objects.all(), many=True).data
+        for payload in (data, {'big': 1e20, 'small': 1e-7}, {'when': Design.objects.get().created_at}, None):
+            self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+        self.assertEqual(FastJSONRenderer().render(data, 'application/json; indent=2'),
+                         JSONRenderer().render(data, 'application/json; indent=2'))
+        for payload in ([{'w': float('nan')}], {'h': float('inf'), 'd': None}):
+            with self.assertRaisesMessage(ValueError, 'Out of range float values are not JSON compliant'):
+                FastJSONRenderer().render(payload)
+
+
+class ChangeFeedTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='erp', password='password123')
+        self.client.force_authenticate(user=self.user)
+
+    def feed(self, **params):
+        response = self.client.get('/api/changes/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.json()
+
+    def test_changes_since_cursor_with_tombstones(self):
+        design = Design.objects.create(user=self.user, name='Feed')
+        cdr = CDR.objects.create(design=design, generated_by=self.user, specifications='Spec')
+        first = self.feed()
+        self.assertEqual([(c['resource'], c['action']) for c in first['changes']],
+                         [('design', 'upsert'), ('cdr', 'upsert')])
+        self.assertEqual(first['changes'][0]['data']['name'], 'Feed')
+
+        design_id, cdr_id = design.pk, cdr.pk
+        design.name = 'Renamed'
+        design.save()
+        design.delete()
+        second = self.feed(since=first['next_cursor'])
+        self.assertEqual({(c['resource'], c['id'], c['action'], c['data']) for c in second['changes']},
+                         {('design', design_id, 'delete', None), ('cdr', cdr_id, 'delete', None)})
+
+        self.assertEqual(self.feed(since=second['next_cursor']),
+                         {'changes': [], 'next_cursor': second['next_cursor'], 'has_more': False})
+
+    def test_paging_and_resource_filter(self):
+        for i in range(3):
+            BoxDesign.objects.create(user=self.user, width=1, height=1, depth=1, material='Metal', text=f'Box {i}',
+                                     logo='logos/placeholder.png')
+        Design.objects.create(user=self.user, name='Other')
+
+        page = self.feed(resource='box_design', limit=2)
+        self.assertTrue(page['has_more'])
+        self.assertEqual([c['data']['text'] for c in page['changes']], ['Box 0', 'Box 1'])
+        rest = self.feed(resource='box_design', since=page['next_cursor'])
+        self.assertEqual([c['data']['text'] for c in rest['changes']], ['Box 2'])
+        self.assertFalse(rest['has_more'])
+
+    def test_late_commit_below_cursor_is_not_skipped(self):
+        late = Design.objects.create(user=self.user, name='Late')
+        first = Design.objects.create(user=self.user, name='First')
+        # A transaction that commits late: its entry has a lower id than one already read
+        entry = ChangeLogEntry.objects.filter(resource='design', object_id=late.pk).get()
+        entry_id = entry.pk
+        entry.delete()
+        page = self.feed()
+        self.assertEqual([c['id'] for c in page['changes']], [first.pk])
+
+        ChangeLogEntry.objects.create(id=entry_id, resource='design', object_id=late.pk, action='upsert')
+
+        self.assertEqual([c['id'] for c in self.feed(since=page['next_cursor'])['changes']], [late.pk])
+
+    def test_cursor_before_prune_is_gone(self):
+        from datetime import timedelta
+        from core.change_feed import prune
+        design = Design.objects.create(user=self.user, name='Old')
+        stale = self.feed()['next_cursor']
+        design.delete()
+        ChangeLogEntry.objects.update(changed_at=timezone.now() - timedelta(days=60))
+        kept = Design.objects.create(user=self.user, name='Kept')
+
+        out = StringIO()
+        call_command('prune_change_feed', '--days', '30', stdout=out)
+        self.assertIn('Deleted 2 change feed entries', out.getvalue())
+
+        response = self.client.get('/api/changes/', {'since': stale})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        head = response.json()['head_cursor']
+        self.assertEqual(self.feed(since=head)['changes'], [])
+        # Nothing was pruned after the tombstone, so a consumer that read it can go on
+        page = self.feed(since=head - 1)
+        self.assertEqual([c['id'] for c in page['changes']], [kept.pk])
+        self.assertEqual(prune(timedelta(days=30)), 0)
+
+    def test_feed_reads_the_primary(self):
+        from core.views import ChangeFeedView
+        self.assertFalse(getattr(ChangeFeedView, 'use_replica', False))
+
+    def test_invalid_parameters(self):
+        for params in ({'since': 'yesterday'}, {'since': -1}, {'resource': 'user'}):
+            response = self.client.get('/api/changes/', params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserImportTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_user(username='boss', email='boss@example.com', password='pw', role='Admin')
+        self.client.force_authenticate(user=self.admin)
+
+    def rows(self, count, prefix='op'):
+        return [{'username': f'{prefix}{i}', 'email': f'{prefix}{i}@plant.example', 'password': f'secret-{i}',
+                 'role': 'Reviewer'} for i in range(count)]
+
+    def test_import_with_set_based_checks(self):
+        from core.user_import import import_users
+
+        with self.assertNumQueries(5):  # usernames, emails, savepoint, one bulk insert, release
+            result = import_users(self.rows(20))
+
+        self.assertEqual(len(result.created), 20)
+        user = get_user_model().objects.get(username='op7')
+        self.assertTrue(user.check_password('secret-7'))
+        self.assertEqual(user.role, 'Reviewer')
+
+    def test_invalid_rows_block_import_unless_skipped(self):
+        from core.user_import import import_users
+        rows = self.rows(3) + [
+            {'username': 'boss', 'email': 'new@example.com', 'password': 'x'},
+            {'username': 'dup', 'email': 'op0@plant.example', 'password': 'x'},
+            {'username': 'bad name', 'email': 'not-an-email', 'password': ''},
+        ]
+
+        result = import_users(rows)
+        self.assertEqual(result.created, [])
+        self.assertEqual([error['row'] for error in result.errors], [4, 5, 6])
+        self.assertEqual(set(result.errors[2]['errors']), {'username', 'email', 'password'})
+
+        result = import_users(rows, skip_invalid=True)
+        self.assertEqual(len(result.created), 3)
+
+    def test_bulk_api_accepts_csv_and_requires_admin(self):
+        csv_file = SimpleUploadedFile('users.csv', b'username,email,password\nkiosk1,k1@example.com,pw1\n',
+                                      content_type='text/csv')
+        response = self.client.post('/api/users/bulk/', {'file': csv_file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.content)
+        self.assertEqual(response.json()['created'], 1)
+
+        response = self.client.post('/api/users/bulk/', self.rows(1), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.client.force_authenticate(user=get_user_model().objects.get(username='kiosk1'))
+        response = self.client.post('/api/users/bulk/', self.rows(1, 'x'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_command_dry_run(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('username,email,password,role\nline1,l1@example.com,pw,Reviewer\n')
+        self.addCleanup(os.remove, f.name)
+        out = StringIO()
+
+        call_command('import_users', f.name, '--dry-run', stdout=out)
+        self.assertFalse(get_user_model().objects.filter(username='line1').exists())
+        call_command('import_users', f.name, stdout=out)
+        self.assertTrue(get_user_model().objects.filter(username='line1').exists())
+
+    def test_duplicate_emails_block_migration_until_resolved(self):
+        import importlib
+        from django.apps import apps
+        migration = importlib.import_module('core.migrations.0008_user_email_unique')
+        User = get_user_model()
+        with connection.cursor() as cursor:  # Rolled back with the test
+            cursor.execute('DROP INDEX core_user_email_unique')
+        first = User.objects.create_user(username='twin1', email='twin@example.com', password='pw')
+        second = User.objects.create_user(username='twin2', email='twin@example.com', password='pw')
+        schema_editor = mock.Mock(connection=connection)
+
+        with self.assertRaisesMessage(RuntimeError, f"'twin@example.com': #{first.pk} (twin1), #{second.pk} (twin2)"):
+            migration.check_duplicate_emails(apps, schema_editor)
+
+        out = StringIO()
+        call_command('resolve_duplicate_emails', '--dry-run', stdout=out)
+        self.assertIn('Would clear 1 duplicate emails', out.getvalue())
+        self.assertEqual(User.objects.filter(email='twin@example.com').count(), 2)
+
+        with self.assertLogs('core.management.commands.resolve_duplicate_emails', 'WARNING'):
+            call_command('resolve_duplicate_emails', stdout=out)
+        self.assertEqual(User.objects.get(pk=first.pk).email, 'twin@example.com')
+        self.assertEqual(User.objects.get(pk=second.pk).email, '')
+        migration.check_duplicate_emails(apps, schema_editor)
+
+    # Worker processes load the real settings, not the test's MD5 override
+    @override_settings(PASSWORD_HASHERS=global_settings.PASSWORD_HASHERS)
+    def test_passwords_hashed_in_worker_processes(self):
+        from django.contrib.auth.hashers import check_password
+        from core import user_import
+
+        with mock.patch.object(user_import, 'PARALLEL_HASH_THRESHOLD', 2):
+            hashes = user_import.hash_passwords(['a', 'b', 'c'], workers=2)
+
+        self.assertEqual([check_password(p, h) for p, h in zip('abc', hashes)], [True, True, True])
+
+
+class RejectingBackend:
+    def authenticate(self, request, **credentials):
+        return None
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+                   LOGIN_THROTTLE_BUCKETS={'username': (3, 0.1), 'ip': (5, 0.1)})
+class LoginThrottleTests(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from core import login_throttle
+        cache.clear()
+        login_throttle.reset_counts()
+        self.user = get_user_model().objects.create_user(username='kiosk', password='right')
+        # LoginView keeps the project's default IsAuthenticated permission
+        self.client.force_authenticate(user=get_user_model().objects.create_user(username='station', password='x'))
+
+    def login(self, password, username='kiosk'):
+        return self.client.post('/api/login/', {'username': username, 'password': password}, format='json')
+
+    def test_throttled_before_password_check(self):
+        from core import login_throttle
+
+        for _ in range(3):
+            self.assertEqual(self.login('wrong').status_code, status.HTTP_401_UNAUTHORIZED)
+        with mock.patch('core.views.authenticate') as authenticate:
+            response = self.login('right')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '10')
+        authenticate.assert_not_called()
+
+        # Other usernames from the same IP draw on the IP bucket only
+        self.assertEqual([self.login('x', username='other').status_code for _ in range(3)], [401, 401, 429])
+        self.assertEqual(login_throttle.attempt_counts(),
+                         {'throttled': 2, 'cached': 0, 'success': 0, 'failure': 5})
+
+    def test_buckets_refill(self):
+        from core.login_throttle import take_token
+
+        self.assertEqual([take_token('kiosk', '10.0.0.1', now=100) for _ in range(4)], [0, 0, 0, 10])
+        self.assertEqual(take_token('kiosk', '10.0.0.1', now=105), 5)
+        self.assertEqual(take_token('kiosk', '10.0.0.1', now=110), 0)
+
+    def test_repeat_login_skips_hashing_until_password_changes(self):
+        self.assertEqual(self.login('right').status_code, status.HTTP_200_OK)
+        logged_in = mock.Mock()
+        user_logged_in.connect(logged_in)
+        self.addCleanup(user_logged_in.disconnect, logged_in)
+        with mock.patch('core.views.authenticate') as authenticate:
+            self.assertEqual(self.login('right').status_code, status.HTTP_200_OK)
+            authenticate.assert_not_called()
+        self.assertEqual(logged_in.call_args.kwargs['user'], self.user)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+        from core.login_throttle import cached_user
+        with self.settings(AUTHENTICATION_BACKENDS=['core.tests.RejectingBackend']):
+            self.assertIsNone(cached_user('kiosk', 'right'))
+
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertEqual(self.login('right').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertIn('tynor_login_attempts_total{outcome="cached"} 1', metrics.render_prometheus())
+
+
+class FitIndexTests(APITestCase):
+    def setUp(self):
+        from core import fit_index
+        fit_index.reset()
+        self.addCleanup(fit_index.reset)
+        self.user = get_user_model().objects.create_user(username='planner', password='password')
+        self.client.force_authenticate(user=self.user)
+
+    def box(self, width, height, depth, material='Cardboard'):
+        return BoxDesign.objects.create(user=self.user, width=width, height=height, depth=depth,
+                                        material=material, text='Box', logo='')
+
+    def test_smallest_fits_with_rotation(self):
+        from core.fit_index import find_fits
+        small = self.box(10, 10, 10)
+        tall = self.box(5, 40, 10)
+        large = self.box(20, 20, 20)
+        metal = self.box(6, 9, 31, 'Metal')
+
+        self.assertEqual([pk for pk, _ in find_fits(30, 4, 9)], [metal.pk, tall.pk])
+        self.assertEqual([pk for pk, _ in find_fits(4, 30, 9, rotate=False)], [tall.pk])
+        self.assertEqual(find_fits(30, 4, 9, material='Metal'), [(metal.pk, 6 * 9 * 31)])
+        self.assertEqual([pk for pk, _ in find_fits(8, 8, 8, k=2)], [small.pk, large.pk])
+        self.assertEqual(find_fits(50, 50, 50), [])
+        with self.assertRaises(ValueError):
+            find_fits(1, 1, 1, material='Glass')
+
+    def test_index_follows_saves_and_deletes(self):
+        from core import fit_index
+        box = self.box(10, 10, 10)
+        self.assertEqual([pk for pk, _ in fit_index.find_fits(9, 9, 9)], [box.pk])
+
+        other = self.box(9, 9, 9)
+        box.width = 5
+        box.save()
+        self.assertEqual([pk for pk, _ in fit_index.find_fits(9, 9, 9)], [other.pk])
+        other.delete()
+        self.assertEqual(fit_index.find_fits(9, 9, 9), [])
+
+    def test_compacts_delta_into_sorted_arrays(self):
+        from core import fit_index
+        self.box(10, 10, 10)
+        fit_index.find_fits(1, 1, 1)
+        with mock.patch.object(fit_index, 'DELTA_LIMIT', 3):
+            boxes = [self.box(size, size, size) for size in (4, 3, 2, 5, 6)]
+            fits = fit_index.find_fits(1, 1, 1, k=3)
+
+        self.assertEqual([pk for pk, _ in fits], [boxes[2].pk, boxes[1].pk, boxes[0].pk])
+        self.assertLessEqual(len(fit_index._index.delta), 3)
+
+    def test_concurrent_syncs_load_once(self):
+        import threading
+        from core.fit_index import FitIndex
+        index = FitIndex()
+        loads = []
+
+        def load():
+            loads.append(threading.get_ident())
+            time.sleep(0.05)
+            index._loaded = True
+            index.synced_at = time.monotonic()
+
+        with mock.patch.object(index, 'load', side_effect=load), \
+                mock.patch('core.change_feed.sequence'), \
+                mock.patch('core.fit_index.ChangeLogEntry.objects.filter', return_value=ChangeLogEntry.objects.none()):
+            threads = [threading.Thread(target=index.sync) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(loads), 1)
+
+    def test_fit_endpoint(self):
+        box = self.box(10, 20, 30)
+
+        response = self.client.get('/api/box_designs/fit/', {'width': 25, 'height': 5, 'depth': 15})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result, = response.json()['results']
+        self.assertEqual((result['id'], result['volume'], result['fill_ratio']), (box.pk, 6000.0, 0.3125))
+        self.assertEqual(self.client.get('/api/box_designs/fit/', {'width': 1}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+class BoxDedupeTests(TestCase):
+    def test_grid_clusters_match_pairwise_comparison(self):
+        import random
+        from core.box_dedupe import find_clusters
+        rng = random.Random(7)
+        rows = [(i, rng.uniform(10, 14), rng.uniform(10, 14), rng.uniform(10, 14), rng.choice(['Metal', 'Plastic']))
+                for i in range(300)]
+
+        # Brute-force single linkage over all pairs
+        parent = list(range(len(rows)))
+        def root(i):
+            while parent[i] != i:
+                i = parent[i]
+            return i
+        for a, b in itertools.combinations(rows, 2):
+            if a[4] == b[4] and all(abs(x - y) <= 0.3 for x, y in zip(sorted(a[1:4]), sorted(b[1:4]))):
+                parent[root(a[0])] = root(b[0])
+        expected = {}
+        for row in rows:
+            expected.setdefault(root(row[0]), []).append(row[0])
+
+        self.assertEqual(sorted(find_clusters(rows, 0.3)),
+                         sorted(sorted(ids) for ids in expected.values() if len(ids) > 1))
+
+    def test_dense_cell_compared_in_blocks(self):
+        from core import box_dedupe
+        rng = np.random.default_rng(3)
+        # 20000 near-identical boxes in one cell: a full pairwise matrix would need gigabytes
+        dense = np.column_stack([rng.uniform(10.0, 10.4, 20000), np.full(20000, 20.1), np.full(20000, 30.1)])
+        # Two boxes in the next cells along, chained on through close boxes, and one too far to join
+        neighbour = np.array([[10.8, 20.1, 30.1], [11.2, 20.1, 30.1]])
+        distant = np.array([[10.1, 21.3, 30.1]])
+        dims = np.vstack([dense, neighbour, distant])
+        rows = [(i, *box, 'Cardboard') for i, box in enumerate(dims.tolist())]
+
+        with mock.patch.object(box_dedupe, 'BLOCK_ROWS', 256):
+            clusters = box_dedupe.find_clusters(rows, 0.5)
+
+        self.assertEqual(clusters, [list(range(20002))])
+
+    def test_consolidation_report(self):
+        user = get_user_model().objects.create_user(username='sku', password='password')
+        make = lambda w, h, d, material='Cardboard': BoxDesign.objects.create(
+            user=user, width=w, height=h, depth=d, material=material, text='Box', logo='').pk
+        a, b, c = make(20, 30, 10), make(30.4, 20, 10.2), make(20.3, 30.5, 10)
+        make(20, 30, 10, 'Metal')
+        make(25, 30, 10)
+
+        report = consolidation_report(tolerance=0.5)
+
+        self.assertEqual(report['boxes'], 5)
+        self.assertEqual(report['redundant_boxes'], 2)
+        cluster, = report['clusters']
+        self.assertEqual(cluster['ids'], [a, b, c])
+        self.assertEqual(cluster['envelope'], [10.2, 20.3, 30.5])
+        self.assertIsNone(cluster['keep'])
+
+        out, err = StringIO(), StringIO()
+        call_command('box_dedupe_report', '--format', 'csv', stdout=out, stderr=err)
+        self.assertIn('1,Cardboard,3,,10.2x20.3x30.5', out.getvalue())
+        self.assertIn('1 clusters, 2 redundant of 5 box designs', err.getvalue())
+
+
+class LoadPlanningTests(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='logistics', password='password')
+        self.client.force_authenticate(user=self.user)
+
+    def test_orientations_and_two_block_layers(self):
+        from core.load_planning import plan_loads
+        plan = plan_loads([(40, 30, 20), (200, 10, 10)], (120, 80, 150))
+
+        # 40x20 footprint, 30 high: 3 x 4 per layer, 5 layers
+        self.assertEqual(plan['orientation'][0].tolist(), [40, 20, 30])
+        self.assertEqual((plan['per_layer'][0], plan['layers'][0], plan['total'][0]), (12, 5, 60))
+        self.assertEqual(plan['total'][1], 0)
+        # One layer of 50x30 cartons fits 6 only as two blocks: 1 x 2 across plus 1 x 4 turned
+        self.assertEqual(plan_loads([(30, 50, 20)], (120, 80, 20))['per_layer'][0], 6)
+
+        upright = plan_loads([(40, 30, 20)], (120, 80, 150), upright=True)
+        self.assertEqual(upright['orientation'][0][2], 30)
+
+    def test_small_cartons_keep_grid_with_capped_splits(self):
+        from core.load_planning import plan_loads
+        plan = plan_loads([(0.5, 0.5, 0.5)], (1203.2, 235.2, 10))
+        self.assertEqual(plan['total'][0], 2406 * 470 * 20)
+
+    def test_unplannable_dimensions_do_not_fail_the_catalogue(self):
+        make = lambda w, h, d: BoxDesign.objects.create(user=self.user, width=w, height=h, depth=d,
+                                                        material='Cardboard', text='Carton', logo='')
+        good, flat = make(40, 30, 20), make(40, 0, 20)
+
+        response = self.client.get('/api/box_designs/load_plan/', {'carrier': 'euro_pallet'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = {result['id']: result for result in response.json()['results']}
+        self.assertEqual(results[good.pk]['plans']['euro_pallet']['total'], 60)
+        self.assertIsNone(results[flat.pk]['plans'])
+        self.assertIn('error', results[flat.pk])
+
+    def test_load_plan_endpoint_caches_per_size(self):
+        make = lambda w, h, d: BoxDesign.objects.create(user=self.user, width=w, height=h, depth=d,
+                                                        material='Cardboard', text='Carton', logo='')
+        first, second = make(40, 30, 20), make(40, 30, 20)
+
+        with mock.patch('core.load_planning.plan_loads', wraps=load_planning.plan_loads) as planned:
+            response = self.client.get('/api/box_designs/load_plan/', {'carrier': 'euro_pallet'})
+            self.client.get('/api/box_designs/load_plan/', {'carrier': 'euro_pallet', 'ids': first.pk})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()['results']
+        self.assertEqual([result['id'] for result in results], [first.pk, second.pk])
+        self.assertEqual(results[0]['plans']['euro_pallet']['total'], 60)
+        self.assertEqual(planned.call_count, 1)
+        self.assertEqual(self.client.get('/api/box_designs/load_plan/', {'carrier': 'truck'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+class BoxLayoutGeometryTests(TestCase):
+    def setUp(self):
+        layout_engine.clear_cache()
+
+    def test_geometry_endpoint_returns_compact_panels(self):
+        response = self.client.get('/api/box_layout_geometry/', {'L': 30, 'B': 20, 'H': 15.5})
+
+        self.assertEqual(response.status_code, 200)
+        geometry = response.json()
+        self.assertEqual(geometry['style'], 'cross')
+        self.assertEqual(geometry['size'], [120, 71])
+        self.assertEqual(geometry['rects'][:8], [20, 0, 30, 20, 20, 35.5, 30, 20])
+        self.assertEqual(len(geometry['fills']), len(geometry['rects']) // 4)
+        self.assertEqual(geometry['labels'][0], 'Front Panel')
+        self.assertLess(len(response.content), 400)
+        self.assertEqual(layout_engine.cache_stats()['render']['misses'], 0)
+
+    def test_geometry_is_cached_and_validated(self):
+        self.assertIs(layout_engine.geometry_json(30, 20, 15), layout_engine.geometry_json('30', 20.0, 15))
+        self.assertEqual(self.client.get('/api/box_layout_geometry/', {'L': 0, 'B': 1, 'H': 1}).status_code, 400)
+        self.assertEqual(self.client.get('/api/box_layout_geometry/', {'L': 1, 'B': 1, 'H': 1, 'style': 'x'}).status_code,
+                         400)
+        self.assertEqual(self.client.get('/api/box_layout_geometry/', {'L': 1e308, 'B': 10, 'H': 10}).status_code, 400)
+
+
+class LivePreviewTests(SimpleTestCase):
+    async def connect(self, path='/ws/box_layout/'):
+        from asgiref.testing import ApplicationCommunicator
+        from core.live_preview import application
+        communicator = ApplicationCommunicator(application, {'type': 'websocket', 'path': path})
+        await communicator.send_input({'type': 'websocket.connect'})
+        return communicator, await communicator.receive_output(1)
+
+    async def exchange(self, communicator, **update):
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps(update)})
+        return json.loads((await communicator.receive_output(1))['text'])
+
+    async def test_full_layout_then_diffs(self):
+        communicator, accepted = await self.connect()
+        self.assertEqual(accepted['type'], 'websocket.accept')
+
+        full = await self.exchange(communicator, seq=1, L=30, B=20, H=15)
+        self.assertEqual((full['seq'], full['type'], full['labels'][0]), (1, 'full', 'Front Panel'))
+
+        diff = await self.exchange(communicator, seq=2, L=32, B=20, H=15)
+        self.assertEqual(diff['type'], 'diff')
+        rects = list(full['rects'])
+        for index, value in zip(diff['rects'][::2], diff['rects'][1::2]):
+            rects[index] = value
+        expected = json.loads(layout_engine.geometry_json(32, 20, 15))
+        self.assertEqual((rects, diff['size']), (expected['rects'], expected['size']))
+        self.assertLess(len(diff['rects']), len(full['rects']))
+
+        self.assertEqual((await self.exchange(communicator, seq=3, L=32, B=20, H=15, style='fefco-0201'))['type'], 'full')
+        error = await self.exchange(communicator, seq=4, L=-1, B=20, H=15)
+        self.assertEqual((error['seq'], error['type']), (4, 'error'))
+
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(1)
+
+    async def test_unexpected_failure_answers_error_and_keeps_session(self):
+        communicator, _ = await self.connect()
+
+        error = await self.exchange(communicator, seq=1, L=1e308, B=10, H=10)
+        self.assertEqual((error['seq'], error['type']), (1, 'error'))
+        with mock.patch('core.live_preview.compact_geometry', side_effect=OverflowError('math range error')), \
+                self.assertLogs('core.live_preview', level='ERROR'):
+            error = await self.exchange(communicator, seq=2, L=30, B=20, H=15)
+        self.assertEqual((error['seq'], error['type']), (2, 'error'))
+        self.assertEqual((await self.exchange(communicator, seq=3, L=30, B=20, H=15))['type'], 'full')
+
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(1)
+
+    async def test_rejects_other_paths(self):
+        communicator, message = await self.connect('/ws/other/')
+        self.assertEqual(message['type'], 'websocket.close')
+
+    async def test_router_passes_http_to_django(self):
+        from core.live_preview import websocket_router
+        http = mock.AsyncMock()
+        await websocket_router(http)({'type': 'http', 'path': '/api/'}, None, None)
+        http.assert_awaited_once()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), LAYOUT_ARTIFACT_WORKERS=0)
+class LayoutArtifactTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='artifacts', password='password')
+        self.client.force_authenticate(user=self.user)
+
+    def create_box(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BoxDesign.objects.create(user=self.user, **dict(
+                dict(width=30, height=15, depth=20, material='Cardboard', text='Carton', logo=''), **fields))
+
+    def test_built_after_save_and_served_without_rendering(self):
+        box = self.create_box()
+
+        with mock.patch.object(layout_engine, 'render_variants') as render:
+            response = self.client.get(f'/api/layout_artifacts/box_design/{box.pk}/')
+            render.assert_not_called()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['status'], 'ready')
+        self.assertEqual((data['blank_area_cm2'], data['board_area_cm2']), (120 * 70, 2 * 600 + 2 * 450 + 2 * 300))
+        self.assertEqual(data['cost'], round(8400 / 10000 * 0.45, 4))
+        self.assertEqual(self.client.get(data['svg_url']).status_code, 200)
+        artifact = layout_artifacts.artifact_for('box_design', box.pk)
+        from django.core.files.storage import default_storage
+        with default_storage.open(artifact.thumbnail_path, 'rb') as thumbnail:
+            self.assertEqual(thumbnail.read(8), b'\x89PNG\r\n\x1a\n')
+        # Same dimensions as the on-demand generator, so it finds the stored layout
+        self.assertEqual(artifact.svg_path, GenerateBoxLayoutView.layout_file_path(30, 20, 15, 'cross'))
+
+    def test_rebuilt_only_when_inputs_change(self):
+        box = self.create_box(width=10.5)
+        first = layout_artifacts.artifact_for('box_design', box.pk)
+        self.assertIn('-10p5x20x15-', first.svg_path)
+
+        with mock.patch.object(layout_artifacts, 'render_thumbnail', wraps=layout_artifacts.render_thumbnail) as thumb:
+            with self.captureOnCommitCallbacks(execute=True):
+                box.text = 'Renamed'
+                box.save()
+            thumb.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                box.material = 'Metal'
+                box.save()
+        artifact = layout_artifacts.artifact_for('box_design', box.pk)
+        self.assertNotEqual(artifact.source_key, first.source_key)
+        self.assertEqual(artifact.cost, round(first.blank_area_cm2 / 10000 * 9.80, 4))
+
+        box.delete()
+        self.assertIsNone(layout_artifacts.artifact_for('box_design', box.pk))
+
+    def test_pending_until_built_and_invalid_dimensions_recorded(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            box = BoxDesign.objects.create(user=self.user, width=30, height=15, depth=20, material='Cardboard',
+                                           text='Carton', logo='')
+        response = self.client.get(f'/api/layout_artifacts/box_design/{box.pk}/')
+        self.assertEqual((response.status_code, response.json()['status']), (status.HTTP_202_ACCEPTED, 'pending'))
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(f'/api/layout_artifacts/box_design/{box.pk}/').status_code, status.HTTP_200_OK)
+
+        huge = self.create_box(width=1e308)
+        response = self.client.get(f'/api/layout_artifacts/box_design/{huge.pk}/')
+        self.assertEqual(response.json()['status'], 'failed')
+        self.assertIn('at most', response.json()['error'])
+
+    def test_designs_without_dimensions_and_backfill(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            design = Design.objects.create(user=self.user, name='Flat', dimensions={'width': 10})
+        self.assertEqual(self.client.get(f'/api/layout_artifacts/design/{design.pk}/').status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+        Design.objects.filter(pk=design.pk).update(width=10, height=5, depth=4)
+        out = StringIO()
+        call_command('build_layout_artifacts', 'design', stdout=out)
+        self.assertIn('design: 1 ready', out.getvalue())
+        self.assertEqual(self.client.get(f'/api/layout_artifacts/design/{design.pk}/').json()['cost'], None)
@@ -1,14 +1,34 @@
-from django.urls import path
+from django.urls import path, re_path
 from .views import (
     UserView,
+    UserBulkImportView,
     DesignView,
+    DesignSearchView,
+    TynorDesignSearchView,
+    FullTextSearchView,
+    ChangeFeedView,
     CDRView,
     TokenObtainPairViewCustom,
     GenerateSVGView,
     CDRReportView,
     BoxDesignView,
+    BoxDesignFitView,
+    BoxDesignLoadPlanView,
     LoginView,
     GenerateBoxLayoutView,
+    BoxStyleListView,
+    BoxLayoutFileView,
+    BoxLayoutGeometryView,
+    LayoutArtifactView,
+    MetricsView,
+    DatabaseHealthView,
+)
+from .async_views import (
+    AsyncDesignView,
+    AsyncCDRView,
+    AsyncBoxDesignView,
+    AsyncGenerateBoxLayoutView,
+    AsyncBoxLayoutFileView,
 )
 
 urlpatterns = [
@@ -17,9 +37,18 @@ urlpatterns = [
     
     # User Management
     path('users/', UserView.as_view(), name='user_list_create'),
+    path('users/bulk/', UserBulkImportView.as_view(), name='user_bulk_import'),
     
     # Design Management
     path('designs/', DesignView.as_view(), name='design_list_create'),
+    path('designs/search/', DesignSearchView.as_view(), name='design_search'),
+    path('tynor_designs/search/', TynorDesignSearchView.as_view(), name='tynor_design_search'),
+
+    # Full-text Search (designs, CDRs, box designs)
+    path('search/', FullTextSearchView.as_view(), name='full_text_search'),
+
+    # Change Feed (incremental sync)
+    path('changes/', ChangeFeedView.as_view(), name='change_feed'),
     
     # CDR Management
     path('cdrs/', CDRView.as_view(), name='cdr_list_create'),
@@ -32,11 +61,37 @@ urlpatterns = [
     
     # Box Design Management
     path('box_designs/', BoxDesignView.as_view(), name='box_design_list_create'),
+    path('box_designs/fit/', BoxDesignFitView.as_view(), name='box_design_fit'),
+    path('box_designs/load_plan/', BoxDesignLoadPlanView.as_view(), name='box_design_load_plan'),
     
     # User Login
     path('login/', LoginView.as_view(), name='login'),
     
     # Box Layout Generation
     path('generate_box_layout/', GenerateBoxLayoutView.as_view(), name='generate_box_layout'),
+
+    # Cached Box Layouts (pre-compressed variants)
+    re_path(r'^box_layouts/(?P<name>[\w-]+\.svg)$', BoxLayoutFileView.as_view(), name='box_layout_file'),
+
+    # Precomputed layout artifacts of designs and box designs
+    path('layout_artifacts/<str:resource>/<int:pk>/', LayoutArtifactView.as_view(), name='layout_artifact'),
+
+    # Box Layout Geometry (drawn client-side)
+    path('box_layout_geometry/', BoxLayoutGeometryView.as_view(), name='box_layout_geometry'),
+
+    # Box Style Library
+    path('box_styles/', BoxStyleListView.as_view(), name='box_style_list'),
+
+    # Instrumentation metrics (Prometheus text format)
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+
+    # Database connection and pool health
+    path('health/db/', DatabaseHealthView.as_view(), name='database_health'),
+
+    # Async (ASGI) variants
+    path('async/designs/', AsyncDesignView.as_view(), name='async_design_list_create'),
+    path('async/cdrs/', AsyncCDRView.as_view(), name='async_cdr_list_create'),
+    path('async/box_designs/', AsyncBoxDesignView.as_view(), name='async_box_design_list_create'),
+    path('async/generate_box_layout/', AsyncGenerateBoxLayoutView.as_view(), name='async_generate_box_layout'),
+    re_path(r'^async/box_layouts/(?P<name>[\w-]+\.svg)$', AsyncBoxLayoutFileView.as_view(), name='async_box_layout_file'),
 ]
-    
\ No newline at end of file
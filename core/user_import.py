@@ -0,0 +1,163 @@
+"""
+Bulk user provisioning.
+
+``import_users(rows)`` validates a batch of users (from CSV or JSON), checks
+usernames and emails against the database with one ``__in`` query each
+(emails are backed by the core_user_email_unique index), hashes the passwords
+and inserts everything with ``bulk_create``. Password hashing dominates the
+cost of creating a user, so the ``import_users`` management command spreads it
+over a process pool; /api/users/bulk/ hashes inline rather than starting
+processes from a web worker.
+"""
+import csv
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from . import hash_workers
+from .models import User
+
+IMPORT_FIELDS = ('username', 'email', 'password', 'role', 'first_name', 'last_name')
+
+# Below this many passwords, hashing inline beats starting worker processes
+PARALLEL_HASH_THRESHOLD = 50
+
+
+class ImportResult:
+    def __init__(self, created=(), errors=None, dry_run=False):
+        self.created = list(created)
+        self.errors = errors or []
+        self.dry_run = dry_run
+
+    def as_dict(self):
+        return {'created': len(self.created), 'ids': self.created, 'errors': self.errors, 'dry_run': self.dry_run}
+
+
+def read_csv(stream):
+    """
+    Rows from a CSV file (text or binary) with a header line.
+    """
+    if isinstance(stream, (bytes, bytearray)):
+        stream = stream.decode('utf-8-sig')
+    if isinstance(stream, str):
+        stream = io.StringIO(stream)
+    elif 'b' in getattr(stream, 'mode', 'b'):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    return list(csv.DictReader(stream))
+
+
+def default_hash_workers():
+    return getattr(settings, 'USER_IMPORT_HASH_WORKERS', None) or os.cpu_count() or 1
+
+
+def hash_passwords(passwords, workers=1):
+    """
+    make_password() for each password, in order, using a pool of ``workers``
+    processes for large batches.
+    """
+    if workers <= 1 or len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    # spawn, not fork: forked children would share (and on exit close) the
+    # parent's database connections. Workers inherit DJANGO_SETTINGS_MODULE,
+    # load settings only (core.hash_workers) and never import models.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=hash_workers.init_worker,
+    ) as executor:
+        return list(executor.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def validate_rows(rows):
+    """
+    Clean rows and return (users, errors). ``errors`` holds
+    {'row': n, 'errors': {field: [messages]}} with 1-based row numbers.
+    """
+    roles = {value for value, _ in User.ROLE_CHOICES}
+    cleaned, errors = [], []
+    seen_usernames, seen_emails = {}, {}
+
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'errors': {'non_field_errors': ["Expected an object."]}})
+            continue
+        user = {field: str(row.get(field) or '').strip() for field in IMPORT_FIELDS}
+        user['role'] = user['role'] or 'Designer'
+        user['email'] = User.objects.normalize_email(user['email'])
+        problems = {}
+
+        try:
+            User.username_validator(user['username'])
+        except ValidationError as e:
+            problems['username'] = e.messages
+        if not user['username']:
+            problems['username'] = ["This field is required."]
+        elif user['username'] in seen_usernames:
+            problems['username'] = [f"Duplicate of row {seen_usernames[user['username']]}."]
+
+        if user['email']:
+            try:
+                validate_email(user['email'])
+            except ValidationError as e:
+                problems['email'] = e.messages
+            if user['email'] in seen_emails:
+                problems['email'] = [f"Duplicate of row {seen_emails[user['email']]}."]
+        if not row.get('password'):
+            problems['password'] = ["This field is required."]
+        if user['role'] not in roles:
+            problems['role'] = [f"Must be one of: {', '.join(sorted(roles))}."]
+
+        seen_usernames.setdefault(user['username'], number)
+        if user['email']:
+            seen_emails.setdefault(user['email'], number)
+        if problems:
+            errors.append({'row': number, 'errors': problems})
+        else:
+            user['password'] = str(row['password'])
+            cleaned.append((number, user))
+
+    # One query per unique column instead of one exists() per row
+    usernames = set(User.objects.filter(
+        username__in=[user['username'] for _, user in cleaned]
+    ).values_list('username', flat=True))
+    emails = set(User.objects.filter(
+        email__in=[user['email'] for _, user in cleaned if user['email']]
+    ).values_list('email', flat=True))
+    users = []
+    for number, user in cleaned:
+        problems = {}
+        if user['username'] in usernames:
+            problems['username'] = ["A user with that username already exists."]
+        if user['email'] in emails:
+            problems['email'] = ["This email is already in use."]
+        if problems:
+            errors.append({'row': number, 'errors': problems})
+        else:
+            users.append(user)
+    errors.sort(key=lambda error: error['row'])
+    return users, errors
+
+
+def import_users(rows, skip_invalid=False, dry_run=False, workers=1, batch_size=500):
+    """
+    Validate and create users, hashing passwords on ``workers`` processes.
+    Unless ``skip_invalid`` is set, any invalid row means nothing is created.
+    """
+    users, errors = validate_rows(rows)
+    if (errors and not skip_invalid) or dry_run or not users:
+        return ImportResult(errors=errors, dry_run=dry_run)
+
+    hashes = hash_passwords([user['password'] for user in users], workers)
+    instances = [User(**dict(user, password=password)) for user, password in zip(users, hashes)]
+    try:
+        with transaction.atomic():
+            created = User.objects.bulk_create(instances, batch_size=batch_size)
+    except IntegrityError as e:
+        # A concurrent import or registration took a username/email after validation
+        return ImportResult(errors=errors + [{'row': None, 'errors': {'non_field_errors': [str(e)]}}])
+    return ImportResult([user.pk for user in created], errors)
@@ -1,22 +1,23 @@
 import uuid
 from PIL import Image, ImageDraw
-import svgwrite
 import os
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from .compression import AVAILABLE_ENCODINGS, ENCODING_SUFFIXES, choose_encoding
+from .instrumentation import timed_phase
+from . import layout_engine
+from .box_styles import DEFAULT_STYLE
 
 # Function to create a unique SVG file for the box layout
-def create_svg(length, breadth, height):
+def create_svg(length, breadth, height, style=DEFAULT_STYLE):
     """
     Generates an SVG file with the layout of the box based on the given dimensions.
     The SVG file is saved with a unique name to prevent overwriting.
     """
     svg_filename = f"box_layout_{uuid.uuid4()}.svg"
-    dwg = svgwrite.Drawing(svg_filename, profile="tiny")
-    # Add box design (panels)
-    dwg.add(dwg.rect(insert=(0, 0), size=(length * 10, breadth * 10), fill="none", stroke="black"))
-    dwg.add(dwg.text(f"Length: {length}", insert=(10, 20), fill="black"))
-    dwg.add(dwg.text(f"Breadth: {breadth}", insert=(10, 40), fill="black"))
-    dwg.add(dwg.text(f"Height: {height}", insert=(10, 60), fill="black"))
-    dwg.save()
+    # Rendered by the shared layout engine at 10px per unit
+    with open(svg_filename, "w", encoding="utf-8") as f:
+        f.write(layout_engine.render(length, breadth, height, style, scale=10))
     print(f"SVG file saved as {svg_filename}")
     return svg_filename
 
@@ -59,3 +60,35 @@ def cleanup_files(files):
         if os.path.exists(file):
             os.remove(file)
             print(f"Deleted file: {file}")
+
+# Store pre-compressed variants of a layout next to the uncompressed file
+@timed_phase('storage')
+def store_layout_variants(file_path, variants):
+    """
+    Saves every encoding of a layout to default storage under a deterministic name
+    (file_path, file_path + '.gz', file_path + '.br'). The uncompressed file is
+    written last, so its presence means the compressed variants are in place.
+    """
+    for encoding in sorted(variants, key=lambda name: name == 'identity'):
+        name = file_path + ENCODING_SUFFIXES[encoding]
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, ContentFile(variants[encoding]))
+    return file_path
+
+# Read the best stored variant of a layout for the client's Accept-Encoding
+@timed_phase('storage')
+def load_layout_variant(file_path, accept_encoding):
+    """
+    Returns (encoding, content) for a stored layout, preferring the compressed
+    variant the client accepts and falling back to the uncompressed file.
+    """
+    encoding = choose_encoding(accept_encoding, AVAILABLE_ENCODINGS)
+    try:
+        with default_storage.open(file_path + ENCODING_SUFFIXES[encoding], 'rb') as stored:
+            return encoding, stored.read()
+    except FileNotFoundError:
+        if encoding == 'identity':
+            raise
+    with default_storage.open(file_path, 'rb') as stored:
+        return 'identity', stored.read()
@@ -1,3 +1,6 @@
+import csv
+import hmac
+import logging
 from django.http import JsonResponse, HttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -7,13 +10,44 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from io import BytesIO
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-import svgwrite
-from django.contrib.auth import authenticate
+from django.contrib.auth import authenticate, user_logged_in
 from django.core.files.storage import default_storage
 from .models import User, Design, CDR, BoxDesign
+from tynor_box_system.models import Design as TynorDesign
+from tynor_box_system.serializers import DesignSerializer as TynorDesignSerializer
 from .serializers import UserSerializer, DesignSerializer, CDRSerializer, MyTokenObtainPairSerializer, BoxDesignSerializer, LoginSerializer
-from .utils import generate_box_layout
+from .etags import BOX_LAYOUT_VERSION, cdr_report_etag, box_layout_etag
+from .compression import choose_encoding, variant_headers
+from .db_health import check_databases, summary as database_summary
+from .json_search import search as search_designs
+from . import search as full_text
+from . import change_feed, fast_serializers, fit_index, layout_artifacts, load_planning, login_throttle
+from .permissions import IsAdmin
+from .user_import import import_users, read_csv
+from .instrumentation import metrics, phase
+from .utils import load_layout_variant, store_layout_variants
+from django.conf import settings
+from django.urls import reverse
+from . import layout_engine
+from .box_styles import DEFAULT_STYLE, available_styles, get_style
+from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.http import condition
+
+logger = logging.getLogger(__name__)
+
+# Storage directory for cached box layouts and their compressed variants
+LAYOUT_STORAGE_DIR = layout_artifacts.LAYOUT_STORAGE_DIR
+
+
+def svg_response(content, encoding='identity'):
+    """
+    Build an SVG response for an already encoded (pre-compressed) payload.
+    """
+    response = HttpResponse(content, content_type='image/svg+xml')
+    for header, value in variant_headers(encoding).items():
+        response[header] = value
+    return response
 
 # Custom JWT Token Obtain View
 class TokenObtainPairViewCustom(TokenObtainPairView):
@@ -32,10 +66,16 @@ class UserView(APIView):
         List all users
         """
         try:
-            users = User.objects.all()
-            serializer = UserSerializer(users, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            fields = UserSerializer.requested_fields(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with phase('serialize', serializer='UserSerializer') as context:
+                data = fast_serializers.serialize(UserSerializer, User.objects.all(), fields)
+                context['rows'] = len(data)
+            return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
+            logger.exception("Failed to fetch users")
             return JsonResponse({"error": f"Failed to fetch users: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def post(self, request):
@@ -48,25 +88,69 @@ class UserView(APIView):
                 serializer.save()
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             except Exception as e:
+                logger.exception("Failed to create user")
                 return JsonResponse({"error": f"Failed to create user: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# Bulk User Import View
+class UserBulkImportView(APIView):
+    """
+    Create many users at once (admins only). Accepts a CSV upload ("file",
+    columns username,email,password[,role,first_name,last_name]) or a JSON list
+    of the same objects. ?skip_invalid=1 creates the valid rows even if others
+    fail; ?dry_run=1 only validates.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def post(self, request):
+        try:
+            if 'file' in request.FILES:
+                rows = read_csv(request.FILES['file'].read())
+            else:
+                rows = request.data.get('users') if isinstance(request.data, dict) else request.data
+            if not isinstance(rows, list):
+                raise ValueError("Expected a CSV file or a JSON list of users.")
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        flag = lambda name: request.query_params.get(name, '').lower() in ('1', 'true', 'yes')
+        try:
+            result = import_users(rows, skip_invalid=flag('skip_invalid'), dry_run=flag('dry_run'))
+        except Exception as e:
+            logger.exception("Failed to import users")
+            return JsonResponse({"error": f"Failed to import users: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if result.created:
+            code = status.HTTP_201_CREATED
+        elif result.errors:
+            code = status.HTTP_400_BAD_REQUEST
+        else:
+            code = status.HTTP_200_OK
+        return Response(result.as_dict(), status=code)
+
+
 # Design Management View
 class DesignView(APIView):
     """
     View for managing designs (list and create).
     """
     permission_classes = [IsAuthenticated]
+    use_replica = True  # GET reads from the read replica (core.db_routers)
 
     def get(self, request):
         """
         List all designs
         """
         try:
-            designs = Design.objects.all()
-            serializer = DesignSerializer(designs, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            fields = DesignSerializer.requested_fields(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with phase('serialize', serializer='DesignSerializer') as context:
+                data = fast_serializers.serialize(DesignSerializer, Design.objects.all(), fields)
+                context['rows'] = len(data)
+            return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
+            logger.exception("Failed to fetch designs")
             return JsonResponse({"error": f"Failed to fetch designs: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def post(self, request):
@@ -79,25 +163,122 @@ class DesignView(APIView):
                 serializer.save(user=request.user)  # Save the user as the creator
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             except Exception as e:
+                logger.exception("Failed to create design")
                 return JsonResponse({"error": f"Failed to create design: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# Design Search View
+class DesignSearchView(APIView):
+    """
+    Search designs by dimensions and material specs (see core.json_search):
+    ?material=Cardboard&min_width=20&max_width=40&spec.color=Red&limit=50
+    """
+    permission_classes = [IsAuthenticated]
+    use_replica = True
+    model = Design
+    serializer_class = DesignSerializer
+
+    def get(self, request):
+        try:
+            fields = self.serializer_class.requested_fields(request)
+            designs = search_designs(self.model.objects.all(), request.query_params)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with phase('serialize', serializer=self.serializer_class.__name__) as context:
+                data = fast_serializers.serialize(self.serializer_class, designs, fields)
+                context['rows'] = len(data)
+            return Response(data, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.exception("Failed to search designs")
+            return JsonResponse({"error": f"Failed to search designs: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TynorDesignSearchView(DesignSearchView):
+    """
+    The same search over tynor_box_system designs.
+    """
+    model = TynorDesign
+    serializer_class = TynorDesignSerializer
+
+
+# Full-text Search View
+class FullTextSearchView(APIView):
+    """
+    Full-text search over design names, CDR specifications and box design text:
+    ?q=red carton&type=design,cdr&limit=20
+    """
+    permission_classes = [IsAuthenticated]
+    use_replica = True
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        types = [name for name in request.query_params.get('type', '').split(',') if name]
+        try:
+            limit = int(request.query_params.get('limit', full_text.DEFAULT_SEARCH_LIMIT))
+            entries = full_text.search(query, types, limit)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception("Full-text search failed")
+            return JsonResponse({"error": f"Search failed: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response([full_text.as_result(entry) for entry in entries], status=status.HTTP_200_OK)
+
+
+# Change Feed View
+class ChangeFeedView(APIView):
+    """
+    Incremental sync: changes to designs, CDRs and box designs after a cursor,
+    with tombstones for deletes (see core.change_feed).
+    ?since=1200&resource=design,cdr&limit=500
+
+    Served from the primary: reads sequence new entries there, and a lagging
+    replica would return a page without them while the cursor moves past.
+    A cursor from before the last prune gets 410 Gone with the head cursor.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        resources = [name for name in request.query_params.get('resource', '').split(',') if name]
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = int(request.query_params.get('limit', change_feed.DEFAULT_FEED_LIMIT))
+            if since < 0:
+                raise ValueError("'since' must be a cursor returned by this endpoint.")
+            feed = change_feed.read_changes(since, resources, limit)
+        except change_feed.CursorExpired as e:
+            return JsonResponse({"error": str(e), "head_cursor": e.head}, status=status.HTTP_410_GONE)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception("Failed to read change feed")
+            return JsonResponse({"error": f"Failed to read change feed: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(feed, status=status.HTTP_200_OK)
+
+
 # CDR Management View
 class CDRView(APIView):
     """
     View for managing CDRs (list and create).
     """
     permission_classes = [IsAuthenticated]
+    use_replica = True
 
     def get(self, request):
         """
         List all CDRs
         """
         try:
-            cdrs = CDR.objects.all()
-            serializer = CDRSerializer(cdrs, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            fields = CDRSerializer.requested_fields(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with phase('serialize', serializer='CDRSerializer') as context:
+                data = fast_serializers.serialize(CDRSerializer, CDR.objects.all(), fields)
+                context['rows'] = len(data)
+            return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
+            logger.exception("Failed to fetch CDRs")
             return JsonResponse({"error": f"Failed to fetch CDRs: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def post(self, request):
@@ -110,12 +291,14 @@ class CDRView(APIView):
                 serializer.save(generated_by=request.user)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             except Exception as e:
+                logger.exception("Failed to create CDR")
                 return JsonResponse({"error": f"Failed to create CDR: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class GenerateSVGView(APIView):
     """
     A view to generate an SVG file and return it as a response.
+    Accepts an optional box style (defaults to the six-panel cross).
     """
     def post(self, request):
         try:
@@ -123,71 +306,69 @@ class GenerateSVGView(APIView):
             length = request.data.get("length")
             breadth = request.data.get("breadth")
             height = request.data.get("height")
+            style = request.data.get("style", DEFAULT_STYLE)
 
             # Validate input dimensions
             if not all([length, breadth, height]):
                 return JsonResponse({"error": "Length, breadth, and height are required."}, status=400)
 
-            # Create an in-memory file to hold the SVG content
-            buffer = BytesIO()
-
-            # Create an SVG drawing object
-            dwg = svgwrite.Drawing(size=("400px", "400px"), profile='tiny')
-
-            # Add shapes and text to the SVG based on dimensions
-            dwg.add(dwg.rect(insert=(10, 10), size=(length, height), fill='white', stroke='black'))
-            dwg.add(dwg.rect(insert=(20 + length, 10), size=(breadth, height), fill='white', stroke='black'))
-            dwg.add(dwg.text('Box Layout', insert=(50, 50), font_size="15px", fill="black"))
-
-            # Write SVG data to the BytesIO buffer
-            dwg.write(buffer)
+            # Rendered and compressed once per layout by the shared layout engine
+            variants = layout_engine.render_variants(length, breadth, height, style)
 
-            # Rewind the buffer to the beginning
-            buffer.seek(0)
-
-            # Return the SVG content as a response
-            return Response(buffer.getvalue(), content_type='image/svg+xml', status=status.HTTP_200_OK)
+            # Return the SVG variant matching the client's Accept-Encoding
+            encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), variants)
+            return svg_response(variants[encoding], encoding)
 
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
         except Exception as e:
+            logger.exception("Failed to generate SVG")
             return JsonResponse({"error": f"Failed to generate SVG: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # CDR Report Generation View
+@method_decorator(condition(etag_func=cdr_report_etag), name='get')
 class CDRReportView(APIView):
     """
     View to generate a CDR report for a specific design.
+    Requests carrying a matching If-None-Match get a 304 before the PDF is rendered.
     """
+    use_replica = True
+
     def get(self, request, design_id):
         try:
             # Fetch CDRs for the given design_id
             cdrs = CDR.objects.filter(design_id=design_id)
 
-            # Create an in-memory file for the PDF
-            buffer = BytesIO()
-            p = canvas.Canvas(buffer, pagesize=letter)
+            with phase('reportlab', design_id=design_id) as context:
+                # Create an in-memory file for the PDF
+                buffer = BytesIO()
+                p = canvas.Canvas(buffer, pagesize=letter)
 
-            # Set up PDF document title
-            p.drawString(100, 750, f"CDR Report for Design ID: {design_id}")
-            y_position = 700
+                # Set up PDF document title
+                p.drawString(100, 750, f"CDR Report for Design ID: {design_id}")
+                y_position = 700
 
-            # Loop through each CDR record and add it to the PDF
-            for cdr in cdrs:
-                p.drawString(100, y_position, f"Specification: {cdr.specifications}")
-                p.drawString(100, y_position - 20, f"Approval Status: {cdr.approval_status}")
-                y_position -= 40
+                # Loop through each CDR record and add it to the PDF
+                for cdr in cdrs:
+                    p.drawString(100, y_position, f"Specification: {cdr.specifications}")
+                    p.drawString(100, y_position - 20, f"Approval Status: {cdr.approval_status}")
+                    y_position -= 40
+                context['cdr_count'] = len(cdrs)
 
-            # Finish the page and save the PDF
-            p.showPage()
-            p.save()
+                # Finish the page and save the PDF
+                p.showPage()
+                p.save()
 
             # Rewind the buffer's file pointer to the beginning
             buffer.seek(0)
 
             # Create a response with the PDF content
-            response = Response(buffer.getvalue(), content_type='application/pdf')
+            response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
             response['Content-Disposition'] = f'attachment; filename="cdr_report_{design_id}.pdf"'
             return response
 
         except Exception as e:
+            logger.exception("Failed to generate CDR report")
             return JsonResponse({"error": f"Failed to generate CDR report: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # Box Design View
@@ -196,16 +377,23 @@ class BoxDesignView(APIView):
     View for managing box designs (list and create).
     """
     permission_classes = [IsAuthenticated]
+    use_replica = True
 
     def get(self, request):
         """
         List all box designs
         """
         try:
-            box_designs = BoxDesign.objects.all()
-            serializer = BoxDesignSerializer(box_designs, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            fields = BoxDesignSerializer.requested_fields(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with phase('serialize', serializer='BoxDesignSerializer') as context:
+                data = fast_serializers.serialize(BoxDesignSerializer, BoxDesign.objects.all(), fields)
+                context['rows'] = len(data)
+            return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
+            logger.exception("Failed to fetch box designs")
             return JsonResponse({"error": f"Failed to fetch box designs: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def post(self, request):
@@ -215,14 +403,94 @@ class BoxDesignView(APIView):
         serializer = BoxDesignSerializer(data=request.data)
         if serializer.is_valid():
             try:
-                serializer.save()
+                serializer.save(user=request.user)  # Save the user as the owner
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             except Exception as e:
+                logger.exception("Failed to create box design")
                 return JsonResponse({"error": f"Failed to create box design: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# Box Design Fit Search View
+class BoxDesignFitView(APIView):
+    """
+    Smallest box designs that hold an item (see core.fit_index):
+    ?width=12&height=30&depth=8&material=Cardboard&k=5&rotate=1
+    """
+    permission_classes = [IsAuthenticated]
+    max_results = 100
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            size = [float(params[name]) for name in ('width', 'height', 'depth')]
+            k = int(params.get('k', 5))
+            if not 1 <= k <= self.max_results:
+                raise ValueError(f"k must be between 1 and {self.max_results}.")
+            rotate = params.get('rotate', '1').lower() not in ('0', 'false', 'no')
+            fits = fit_index.find_fits(*size, material=params.get('material') or None, k=k, rotate=rotate)
+        except KeyError as e:
+            return JsonResponse({"error": f"Missing parameter: {e.args[0]}"}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with phase('serialize', serializer='BoxDesignSerializer') as context:
+                data = fast_serializers.serialize_by_pk(
+                    BoxDesignSerializer, BoxDesign.objects.filter(pk__in=[pk for pk, _ in fits]))
+                item_volume = size[0] * size[1] * size[2]
+                results = [
+                    {'id': pk, **data[pk], 'volume': volume, 'fill_ratio': round(item_volume / volume, 4)}
+                    for pk, volume in fits if pk in data
+                ]
+                context['rows'] = len(results)
+            return Response({"results": results}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.exception("Failed to find fitting box designs")
+            return JsonResponse({"error": f"Failed to find fitting box designs: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+# Box Design Load Planning View
+class BoxDesignLoadPlanView(APIView):
+    """
+    Cartons per layer and per pallet/container for box designs (see
+    core.load_planning): ?ids=1,2,3&carrier=euro_pallet,container_40ft&upright=1
+    Without ids the whole catalogue is planned.
+    """
+    permission_classes = [IsAuthenticated]
+    use_replica = True
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            boxes = BoxDesign.objects.order_by('id')
+            if params.get('ids'):
+                boxes = boxes.filter(pk__in=[int(pk) for pk in params['ids'].split(',') if pk.strip()])
+            carrier_names = [name.strip() for name in params.get('carrier', '').split(',') if name.strip()]
+            upright = params.get('upright', '').lower() in ('1', 'true', 'yes')
+            rows = list(boxes.values_list('id', 'width', 'height', 'depth'))
+            with phase('load_planning', boxes=len(rows)):
+                plans = load_planning.plan_box_designs(rows, carrier_names, upright)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception("Failed to plan box design loads")
+            return JsonResponse({"error": f"Failed to plan box design loads: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        available = load_planning.carriers()
+        return Response({
+            "carriers": {name: available[name] for name in carrier_names or available},
+            "results": [
+                {"id": pk, "width": width, "height": height, "depth": depth, "plans": plans[pk]}
+                if plans[pk] is not None else
+                {"id": pk, "width": width, "height": height, "depth": depth, "plans": None,
+                 "error": f"Dimensions must be at least {load_planning.MIN_DIMENSION_CM} cm."}
+                for pk, width, height, depth in rows
+            ],
+        }, status=status.HTTP_200_OK)
+
 # View for user login
 class LoginView(APIView):
+    """
+    Check a username and password. Attempts are throttled per username and
+    client IP before any password hashing (core.login_throttle).
+    """
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
 
@@ -230,22 +498,46 @@ class LoginView(APIView):
         if serializer.is_valid():
             username = serializer.validated_data['username']
             password = serializer.validated_data['password']
-            user = authenticate(request, username=username, password=password)
+
+            retry_after = login_throttle.take_token(username, login_throttle.client_ip(request))
+            if retry_after:
+                login_throttle.record('throttled')
+                response = JsonResponse({"error": "Too many login attempts. Try again later."},
+                                        status=status.HTTP_429_TOO_MANY_REQUESTS)
+                response['Retry-After'] = str(retry_after)
+                return response
+
+            user = login_throttle.cached_user(username, password)
+            if user:
+                login_throttle.record('cached')
+            else:
+                user = authenticate(request, username=username, password=password)
+                login_throttle.record('success' if user else 'failure')
+                if user:
+                    login_throttle.remember(username, password, user)
 
             if user:
+                # Sent for cached and hashed logins alike (updates last_login)
+                user_logged_in.send(sender=user.__class__, request=request, user=user)
                 # Return a success message and token (JWT could be added here)
                 return Response({"message": "Login successful!"}, status=status.HTTP_200_OK)
             else:
                 return JsonResponse({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@method_decorator(condition(etag_func=box_layout_etag), name='get')
 class GenerateBoxLayoutView(View):
+    """
+    Generate a box layout SVG from L/B/H query parameters and an optional box style.
+    Requests carrying a matching If-None-Match get a 304 before the SVG is rendered.
+    """
     def get(self, request, *args, **kwargs):
         try:
             # Retrieve dimensions from query parameters
             length = int(request.GET.get('L', 0))
             breadth = int(request.GET.get('B', 0))
             height = int(request.GET.get('H', 0))
+            style = request.GET.get('style', DEFAULT_STYLE)
 
             # Validate dimensions
             if length <= 0 or breadth <= 0 or height <= 0:
@@ -253,48 +545,149 @@ class GenerateBoxLayoutView(View):
                     "error": "Invalid dimensions provided. Length, breadth, and height must be positive integers."
                 }, status=400)
 
-            # Generate the box layout SVG data
-            svg_data = self.generate_box_data(length, breadth, height)
-
-            # Save the SVG data to a BytesIO object
-            output = BytesIO()
-            output.write(svg_data.encode('utf-8'))
-            output.seek(0)
-
-            # Save the file to storage (e.g., default file system or cloud storage)
-            file_path = default_storage.save('box_layout.svg', output)
+            # Layouts are stored under a deterministic name with gzip/brotli variants
+            # next to them, so each layout is rendered and compressed only once
+            file_path = self.layout_file_path(length, breadth, height, style)
+            with phase('storage'):
+                stored = default_storage.exists(file_path)
+            if not stored:
+                store_layout_variants(file_path, layout_engine.render_variants(length, breadth, height, style))
 
             return JsonResponse({
                 "message": "Box layout generated successfully.",
-                "file_path": file_path
+                "file_path": file_path,
+                "url": reverse('box_layout_file', args=[file_path.rsplit('/', 1)[-1]]),
             })
 
         except Exception as e:
+            logger.exception("Failed to generate box layout")
             return JsonResponse({
                 "error": f"An error occurred: {str(e)}"
             }, status=400)
 
-    def generate_box_data(self, length, breadth, height):
+    def generate_box_data(self, length, breadth, height, style=DEFAULT_STYLE):
         """
-        Generate the 2D box layout (SVG) based on the provided dimensions.
+        Generate the 2D box layout (SVG) based on the provided dimensions and box style.
         """
-        svg_template = f"""
-        <svg width="{length * 2 + breadth * 2 + 20}" height="{breadth + height * 2 + 20}" xmlns="http://www.w3.org/2000/svg">
-            <!-- Front Panel -->
-            <rect x="{breadth}" y="0" width="{length}" height="{breadth}" fill="lightblue" stroke="black" />
-            <!-- Back Panel -->
-            <rect x="{breadth}" y="{breadth + height}" width="{length}" height="{breadth}" fill="lightgreen" stroke="black" />
-            <!-- Top Panel -->
-            <rect x="{breadth}" y="{breadth}" width="{length}" height="{height}" fill="lightyellow" stroke="black" />
-            <!-- Bottom Panel -->
-            <rect x="{breadth}" y="{breadth + height + breadth}" width="{length}" height="{height}" fill="orange" stroke="black" />
-            <!-- Left Panel -->
-            <rect x="0" y="{breadth}" width="{breadth}" height="{height}" fill="pink" stroke="black" />
-            <!-- Right Panel -->
-            <rect x="{length + breadth}" y="{breadth}" width="{breadth}" height="{height}" fill="lightgray" stroke="black" />
-            <!-- Annotations -->
-            <text x="{breadth + length / 2}" y="{breadth / 2}" text-anchor="middle" font-size="12" fill="black">Front Panel</text>
-            <text x="{breadth + length / 2}" y="{breadth + height + breadth / 2}" text-anchor="middle" font-size="12" fill="black">Back Panel</text>
-        </svg>
+        return layout_engine.render(length, breadth, height, style)
+
+    @staticmethod
+    def layout_file_path(length, breadth, height, style=DEFAULT_STYLE):
+        """
+        Storage path of the cached layout for the given style and dimensions.
         """
-        return svg_template
\ No newline at end of file
+        return layout_artifacts.layout_file_path(length, breadth, height, style)
+
+
+class BoxLayoutFileView(View):
+    """
+    Serve a cached box layout, picking the gzip/brotli variant the client accepts.
+    """
+    def get(self, request, name):
+        try:
+            encoding, content = load_layout_variant(
+                f"{LAYOUT_STORAGE_DIR}/{name}", request.META.get('HTTP_ACCEPT_ENCODING', '')
+            )
+        except FileNotFoundError:
+            return JsonResponse({"error": "Box layout not found."}, status=404)
+        return svg_response(content, encoding)
+
+
+class BoxLayoutGeometryView(View):
+    """
+    Panel geometry of a box layout as compact JSON (rects, fills, labels) for
+    clients that draw it themselves (core/static/box_layout.js):
+    ?L=30&B=20&H=15&style=cross. Dimensions may be fractional.
+    """
+    def get(self, request):
+        try:
+            content = layout_engine.geometry_json(
+                request.GET.get('L', 0), request.GET.get('B', 0), request.GET.get('H', 0),
+                request.GET.get('style', DEFAULT_STYLE),
+            )
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return HttpResponse(content, content_type='application/json')
+
+
+class LayoutArtifactView(APIView):
+    """
+    Precomputed layout SVG, thumbnail and board cost of a design or box design
+    (see core.layout_artifacts). Only reads the stored artifacts: 202 while
+    they are being built, 404 if there are none.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, resource, pk):
+        try:
+            artifact = layout_artifacts.artifact_for(resource, pk)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        if artifact is None:
+            return JsonResponse({"error": "No layout artifacts for this object."}, status=status.HTTP_404_NOT_FOUND)
+        data = {"status": artifact.status, "updated_at": artifact.updated_at}
+        if artifact.status == 'pending':
+            return Response(data, status=status.HTTP_202_ACCEPTED)
+        if artifact.status == 'failed':
+            data["error"] = artifact.error
+        else:
+            data.update({
+                "svg_url": reverse('box_layout_file', args=[artifact.svg_path.rsplit('/', 1)[-1]]),
+                "thumbnail_url": default_storage.url(artifact.thumbnail_path),
+                "blank_area_cm2": artifact.blank_area_cm2,
+                "board_area_cm2": artifact.board_area_cm2,
+                "cost": artifact.cost,
+            })
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class BoxStyleListView(APIView):
+    """
+    List the box styles available to the layout generators.
+    """
+    def get(self, request):
+        return Response([style.as_dict() for style in available_styles()], status=status.HTTP_200_OK)
+
+
+def _monitoring_access(request):
+    """
+    Staff sessions, or monitoring presenting settings.HEALTH_CHECK_TOKEN in
+    the X-Health-Token header.
+    """
+    token = getattr(settings, 'HEALTH_CHECK_TOKEN', '')
+    if token and hmac.compare_digest(request.headers.get('X-Health-Token', ''), token):
+        return True
+    return request.user.is_authenticated and request.user.is_staff
+
+
+class MetricsView(View):
+    """
+    Prometheus text endpoint for the request instrumentation metrics.
+    Only available when settings.INSTRUMENTATION_ENABLED is set, and like the
+    database health details only to staff or with the X-Health-Token header.
+    """
+    def get(self, request):
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', False):
+            return JsonResponse({"error": "Instrumentation is disabled."}, status=404)
+        if not _monitoring_access(request):
+            return JsonResponse({"error": "Metrics need a staff session or the X-Health-Token header."}, status=403)
+        return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class DatabaseHealthView(View):
+    """
+    Connection health for every configured database: a SELECT 1 round trip,
+    the connection reuse mode and pool saturation. Returns 503 if any check fails.
+    Anonymous callers only see which databases are up; latency, mode and pool
+    details need a staff session or settings.HEALTH_CHECK_TOKEN in the
+    X-Health-Token header.
+    """
+    def get(self, request):
+        databases = check_databases()
+        healthy = all(database['ok'] for database in databases)
+        if not _monitoring_access(request):
+            databases = [database_summary(database) for database in databases]
+        return JsonResponse(
+            {"status": "ok" if healthy else "unavailable", "databases": databases},
+            status=200 if healthy else 503,
+        )
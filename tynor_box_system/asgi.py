@@ -2,6 +2,8 @@
 ASGI config for tynor_box_system project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+WebSocket connections go to the live box layout preview (core.live_preview);
+everything else is handled by Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -13,4 +15,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tynor_box_system.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up
+from core.live_preview import websocket_router  # noqa: E402
+
+application = websocket_router(django_application)
@@ -0,0 +1,93 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+GIN_INDEXES = {
+    'tynor_box_system_design_dims_gin': 'dimensions',
+    'tynor_box_system_design_specs_gin': 'material_specs',
+}
+
+
+def backfill_search_columns(apps, schema_editor):
+    from core.json_search import SEARCH_COLUMNS, search_column_values
+
+    Design = apps.get_model('tynor_box_system', 'Design')
+    batch = []
+    for design in Design.objects.using(schema_editor.connection.alias).only(
+        'id', 'dimensions', 'material_specs'
+    ).iterator(chunk_size=1000):
+        for name, value in search_column_values(design.dimensions, design.material_specs).items():
+            setattr(design, name, value)
+        batch.append(design)
+        if len(batch) == 1000:
+            Design.objects.using(schema_editor.connection.alias).bulk_update(batch, SEARCH_COLUMNS)
+            batch = []
+    if batch:
+        Design.objects.using(schema_editor.connection.alias).bulk_update(batch, SEARCH_COLUMNS)
+
+
+def create_gin_indexes(apps, schema_editor):
+    # JSON containment (@>) indexes exist only on PostgreSQL; SQLite uses key lookups
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in GIN_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "tynor_box_system_design" USING GIN ("{column}" jsonb_path_ops)'
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in GIN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tynor_box_system', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='design',
+            name='depth',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='design',
+            name='height',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='design',
+            name='material_type',
+            field=models.CharField(blank=True, editable=False, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='design',
+            name='width',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='design',
+            index=models.Index(fields=['material_type', 'width'], name='tynor_box_system_design_mat_w'),
+        ),
+        migrations.AddIndex(
+            model_name='design',
+            index=models.Index(fields=['width'], name='tynor_box_system_design_width'),
+        ),
+        migrations.AddIndex(
+            model_name='design',
+            index=models.Index(fields=['height'], name='tynor_box_system_design_height'),
+        ),
+        migrations.AddIndex(
+            model_name='design',
+            index=models.Index(fields=['depth'], name='tynor_box_system_design_depth'),
+        ),
+        migrations.RunPython(backfill_search_columns, migrations.RunPython.noop),
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model  # Use get_user_model() to get the CustomUser model
 from enum import Enum
+from core.json_search import JSONSearchColumns
 
 # Enum for design approval status
 class ApprovalStatus(Enum):
@@ -14,7 +15,7 @@ class ApprovalStatus(Enum):
         return [(tag.value, tag.name.capitalize()) for tag in cls]
 
 # Design model for storing design information, including uploaded files
-class Design(models.Model):
+class Design(JSONSearchColumns):  # Indexed copies of width/height/depth/material type (core.json_search)
     file = models.FileField(upload_to='designs/', null=True, blank=True)  # This field stores the uploaded design files
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)  # Link to the user who created the design
     name = models.CharField(max_length=255)  # Name of the design
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from core.serializers import SparseFieldsMixin
 from .models import Design, CDR
 from .models import ApprovalStatus  # Import the enum for approval status
 
-class DesignSerializer(serializers.ModelSerializer):
+class DesignSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Adding choices for approval status as a serializer field
     approval_status = serializers.ChoiceField(choices=ApprovalStatus.choices(), default=ApprovalStatus.PENDING.value)
 
@@ -17,7 +18,7 @@ class DesignSerializer(serializers.ModelSerializer):
         return value
 
 
-class CDRSerializer(serializers.ModelSerializer):
+class CDRSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Adding choices for approval status as a serializer field
     approval_status = serializers.ChoiceField(choices=ApprovalStatus.choices(), default=ApprovalStatus.PENDING.value)
     
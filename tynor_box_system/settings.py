@@ -1,3 +1,5 @@
+import importlib.util
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,8 +43,58 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.InstrumentationMiddleware',  # No-op unless INSTRUMENTATION_ENABLED
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',  # No-op unless a read replica is configured
 ]
 
+# Request instrumentation: Server-Timing headers, /api/metrics/ and sampled cProfile dumps
+INSTRUMENTATION_ENABLED = os.environ.get('TYNOR_INSTRUMENTATION') == '1'
+INSTRUMENTATION_PROFILE_SAMPLE_RATES = {}  # URL name -> fraction of requests to profile, e.g. {'cdr_report': 0.01}
+INSTRUMENTATION_PROFILE_DIR = BASE_DIR / 'profiles'
+
+# Layouts (length, breadth, height) pre-rendered for every box style at startup
+LAYOUT_WARM_UP_SIZES = [(30, 20, 15)]
+
+# Threads that render and compress layouts for the async (ASGI) views in core.async_views
+ASYNC_RENDER_WORKERS = int(os.environ.get('TYNOR_ASYNC_RENDER_WORKERS', 4))
+
+# Slow-operation log thresholds in milliseconds, keyed by 'query' or phase name (remove a key to disable)
+SLOW_OPERATION_THRESHOLDS_MS = {
+    'query': 200,
+    'serialize': 500,
+    'render': 250,
+    'compress': 250,
+    'reportlab': 1000,
+    'storage': 500,
+}
+SLOW_QUERY_EXPLAIN = False  # Attach EXPLAIN output to slow SELECT records
+SLOW_QUERY_LOG_PARAM_TYPES = False  # Attach the parameter count and types (never the values)
+
+# Slow operations are written as one JSON object per line
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'core.slowlog.JSONFormatter',
+        },
+    },
+    'handlers': {
+        'slow_operations': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'core.slow': {
+            'handlers': ['slow_operations'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'tynor_box_system.urls'
 
 TEMPLATES = [
@@ -76,6 +128,107 @@ DATABASES = {
     }
 }
 
+# Local SQLite database for benchmarks and tests without PostgreSQL (TYNOR_DB=sqlite)
+if os.environ.get('TYNOR_DB') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+# Read replica for list and report views (core.db_routers). Tests use it as a mirror of default.
+if os.environ.get('TYNOR_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['TYNOR_REPLICA_HOST'],
+        'PORT': os.environ.get('TYNOR_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif os.environ.get('TYNOR_DB') == 'sqlite' and os.environ.get('TYNOR_SQLITE_REPLICA') == '1':
+    # Second SQLite file as a replica stand-in; refresh it by copying db.sqlite3
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db-replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# PostgreSQL connection reuse (TYNOR_DB_CONNECTIONS):
+#   'pool'       - Django's native psycopg 3 pool (needs psycopg[pool]); best under ASGI
+#   'persistent' - CONN_MAX_AGE connections kept per worker thread, with health checks
+#   'off'        - a new connection per request
+# SQLite always opens a connection per request. Pool state is exported on
+# /api/metrics/ and checked by /api/health/db/ (core.db_health).
+DB_CONNECTION_MODE = os.environ.get('TYNOR_DB_CONNECTIONS', 'persistent')
+# Lets monitoring read /api/metrics/ and /api/health/db/ details (X-Health-Token header) without a staff session
+HEALTH_CHECK_TOKEN = os.environ.get('TYNOR_HEALTH_CHECK_TOKEN', '')
+if DB_CONNECTION_MODE == 'pool':
+    if importlib.util.find_spec('psycopg_pool') is None:
+        DB_CONNECTION_MODE = 'persistent'  # psycopg 3 pool not installed
+    else:
+        from psycopg_pool import ConnectionPool
+
+for database in DATABASES.values():
+    if database['ENGINE'] != 'django.db.backends.postgresql':
+        continue
+    if DB_CONNECTION_MODE == 'pool':
+        database['OPTIONS'] = {
+            **database.get('OPTIONS', {}),
+            'pool': {
+                'min_size': int(os.environ.get('TYNOR_DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ.get('TYNOR_DB_POOL_MAX_SIZE', 20)),
+                'timeout': float(os.environ.get('TYNOR_DB_POOL_TIMEOUT', 10)),  # Seconds to wait for a free connection
+                'max_idle': 300,
+                'check': ConnectionPool.check_connection,  # Validate connections as they leave the pool
+            },
+        }
+    elif DB_CONNECTION_MODE == 'persistent':
+        database['CONN_MAX_AGE'] = int(os.environ.get('TYNOR_DB_CONN_MAX_AGE', 600))
+        database['CONN_HEALTH_CHECKS'] = True
+
+DATABASE_ROUTERS = ['core.db_routers.ReplicaRouter']
+REPLICA_DATABASE_ALIAS = 'replica' if 'replica' in DATABASES else None
+REPLICA_STICKY_SECONDS = 10  # After a write, the client reads from the primary this long
+
+# Change feed (/api/changes/, core.change_feed): prune_change_feed drops
+# entries older than the retention period
+CHANGE_FEED_RETENTION_DAYS = 30
+
+# Layout artifacts (core.layout_artifacts): SVG, thumbnail and board cost built
+# in the background after designs and box designs are saved. 0 workers builds
+# them inline when the transaction commits.
+LAYOUT_ARTIFACT_WORKERS = int(os.environ.get('TYNOR_ARTIFACT_WORKERS', 2))
+LAYOUT_ARTIFACT_STYLE = 'cross'
+BOARD_COST_PER_M2 = {  # By material, per m2 of blank
+    'Cardboard': 0.45,
+    'Plastic': 2.10,
+    'Metal': 9.80,
+}
+
+# Box designs whose dimensions all differ by at most this much are reported as
+# near-duplicates by box_dedupe_report (core.box_dedupe)
+BOX_DEDUPE_TOLERANCE_CM = 0.5
+
+# Processes hashing passwords in the import_users command (core.user_import); defaults to the CPU count
+USER_IMPORT_HASH_WORKERS = int(os.environ.get('TYNOR_IMPORT_WORKERS', 0)) or None
+
+# Cache shared by all workers (login throttling, core.login_throttle). Without
+# TYNOR_REDIS_URL each process keeps its own, so limits apply per process.
+REDIS_URL = os.environ.get('TYNOR_REDIS_URL')
+if REDIS_URL:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Login throttling: bucket -> (capacity, tokens refilled per second). An
+# attempt needs a token from both its username's and its IP's bucket.
+LOGIN_THROTTLE_BUCKETS = {
+    'username': (10, 1 / 6),
+    'ip': (30, 1.0),
+}
+# Successful logins skip password hashing on repeat for this long (0 disables)
+LOGIN_AUTH_CACHE_SECONDS = 300
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -127,6 +280,10 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',  # orjson-backed, same bytes as JSONRenderer
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # AWS S3 Configuration for file storage